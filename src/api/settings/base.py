@@ -3,6 +3,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -115,6 +116,15 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'apps.core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'apps.core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 100
 }
@@ -133,6 +143,23 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+# Outbound HTTP clients per integration, see HttpClientUtil. Timeouts in seconds, backoff of the retries
+# in seconds times 2 ** (retry - 1). Integrations inherit the settings of default they do not override.
+OUTBOUND_HTTP = {
+    'default': {
+        'connect_timeout': 3.05,
+        'read_timeout': 10,
+        'retries': 2,
+        'backoff_factor': 0.5,
+        'retry_all_methods': False,
+        'pool_size': 10,
+    },
+    # Routes are requested with POST, but reading them is safe to repeat
+    'google': {'retry_all_methods': True, 'pool_size': 20},
+    'mailjet': {},
+    'link2prisma': {'read_timeout': 30},
+}
+
 # Celery Configuration
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://redis:6379/0')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://redis:6379/0')
@@ -144,6 +171,52 @@ CELERY_TASK_TRACK_STARTED = False
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_REDIS_URL', default=config('REDIS_URL', default='redis://redis:6379/0')),
+        'KEY_PREFIX': 'werkr',
+    }
+}
+
+# Rendered job views are invalidated by model signals, the timeout only bounds memory usage
+JOB_VIEW_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Hours kept free between two jobs of a worker, closer jobs are treated as a schedule conflict
+JOB_CONFLICT_BUFFER_HOURS = config('JOB_CONFLICT_BUFFER_HOURS', default=3, cast=float)
+
+# Background stages after an approval (see ApprovalPipelineUtil): attempts per stage, first retry delay
+# in seconds, doubled on every attempt, and the time after which a pipeline that did not move is resumed,
+# longer than the task time limit so a running stage is never run twice
+APPROVAL_PIPELINE_MAX_ATTEMPTS = 5
+APPROVAL_PIPELINE_RETRY_DELAY = 30
+APPROVAL_PIPELINE_STALE_AFTER = 60 * 35
+
+# Side effects recorded in the outbox (see OutboxUtil): concurrent events per channel, events claimed at once,
+# seconds a claimed event is leased to its dispatcher, attempts per event, first retry delay in seconds,
+# doubled on every attempt, delay before dispatching newly recorded events, time budget of a dispatch run
+# and days done events are kept
+OUTBOX_CHANNELS = {
+    'mail': 8,
+    'push': 8,
+    'link2prisma': 2,
+    'default': 4,
+}
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_LEASE = 60 * 5
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_KICK_DELAY = 1
+OUTBOX_DRAIN_SECONDS = 50
+OUTBOX_RETENTION_DAYS = 7
+
+# Paginated totals are invalidated by model signals, the timeout bounds staleness after bulk updates
+PAGINATION_TOTAL_CACHE_TIMEOUT = 60 * 5
+
+# Unfiltered tables with more rows than this report an estimated total on PostgreSQL
+PAGINATION_ESTIMATE_THRESHOLD = 100000
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -163,6 +236,7 @@ SWAGGER_SETTINGS = {
     'REFETCH_SCHEMA_ON_LOGOUT': True,
 }
 
+MAILJET_API_URL = 'https://api.mailjet.com'
 MAILJET_API_KEY = config('MAILJET_API_KEY')
 MAILJET_API_SECRET = config('MAILJET_API_SECRET')
 DEFAULT_FROM_EMAIL = 'info@werkr.be'
@@ -195,9 +269,38 @@ STATIC_URL = f'https://{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com/'
 # Google Maps
 GOOGLE_DIRECTIONS_EXPIRES_IN_DAYS = 60
 
+# Decimals coordinates are rounded to in the directions cache key, 4 decimals is about 11 m
+DIRECTIONS_CACHE_PRECISION = 4
+
+# Directions responses kept in the shared cache, and in the in-process LRU of every worker
+DIRECTIONS_CACHE_TIMEOUT = 60 * 60 * 24
+DIRECTIONS_LRU_SIZE = 512
+DIRECTIONS_LRU_TIMEOUT = 60 * 10
+
+# Routes without an answer are remembered briefly, so unroutable trips do not call Google on every request
+DIRECTIONS_NO_ROUTE_TIMEOUT = 60 * 10
+
+# Origins x destinations per route matrix request, the limit of the Routes API for coordinates is 625
+ROUTE_MATRIX_MAX_ELEMENTS = 625
+
+# Seconds Google is no longer called after a failed request, distances are estimated in the meantime
+DIRECTIONS_UPSTREAM_BACKOFF = 60
+
+# Distance estimates, see DistanceEstimatorUtil. A region precision of 4 is a cell of about 39 by 20 km
+DISTANCE_ESTIMATOR_REGION_PRECISION = 4
+DISTANCE_ESTIMATOR_MIN_SAMPLES = 20
+DISTANCE_ESTIMATOR_DEFAULT_FACTOR = 1.3
+
 GOOGLE_API_KEY = config('GOOGLE_API_KEY')
 
 GOOGLE_BASE_URL = "https://maps.googleapis.com"
+
+# Geocode and place search requests, see MapsProxyUtil. Cache timeouts in seconds, costs in USD per request
+GOOGLE_MAPS_PROXY = {
+    'geocode': {'cache_timeout': 60 * 60 * 24 * 30, 'cost': 0.005},
+    'reverse_geocode': {'cache_timeout': 60 * 60 * 24 * 30, 'cost': 0.005},
+    'autocomplete': {'cache_timeout': 60 * 60 * 24, 'cost': 0.032},
+}
 GOOGLE_ROUTES_URL = "https://routes.googleapis.com"
 
 DIMONA_URL = config('DIMONA_URL')
@@ -224,6 +327,38 @@ CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Periodic tasks, installed in the database scheduler on beat startup
+CELERY_BEAT_SCHEDULE = {
+    'purge-expired-directions': {
+        'task': 'apps.jobs.tasks.purge_expired_directions',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'fit-detour-factors': {
+        'task': 'apps.jobs.tasks.fit_detour_factors',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    'refine-estimated-distances': {
+        'task': 'apps.jobs.tasks.refine_estimated_distances',
+        'schedule': crontab(minute=15),
+    },
+    'transition-job-states': {
+        'task': 'apps.jobs.tasks.transition_job_states',
+        'schedule': crontab(minute='*/5'),
+    },
+    'resume-approval-pipelines': {
+        'task': 'apps.jobs.tasks.resume_approval_pipelines',
+        'schedule': crontab(minute='*/10'),
+    },
+    'dispatch-outbox': {
+        'task': 'apps.core.tasks.dispatch_outbox',
+        'schedule': crontab(),
+    },
+    'purge-outbox': {
+        'task': 'apps.core.tasks.purge_outbox',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
+
 # Sentry configuration
 SENTRY_DSN = config('SENTRY_DSN', default=None)
 
@@ -13,6 +13,13 @@ DATABASES = {
     }
 }
 
+# Cache in process memory, so development does not require Redis
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Email configuration for development
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
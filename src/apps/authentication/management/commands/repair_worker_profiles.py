@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.authentication.utils.worker_util import WorkerUtil
+
+
+class Command(BaseCommand):
+    help = 'Creates the missing worker profiles of users in the workers group'
+
+    def handle(self, *args, **options):
+        created = WorkerUtil.repair_worker_profiles()
+
+        self.stdout.write(self.style.SUCCESS(f"Created {created} missing worker profiles"))
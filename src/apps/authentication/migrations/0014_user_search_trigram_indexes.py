@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Columns searched by UserSearchUtil. Django compiles icontains to UPPER("column"::text) LIKE UPPER(%s)
+# on PostgreSQL, so the trigram indexes are built on that exact expression.
+SEARCH_COLUMNS = ['first_name', 'last_name', 'email']
+
+
+def get_index_name(column):
+    return 'authentication_user_{}_trgm'.format(column)
+
+
+def create_search_indexes(apps, schema_editor):
+    # Trigram indexes are PostgreSQL only, SQLite keeps scanning the table
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    table = apps.get_model('authentication', 'User')._meta.db_table
+
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{}" ON "{}" USING gin (UPPER("{}"::text) gin_trgm_ops)'.format(
+                get_index_name(column), table, column,
+            )
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS "{}"'.format(get_index_name(column)))
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built concurrently, which can not run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("authentication", "0013_alter_jobtype_weight_alter_location_weight_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
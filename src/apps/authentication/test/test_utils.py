@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+
+from apps.authentication.models.profiles.worker_profile import WorkerProfile
+from apps.authentication.utils.user_search_util import UserSearchUtil
+from apps.authentication.utils.worker_util import WorkerUtil
+from apps.core.assumptions import WORKERS_GROUP_NAME
+from apps.core.models.geo import Address
+from apps.core.utils.wire_names import *
+from apps.jobs.models import Tag
+
+User = get_user_model()
+
+
+class WorkerUtilTest(TestCase):
+
+    def setUp(self):
+        self.group, _ = Group.objects.get_or_create(name=WORKERS_GROUP_NAME)
+        self.tag = Tag.objects.create(title='Cleaning', color='#FFFFFF', icon='<svg/>')
+
+    def _create_worker(self, index, with_profile=True):
+        worker = User.objects.create_user(username='worker{}'.format(index), email='w{}@werkr.be'.format(index))
+        worker.groups.add(self.group)
+
+        if with_profile:
+            worker_profile = WorkerProfile.objects.create(
+                user=worker,
+                worker_address=Address.objects.create(city='Gent', latitude=51.05, longitude=3.72),
+            )
+            worker_profile.tags.add(self.tag)
+
+        return worker
+
+    def test_to_worker_views_matches_to_worker_view(self):
+        worker = self._create_worker(0)
+
+        view = WorkerUtil.to_worker_view(User.objects.get(id=worker.id))
+
+        self.assertEqual(WorkerUtil.to_worker_views(User.objects.filter(id=worker.id)), [view])
+        self.assertEqual(view[k_address][k_city], 'Gent')
+        self.assertEqual(view[k_tags][0]['title'], 'Cleaning')
+
+    def test_to_worker_views_query_count_is_constant(self):
+        for index in range(5):
+            self._create_worker(index)
+
+        # Users with profiles and addresses, then the tags
+        with self.assertNumQueries(2):
+            views = WorkerUtil.to_worker_views(User.objects.order_by('username'))
+
+        self.assertEqual(len(views), 5)
+
+        workers = list(User.objects.order_by('username'))
+
+        # Profiles, addresses, then the tags
+        with self.assertNumQueries(3):
+            self.assertEqual(WorkerUtil.to_worker_views(workers), views)
+
+    def test_to_worker_view_does_not_create_profile(self):
+        worker = self._create_worker(0, with_profile=False)
+
+        view = WorkerUtil.to_worker_views([worker])[0]
+
+        self.assertEqual(view[k_id], worker.id)
+        self.assertNotIn(k_tags, view)
+        self.assertFalse(WorkerProfile.objects.filter(user=worker).exists())
+
+    def test_repair_worker_profiles(self):
+        self._create_worker(0)
+        worker = self._create_worker(1, with_profile=False)
+
+        self.assertEqual(WorkerUtil.repair_worker_profiles(), 1)
+        self.assertTrue(WorkerProfile.objects.filter(user=worker).exists())
+        self.assertEqual(WorkerUtil.repair_worker_profiles(), 0)
+
+
+class UserSearchUtilTest(TestCase):
+
+    def setUp(self):
+        for username, first_name, last_name, email in [
+            ('anna', 'Anna', 'Peeters', 'anna@werkr.be'),
+            ('johanna', 'Johanna', 'Maes', 'jo@werkr.be'),
+            ('bert', 'Bert', 'Janssens', 'bert.annaert@werkr.be'),
+            ('carl', 'Carl', 'Wouters', 'carl@werkr.be'),
+        ]:
+            User.objects.create_user(username=username, first_name=first_name, last_name=last_name, email=email)
+
+    def test_search_matches_every_field_in_one_query(self):
+        with self.assertNumQueries(1):
+            usernames = set(UserSearchUtil.search(User.objects.all(), 'ann').values_list('username', flat=True))
+
+        self.assertEqual(usernames, {'anna', 'johanna', 'bert'})
+
+    def test_prefix_matches_rank_first(self):
+        users = UserSearchUtil.search(User.objects.all(), 'ann').order_by(
+            '-{}'.format(UserSearchUtil.rank_field), 'username',
+        )
+
+        self.assertEqual(users.first().username, 'anna')
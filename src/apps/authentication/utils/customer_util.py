@@ -6,6 +6,13 @@ from .profile_util import ProfileUtil
 
 class CustomerUtil:
 
+    # Relations rendered by to_customer_view, joined in when serializing several customers
+    select_related_fields = [
+        'customer_profile__customer_address',
+        'customer_profile__customer_billing_address',
+        'customer_profile__tag',
+    ]
+
     @staticmethod
     def to_customer_view(customer, has_active_job: bool = False):
         # Check if the related CustomerProfile exists
@@ -38,4 +45,20 @@ class CustomerUtil:
         except Exception:
             pass
 
-        return data
\ No newline at end of file
+        return data
+
+    @staticmethod
+    def to_directory_view(customer):
+        """
+        Renders a customer of the CMS directory, from a customer annotated by StatisticsService.annotate_customer_directory.
+        """
+
+        data = CustomerUtil.to_customer_view(customer, has_active_job=customer.has_active_job)
+
+        data.update({
+            k_open_jobs_count: customer.open_jobs_count,
+            k_done_jobs_count: customer.done_jobs_count,
+            k_hours: round(customer.done_duration.total_seconds() / 3600) if customer.done_duration else 0,
+        })
+
+        return data
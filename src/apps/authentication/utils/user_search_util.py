@@ -0,0 +1,54 @@
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+
+class UserSearchUtil:
+    """
+    Ranked search over the name and email of users, run as a single query.
+
+    Matching uses icontains, which PostgreSQL serves from the trigram indexes of migration
+    authentication.0014. Prefix matches rank above other matches. On PostgreSQL, ties are ranked
+    by trigram similarity, on other databases (SQLite in tests) by the ordering of the caller.
+    """
+
+    search_fields = ['first_name', 'last_name', 'email']
+
+    # Annotation holding the rank, higher is better
+    rank_field = 'search_rank'
+
+    @staticmethod
+    def get_rank(search_term: str, vendor: str):
+        prefix_match = Q()
+
+        for field in UserSearchUtil.search_fields:
+            prefix_match |= Q(**{'{}__istartswith'.format(field): search_term})
+
+        rank = Case(When(prefix_match, then=Value(1.0)), default=Value(0.0), output_field=FloatField())
+
+        if vendor != 'postgresql':
+            return rank
+
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        return rank + Greatest(*[TrigramSimilarity(field, search_term) for field in UserSearchUtil.search_fields])
+
+    @staticmethod
+    def search(users, search_term: str):
+        """
+        Args:
+        users (QuerySet): The users to search in.
+        search_term (str): The text to look for in the first name, last name or email.
+
+        Returns:
+        QuerySet: The matching users, annotated with their search rank.
+        """
+
+        query = Q()
+
+        for field in UserSearchUtil.search_fields:
+            query |= Q(**{'{}__icontains'.format(field): search_term})
+
+        vendor = connections[users.db].vendor
+
+        return users.filter(query).annotate(**{UserSearchUtil.rank_field: UserSearchUtil.get_rank(search_term, vendor)})
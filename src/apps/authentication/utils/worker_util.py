@@ -1,13 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet, prefetch_related_objects
+
 from apps.authentication.models.profiles.worker_profile import WorkerProfile
+from apps.core.assumptions import WORKERS_GROUP_NAME
 from apps.core.utils.formatters import FormattingUtil
 from apps.core.utils.wire_names import *
 from .profile_util import ProfileUtil
 
+User = get_user_model()
+
 
 class WorkerUtil:
 
+    # Relations rendered by to_worker_view, loaded up front when serializing several workers
+    select_related_fields = ['worker_profile__worker_address']
+    prefetch_related_fields = ['worker_profile__tags']
+
     @staticmethod
     def to_worker_view(worker):
+        """
+        Renders the model view of a worker. Never writes to the database: workers without a worker profile
+        are rendered without their profile fields, see repair_worker_profiles.
+        """
+
         # Required data
         data = {
             k_id: worker.id,
@@ -18,32 +33,70 @@ class WorkerUtil:
             k_phone_number: worker.phone_number,
         }
 
-        if not hasattr(worker, 'worker_profile'):
-            worker_profile = WorkerProfile.objects.create(user=worker)
-        
-        worker_profile = worker.worker_profile
-        data.update({
-            k_iban: worker_profile.iban,
-            k_ssn: worker_profile.ssn,
-            k_worker_type: worker_profile.worker_type,
-            k_tags: [tag.to_model_view() for tag in worker_profile.tags.all()] if worker_profile.tags.all() else None,
-        })
+        worker_profile = getattr(worker, 'worker_profile', None)
+
+        if worker_profile is not None:
+            tags = [tag.to_model_view() for tag in worker_profile.tags.all()]
+
+            data.update({
+                k_iban: worker_profile.iban,
+                k_ssn: worker_profile.ssn,
+                k_worker_type: worker_profile.worker_type,
+                k_tags: tags or None,
+                k_date_of_birth: FormattingUtil.to_timestamp(worker_profile.date_of_birth),
+            })
+
+            if worker_profile.worker_address is not None:
+                data[k_address] = worker_profile.worker_address.to_model_view()
 
-        try:
-            data[k_address] = worker_profile.worker_address.to_model_view()
-        except Exception:
-            pass
-        try:
-            data[k_date_of_birth] = FormattingUtil.to_timestamp(worker_profile.date_of_birth)
-        except Exception:
-            pass
         try:
             data[k_profile_picture] = ProfileUtil.get_user_profile_picture_url(worker)
         except Exception:
             pass
 
         return data
-    
+
+    @staticmethod
+    def to_worker_views(workers):
+        """
+        Serializes a collection of workers to the same format as to_worker_view,
+        loading profiles, addresses and tags for all of them in a constant number of queries.
+
+        Args:
+        workers (QuerySet | Iterable[User]): A queryset, page or list of workers.
+
+        Returns:
+        list: The worker views, in the order of the given workers.
+        """
+
+        if isinstance(workers, QuerySet):
+            workers = list(workers.select_related(*WorkerUtil.select_related_fields)
+                           .prefetch_related(*WorkerUtil.prefetch_related_fields))
+        else:
+            workers = list(workers)
+            prefetch_related_objects(workers, *WorkerUtil.select_related_fields, *WorkerUtil.prefetch_related_fields)
+
+        return [WorkerUtil.to_worker_view(worker) for worker in workers]
+
+    @staticmethod
+    def repair_worker_profiles(workers=None) -> int:
+        """
+        Creates the missing worker profiles of workers, the maintenance counterpart of the read-only to_worker_view.
+
+        Args:
+        workers (QuerySet): The users to repair, every user in the workers group by default.
+
+        Returns:
+        int: The number of created worker profiles.
+        """
+
+        if workers is None:
+            workers = User.objects.filter(groups__name__contains=WORKERS_GROUP_NAME)
+
+        missing = workers.filter(worker_profile__isnull=True).distinct()
+
+        return len(WorkerProfile.objects.bulk_create([WorkerProfile(user=worker) for worker in missing]))
+
     @staticmethod
     def calculate_worker_completion(worker):
         """
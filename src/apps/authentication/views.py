@@ -7,20 +7,23 @@ from apps.authentication.utils.encryption_util import EncryptionUtil
 from apps.authentication.utils.pass_reset_util import CustomPasswordResetUtil
 from apps.authentication.utils.worker_util import WorkerUtil
 from apps.authentication.utils.profile_util import ProfileUtil
+from apps.authentication.utils.user_search_util import UserSearchUtil
 from apps.core.assumptions import CMS_GROUP_NAME, CUSTOMERS_GROUP_NAME
 from apps.core.assumptions import (
     WORKERS_GROUP_NAME
 )
 from apps.core.model_exceptions import DeserializationException
 from apps.core.models.settings import Settings
+from apps.core.utils.count_util import CountUtil
 from apps.core.utils.formatters import FormattingUtil
+from apps.core.utils.json_util import FastJsonResponse
+from apps.core.utils.pagination_util import PaginationUtil
 from apps.core.utils.wire_names import *
-from apps.jobs.models import Job, JobState, Tag
+from apps.jobs.models import Tag
 from apps.jobs.services.statistics_service import StatisticsService
 from django.contrib.auth.models import Group
-from django.core.paginator import Paginator
 from django.http import HttpResponseForbidden, HttpRequest, HttpResponse, HttpResponseRedirect
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseNotFound
+from django.http import HttpResponseBadRequest, HttpResponseNotFound
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
@@ -459,7 +462,7 @@ class LanguageSettingsView(JWTBaseAuthView):
             JsonResponse: A JSON response containing the list of available languages.
         """
         languages = sorted(set(setting.language for setting in Settings.objects.all() if setting.language))
-        return JsonResponse({'languages': languages})
+        return FastJsonResponse({'languages': languages})
 
     def put(self, request):
         """
@@ -877,7 +880,7 @@ class StatisticsView(JWTBaseAuthView):
                 year_stats = StatisticsService.get_monthly_stats(worker_id, today.year - i)
                 stats.append(year_stats)
 
-        return JsonResponse({k_statistics: stats})
+        return FastJsonResponse({k_statistics: stats})
 
 
 class WorkerDetailView(JWTBaseAuthView):
@@ -1055,30 +1058,31 @@ class WorkersListView(JWTBaseAuthView):
             
             term = sort_term
 
-        workers = workers.order_by(term)
+        ordering = [term, '-id']
 
+        # Search ranks matches first, the sort term orders matches of equal rank
         if search_term:
-            queries = [
-                workers.filter(first_name__icontains=search_term)[:10],
-                workers.filter(last_name__icontains=search_term)[:10],
-                workers.filter(email__icontains=search_term)[:10]
-            ]
-            data = list({worker for query in queries for worker in query})
-        else:
-            data = list(workers)
+            workers = UserSearchUtil.search(workers, search_term)
+            ordering.insert(0, '-{}'.format(UserSearchUtil.rank_field))
 
-        paginator = Paginator(data, per_page=item_count)
-        paginated_workers = paginator.page(page).object_list
+        try:
+            paginated_workers, next_cursor = PaginationUtil.paginate(
+                workers.select_related(*WorkerUtil.select_related_fields),
+                ordering,
+                per_page=item_count,
+                cursor=request.GET.get(k_cursor),
+                page=page,
+            )
+        except DeserializationException as e:
+            return Response({k_message: e.args}, status=status.HTTP_400_BAD_REQUEST)
 
-        response_data = [
-            WorkerUtil.to_worker_view(worker)
-            for worker in paginated_workers
-        ]
+        response_data = WorkerUtil.to_worker_views(paginated_workers)
 
         return Response({
             k_workers: response_data,
-            k_items_per_page: paginator.per_page,
-            k_total: paginator.count
+            k_items_per_page: item_count,
+            k_total: CountUtil.get_total(workers),
+            k_next_cursor: next_cursor,
         })
 
 
@@ -1248,12 +1252,6 @@ class CustomersListView(JWTBaseAuthView):
         sort_term = kwargs.get('sort_term')
         algorithm = kwargs.get('algorithm')
 
-        # Get customers with active jobs
-        active_job_customers = Job.objects.filter(
-            start_time__lt=datetime.datetime.utcnow(),
-            job_state=JobState.pending
-        ).values_list('customer', flat=True)
-
         # Filter customers by group and archived status
         customers = User.objects.filter(
             groups__name__contains=CUSTOMERS_GROUP_NAME,
@@ -1261,37 +1259,41 @@ class CustomersListView(JWTBaseAuthView):
         )
 
         # Apply sorting if sort_term is provided
+        ordering = ['-date_joined', '-id']
+
         if sort_term:
             if algorithm == 'descending':
                 sort_term = f'-{sort_term}'
-            customers = customers.order_by(sort_term)
+            ordering = [sort_term, '-id']
 
-        # Apply search if search_term is provided
+        # Apply search if search_term is provided, ranking the best matches first
         if search_term:
-            queries = [
-                customers.filter(first_name__icontains=search_term)[:10],
-                customers.filter(last_name__icontains=search_term)[:10],
-                customers.filter(email__icontains=search_term)[:10]
-            ]
-            data = list({customer for query in queries for customer in query})
-        else:
-            data = list(customers)
+            customers = UserSearchUtil.search(customers, search_term)
+            ordering.insert(0, '-{}'.format(UserSearchUtil.rank_field))
 
-        # Paginate the customer list
-        paginator = Paginator(data, per_page=item_count)
-        paginated_customers = paginator.page(page).object_list
+        # Paginate the customer list in the database, with the job statistics computed in the same query
+        try:
+            paginated_customers, next_cursor = PaginationUtil.paginate(
+                StatisticsService.annotate_customer_directory(
+                    customers.select_related(*CustomerUtil.select_related_fields)
+                ),
+                ordering,
+                per_page=item_count,
+                cursor=request.GET.get(k_cursor),
+                page=page,
+            )
+        except DeserializationException as e:
+            return Response({k_message: e.args}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Convert customers to view format and check for active jobs
-        response_data = [
-            CustomerUtil.to_customer_view(customer, has_active_job=customer.id in active_job_customers)
-            for customer in paginated_customers
-        ]
+        # Convert customers to view format, including their job statistics
+        response_data = [CustomerUtil.to_directory_view(customer) for customer in paginated_customers]
 
         # Return the paginated customer data
         return Response({
             k_customers: response_data,
-            k_items_per_page: paginator.per_page,
-            k_total: paginator.count
+            k_items_per_page: item_count,
+            k_total: CountUtil.get_total(customers),
+            k_next_cursor: next_cursor,
         })
 
 
@@ -1452,15 +1454,12 @@ class CustomerSearchTermView(JWTBaseAuthView):
         if not search_term:
             return HttpResponseNotFound()
 
-        customers = User.objects.filter(groups__name__contains=CUSTOMERS_GROUP_NAME)
-
-        queries = [
-            customers.filter(first_name__icontains=search_term)[:5],
-            customers.filter(last_name__icontains=search_term)[:5],
-            customers.filter(email__icontains=search_term)[:5]
-        ]
+        customers = UserSearchUtil.search(
+            User.objects.filter(groups__name__contains=CUSTOMERS_GROUP_NAME),
+            search_term,
+        ).select_related(*CustomerUtil.select_related_fields).order_by('-{}'.format(UserSearchUtil.rank_field), 'id')
 
-        data = [CustomerUtil.to_customer_view(customer) for query in queries for customer in query.all()]
+        data = [CustomerUtil.to_customer_view(customer) for customer in customers[:15]]
 
         return Response({k_customers: list(data)})
 
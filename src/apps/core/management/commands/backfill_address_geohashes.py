@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.models.geo import Address
+from apps.core.utils.geo_index_util import GeoIndexUtil
+
+
+class Command(BaseCommand):
+    help = 'Fills in the geohash spatial index of addresses with coordinates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Addresses updated per query')
+        parser.add_argument('--all', action='store_true', help='Recompute every geohash, not only the missing ones')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        addresses = Address.objects.filter(latitude__isnull=False, longitude__isnull=False)
+
+        if not options['all']:
+            addresses = addresses.filter(geohash__isnull=True)
+
+        self.stdout.write(f"Found {addresses.count()} addresses to process")
+
+        updated_count = 0
+        last_id = 0
+
+        # Walk the table by primary key, so every batch is an index range scan
+        while True:
+            batch = list(addresses.filter(id__gt=last_id).order_by('id').only('id', 'latitude', 'longitude')[:batch_size])
+
+            if not batch:
+                break
+
+            for address in batch:
+                address.geohash = GeoIndexUtil.encode(address.latitude, address.longitude)
+
+            Address.objects.bulk_update(batch, ['geohash'])
+
+            updated_count += len(batch)
+            last_id = batch[-1].id
+
+            self.stdout.write(f"Updated {updated_count} addresses")
+
+        self.stdout.write(self.style.SUCCESS(f"Finished backfilling geohashes of {updated_count} addresses"))
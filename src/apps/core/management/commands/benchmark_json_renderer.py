@@ -0,0 +1,115 @@
+import timeit
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.renderers import FastJSONRenderer
+from apps.core.utils.json_util import JSONUtil
+from apps.core.utils.wire_names import *
+
+
+class Command(BaseCommand):
+    help = 'Compares the render time of the default DRF JSON renderer and FastJSONRenderer for a job list payload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=100, help='Number of jobs in the payload')
+        parser.add_argument('--workers', type=int, default=3, help='Time registrations per job')
+        parser.add_argument('--repeat', type=int, default=200, help='Renders per measurement')
+
+    @staticmethod
+    def build_address(i):
+        return {
+            k_id: uuid.uuid4(),
+            k_street_name: 'Kerkstraat',
+            k_house_number: str(i),
+            k_box_number: None,
+            k_city: 'Gent',
+            k_zip_code: '9000',
+            k_country: 'BE',
+            k_latitude: Decimal('51.0543422'),
+            k_longitude: Decimal('3.7174243'),
+        }
+
+    def build_payload(self, job_count: int, worker_count: int) -> dict:
+        """
+        Builds a payload shaped like the job list endpoints return, with the UUIDs, datetimes and decimals
+        the renderer has to handle.
+        """
+
+        now = timezone.now()
+        jobs = []
+
+        for i in range(job_count):
+            start = now + timedelta(days=i)
+
+            registrations = [{
+                k_id: uuid.uuid4(),
+                k_start_time: start,
+                k_end_time: start + timedelta(hours=8),
+                k_break_time: timedelta(minutes=30),
+                k_worker: {
+                    k_id: uuid.uuid4(),
+                    k_first_name: 'Worker',
+                    k_last_name: str(w),
+                    k_email: 'worker{}@werkr.be'.format(w),
+                    k_date_of_birth: start.date(),
+                    k_address: self.build_address(w),
+                    k_tags: [{k_id: uuid.uuid4(), k_title: 'Washer'}],
+                },
+            } for w in range(worker_count)]
+
+            jobs.append({
+                k_id: uuid.uuid4(),
+                k_title: 'Job {}'.format(i),
+                k_description: 'Car wash at the customer location. ' * 4,
+                k_time_registrations: registrations,
+                k_address: self.build_address(i),
+                k_start_time: start,
+                k_end_time: start + timedelta(hours=8),
+                k_application_start_time: now,
+                k_application_end_time: start - timedelta(days=1),
+                k_max_workers: worker_count,
+                k_is_draft: False,
+                k_selected_workers: worker_count,
+                k_state: 'pending',
+                k_tag: {k_id: uuid.uuid4(), k_title: 'Washing', 'color': '#00FF00'},
+                k_customer: {
+                    k_id: uuid.uuid4(),
+                    k_first_name: 'Customer',
+                    k_last_name: str(i),
+                    k_company: 'Werkr',
+                    k_address: self.build_address(i),
+                    k_created_at: now,
+                },
+            })
+
+        return {k_jobs: jobs, k_total: job_count}
+
+    def handle(self, *args, **options):
+        payload = self.build_payload(options['jobs'], options['workers'])
+        repeat = options['repeat']
+
+        renderers = [
+            ('DRF JSONRenderer', JSONRenderer()),
+            ('FastJSONRenderer', FastJSONRenderer()),
+        ]
+
+        if not JSONUtil.is_fast():
+            self.stdout.write(self.style.WARNING('orjson is not installed, FastJSONRenderer uses the standard library'))
+
+        results = {}
+
+        for name, renderer in renderers:
+            size = len(renderer.render(payload))
+            seconds = min(timeit.repeat(lambda: renderer.render(payload), number=repeat, repeat=3)) / repeat
+            results[name] = seconds
+
+            self.stdout.write(f"{name}: {seconds * 1000:.3f} ms per render, {size} bytes")
+
+        speedup = results['DRF JSONRenderer'] / results['FastJSONRenderer']
+
+        self.stdout.write(self.style.SUCCESS(f"FastJSONRenderer is {speedup:.1f}x faster for {options['jobs']} jobs"))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_address_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='address',
+            name='geohash',
+            field=models.CharField(db_index=True, max_length=12, null=True),
+        ),
+    ]
@@ -2,3 +2,4 @@ from .geo import Address
 from .settings import Settings
 from .export_file import ExportFile
 
+from .outbox_event import OutboxEvent
@@ -1,5 +1,6 @@
 from django.db import models
 from rest_framework.exceptions import *
+from apps.core.utils.geo_index_util import GeoIndexUtil
 from apps.core.utils.wire_names import *
 
 
@@ -21,6 +22,22 @@ class Address(models.Model):
     latitude = models.FloatField(max_length=16, null=True)
     longitude = models.FloatField(max_length=16, null=True)
 
+    # Spatial index of the coordinates, maintained on save, see GeoIndexUtil
+    geohash = models.CharField(max_length=12, null=True, db_index=True)
+
+    def save(self, *args, **kwargs):
+        try:
+            self.geohash = GeoIndexUtil.encode(float(self.latitude), float(self.longitude))
+        except (TypeError, ValueError):
+            self.geohash = None
+
+        update_fields = kwargs.get('update_fields')
+
+        if update_fields is not None and {'latitude', 'longitude'}.intersection(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+
+        super().save(*args, **kwargs)
+
     def to_city(self):
 
         if self.city is not None:
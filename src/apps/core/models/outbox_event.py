@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    """
+    A side effect of a domain change (a mail, a push notification, a Link2Prisma call), recorded in the same
+    transaction as the change and carried out afterwards by OutboxUtil.dispatch.
+
+    The handler is the import path of the function carrying out the event, called with the payload as keyword
+    arguments. Events of the same channel share a concurrency limit.
+    """
+
+    class State(models.TextChoices):
+        pending = 'pending'
+        done = 'done'
+        failed = 'failed'
+
+    channel = models.CharField(max_length=32)
+
+    handler = models.CharField(max_length=128)
+
+    payload = models.JSONField(default=dict)
+
+    state = models.CharField(max_length=16, choices=State.choices, default=State.pending)
+
+    attempts = models.PositiveIntegerField(default=0)
+
+    # Pending events are dispatched from this time on; claimed and failed attempts push it back
+    available_at = models.DateTimeField(default=timezone.now)
+
+    error = models.CharField(max_length=256, null=True, blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'available_at'], name='core_outbox_state_idx'),
+        ]
@@ -0,0 +1,16 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from apps.core.utils.json_util import JSONUtil
+
+
+class FastJSONParser(JSONParser):
+    """
+    Default API parser for JSON bodies, decodes requests with JSONUtil (orjson when available).
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return JSONUtil.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,20 @@
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.utils.json_util import JSONUtil
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Default API renderer, encodes responses with JSONUtil (orjson when available).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+
+        # The browsable API asks for indented output, everything else gets compact JSON
+        indent = bool(self.get_indent(accepted_media_type, renderer_context))
+
+        return JSONUtil.dumps(data, indent=indent)
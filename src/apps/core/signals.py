@@ -0,0 +1,27 @@
+"""
+Bumps the count generation of a table whenever one of its rows is saved or deleted, see CountUtil.
+
+Only the models counted by paginated endpoints are connected, and the generation is bumped once the transaction
+commits, so a concurrent count never caches the old total under the new generation.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from apps.core.models import ExportFile
+from apps.core.utils.count_util import CountUtil
+from apps.jobs.models import Dimona, Job, JobApplication
+
+counted_models = [Job, JobApplication, Dimona, ExportFile, get_user_model()]
+
+
+def bump_count_generation(sender, **kwargs):
+    table = sender._meta.db_table
+
+    transaction.on_commit(lambda: CountUtil.bump_generation(table))
+
+
+for model in counted_models:
+    post_save.connect(bump_count_generation, sender=model, dispatch_uid='bump_count_generation_save')
+    post_delete.connect(bump_count_generation, sender=model, dispatch_uid='bump_count_generation_delete')
@@ -43,4 +43,24 @@ def execute_task(self, func_path, *args, **kwargs):
     except Exception as e:
         logger.error(f"[DEBUG] Error executing task {func_path}: {str(e)}")
         logger.error(f"[DEBUG] Exception traceback: {''.join(traceback.format_tb(e.__traceback__))}")
-        raise e
\ No newline at end of file
+        raise e
+
+
+@shared_task
+def dispatch_outbox():
+    """
+    Dispatches the due outbox events, see OutboxUtil. Runs every minute and shortly after events are recorded.
+    """
+    from apps.core.utils.outbox_util import OutboxUtil
+
+    return OutboxUtil.drain()
+
+
+@shared_task
+def purge_outbox():
+    """
+    Daily task deleting the outbox events that were done a while ago.
+    """
+    from apps.core.utils.outbox_util import OutboxUtil
+
+    return {'deleted': OutboxUtil.purge()}
@@ -0,0 +1,70 @@
+from django.test import SimpleTestCase, TestCase
+
+from apps.core.models.geo import Address
+from apps.core.utils.geo_index_util import GeoIndexUtil
+from apps.core.utils.geo_util import GeoUtil
+
+
+class GeoUtilTest(SimpleTestCase):
+
+    def setUp(self):
+        # Gent, Brussel, Antwerpen
+        self.lats = [51.05, 50.85, 51.22]
+        self.lons = [3.72, 4.35, 4.40]
+
+    def test_get_distances_matches_get_distance(self):
+        distances = GeoUtil.get_distances(51.05, 3.72, self.lats, self.lons)
+
+        for distance, lat, lon in zip(distances, self.lats, self.lons):
+            self.assertAlmostEqual(distance, GeoUtil.get_distance(51.05, 3.72, lat, lon), places=6)
+
+    def test_bounding_box_contains_radius(self):
+        (min_lat, max_lat), (min_lon, max_lon) = GeoUtil.get_bounding_box(51.05, 3.72, 50)
+
+        for lat, lon in zip(self.lats, self.lons):
+            inside = min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+
+            if GeoUtil.get_distance(51.05, 3.72, lat, lon) <= 50:
+                self.assertTrue(inside)
+
+        # Antwerpen lies about 50 km from Gent, Brussel too, both outside a 20 km box
+        (min_lat, max_lat), (min_lon, max_lon) = GeoUtil.get_bounding_box(51.05, 3.72, 20)
+
+        self.assertFalse(min_lon <= 4.35 <= max_lon)
+
+
+class GeoIndexUtilTest(TestCase):
+
+    def test_encode(self):
+        self.assertEqual(GeoIndexUtil.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_address_geohash_is_maintained_on_save(self):
+        address = Address.objects.create(city='Gent', latitude=51.05, longitude=3.72)
+
+        self.assertEqual(address.geohash, GeoIndexUtil.encode(51.05, 3.72))
+
+        address.latitude = 50.85
+        address.longitude = 4.35
+        address.save(update_fields=['latitude', 'longitude'])
+
+        self.assertEqual(Address.objects.get(id=address.id).geohash, GeoIndexUtil.encode(50.85, 4.35))
+        self.assertIsNone(Address.objects.create(city='Unknown').geohash)
+
+    def test_cells_cover_radius(self):
+        cells = GeoIndexUtil.get_cells(51.05, 3.72, 10)
+
+        self.assertLessEqual(len(cells), GeoIndexUtil.max_cells)
+
+        # Points on the edge of the radius, in every direction
+        for lat, lon in [(51.14, 3.72), (50.96, 3.72), (51.05, 3.86), (51.05, 3.58)]:
+            self.assertTrue(any(GeoIndexUtil.encode(lat, lon).startswith(cell) for cell in cells))
+
+    def test_get_within(self):
+        gent = Address.objects.create(city='Gent', latitude=51.05, longitude=3.72)
+        nearby = Address.objects.create(city='Merelbeke', latitude=51.00, longitude=3.75)
+        Address.objects.create(city='Brussel', latitude=50.85, longitude=4.35)
+
+        within = GeoIndexUtil.get_within(Address.objects.all(), 51.05, 3.72, 10)
+
+        self.assertEqual([address for address, _ in within], [gent, nearby])
+        self.assertAlmostEqual(within[1][1], GeoUtil.get_distance(51.05, 3.72, 51.00, 3.75))
@@ -0,0 +1,97 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from apps.core.utils.http_client_util import HttpClientUtil
+
+OUTBOUND_HTTP = {
+    'default': {
+        'connect_timeout': 1,
+        'read_timeout': 1,
+        'retries': 2,
+        'backoff_factor': 0,
+        'retry_all_methods': False,
+        'pool_size': 2,
+    },
+    'test': {},
+}
+
+
+class FlakyServer(ThreadingHTTPServer):
+    """
+    Answers 503 to the first failures requests, and 200 afterwards.
+    """
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.requests = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle_request(self):
+                server = self.server
+                server.requests.append((self.command, self.client_address[1]))
+
+                status = 503 if len(server.requests) <= server.failures else 200
+
+                self.send_response(status)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'ok')
+
+            do_GET = handle_request
+            do_POST = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return 'http://127.0.0.1:{}/'.format(self.server_port)
+
+
+@override_settings(OUTBOUND_HTTP=OUTBOUND_HTTP)
+class HttpClientUtilTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        HttpClientUtil.sessions.clear()
+
+    def tearDown(self):
+        HttpClientUtil.sessions.clear()
+
+    def test_retries_idempotent_requests(self):
+        server = FlakyServer(failures=2)
+
+        try:
+            self.assertEqual(HttpClientUtil.request('test', 'GET', server.url).status_code, 200)
+            self.assertEqual(HttpClientUtil.request('test', 'GET', server.url).status_code, 200)
+        finally:
+            server.shutdown()
+
+        self.assertEqual(len(server.requests), 4)
+
+        # The connection is kept alive between requests
+        self.assertEqual(len({port for _, port in server.requests}), 1)
+
+        stats = HttpClientUtil.get_stats('test')
+
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['errors'], 0)
+
+    def test_does_not_retry_post(self):
+        server = FlakyServer(failures=1)
+
+        try:
+            self.assertEqual(HttpClientUtil.request('test', 'POST', server.url).status_code, 503)
+        finally:
+            server.shutdown()
+
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(HttpClientUtil.get_stats('test')['error_ratio'], 1)
@@ -0,0 +1,87 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.core.utils.maps_proxy_util import MapsProxyUtil
+
+
+def mock_response(status='OK'):
+    response = MagicMock()
+    response.ok = True
+    response.content = '{{"status": "{}"}}'.format(status).encode()
+    response.json.return_value = {'status': status}
+
+    return response
+
+
+class MapsProxyUtilTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_normalize(self):
+        self.assertEqual(MapsProxyUtil.normalize('geocode', ' Veldstraat   1,  Gent '), 'veldstraat 1, gent')
+        self.assertEqual(MapsProxyUtil.normalize('reverse_geocode', '51.05,3.72'), '51.050000,3.720000')
+        self.assertEqual(MapsProxyUtil.normalize('reverse_geocode', 'somewhere'), 'somewhere')
+
+    @patch('apps.core.utils.maps_proxy_util.HttpClientUtil.request')
+    def test_cached_per_normalized_query(self, mock_get):
+        mock_get.return_value = mock_response()
+
+        self.assertEqual(MapsProxyUtil.get('geocode', 'Veldstraat 1'), b'{"status": "OK"}')
+        self.assertEqual(MapsProxyUtil.get('geocode', 'veldstraat  1 '), b'{"status": "OK"}')
+        self.assertEqual(MapsProxyUtil.get('autocomplete', 'veldstraat 1'), b'{"status": "OK"}')
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args_list[0].kwargs['params']['address'], 'veldstraat 1')
+
+        stats = MapsProxyUtil.get_stats()
+
+        self.assertEqual(stats['geocode']['hits'], 1)
+        self.assertEqual(stats['geocode']['upstream_calls'], 1)
+        self.assertEqual(stats['geocode']['ratio'], 0.5)
+        self.assertAlmostEqual(stats['geocode']['saved_cost'], 0.005)
+        self.assertEqual(stats['autocomplete']['hits'], 0)
+
+    @patch('apps.core.utils.maps_proxy_util.HttpClientUtil.request')
+    def test_errors_are_not_cached(self, mock_get):
+        mock_get.return_value = mock_response('OVER_QUERY_LIMIT')
+
+        self.assertEqual(MapsProxyUtil.get('geocode', 'Gent'), b'{"status": "OVER_QUERY_LIMIT"}')
+
+        mock_get.return_value.ok = False
+
+        self.assertIsNone(MapsProxyUtil.get('geocode', 'Gent'))
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('apps.core.utils.maps_proxy_util.HttpClientUtil.request')
+    def test_concurrent_requests_are_coalesced(self, mock_get):
+        started = threading.Event()
+        release = threading.Event()
+
+        def get(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return mock_response()
+
+        mock_get.side_effect = get
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(MapsProxyUtil.get('geocode', 'Gent'))) for _ in range(3)]
+
+        threads[0].start()
+        started.wait(5)
+
+        for thread in threads[1:]:
+            thread.start()
+
+        release.set()
+
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(results, [b'{"status": "OK"}'] * 3)
+        self.assertEqual(MapsProxyUtil.get_stats()['geocode']['coalesced'], 2)
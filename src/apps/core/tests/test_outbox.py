@@ -0,0 +1,97 @@
+import datetime
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.core.models import OutboxEvent
+from apps.core.utils.outbox_util import OutboxUtil
+
+
+def handle(value: str) -> None:
+    # Through the cache, the test module may be imported twice under different names
+    cache.set('outbox-test:{}'.format(value), True)
+
+
+def get_handled(*values) -> list:
+    return sorted(key.split(':')[1] for key in cache.get_many(['outbox-test:{}'.format(value) for value in values]))
+
+
+def fail(value: str) -> None:
+    raise Exception('Provider unavailable: {}'.format(value))
+
+
+class OutboxUtilTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    @patch('apps.core.utils.outbox_util.OutboxUtil.kick')
+    def test_record_in_transaction(self, mock_kick):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                OutboxUtil.record('mail', 'apps.core.tests.test_outbox.handle', value='committed')
+
+        mock_kick.assert_called_once()
+
+        # Events of a rolled back change are never recorded
+        try:
+            with transaction.atomic():
+                OutboxUtil.record('mail', 'apps.core.tests.test_outbox.handle', value='rolled back')
+                raise ValueError()
+        except ValueError:
+            pass
+
+        self.assertEqual(list(OutboxEvent.objects.values_list('payload', flat=True)), [{'value': 'committed'}])
+
+    @patch('apps.core.utils.outbox_util.OutboxUtil.kick')
+    def test_dispatch(self, mock_kick):
+        for value in ['a', 'b', 'c']:
+            OutboxUtil.record('mail', 'apps.core.tests.test_outbox.handle', value=value)
+
+        failing = OutboxUtil.record('link2prisma', 'apps.core.tests.test_outbox.fail', value='d')
+
+        self.assertEqual(OutboxUtil.dispatch(), {'done': 3, 'retried': 1, 'failed': 0})
+        self.assertEqual(get_handled('a', 'b', 'c', 'd'), ['a', 'b', 'c'])
+        self.assertEqual(OutboxEvent.objects.filter(state=OutboxEvent.State.done).count(), 3)
+
+        failing.refresh_from_db()
+
+        self.assertEqual(failing.state, OutboxEvent.State.pending)
+        self.assertEqual(failing.attempts, 1)
+        self.assertEqual(failing.error, 'Provider unavailable: d')
+        self.assertGreater(failing.available_at, timezone.now())
+
+        # Done events are never run again and the failed one waits for its retry
+        cache.delete_many(['outbox-test:a', 'outbox-test:b', 'outbox-test:c'])
+
+        self.assertEqual(OutboxUtil.dispatch(), {'done': 0, 'retried': 0, 'failed': 0})
+        self.assertEqual(get_handled('a', 'b', 'c'), [])
+
+        self.assertEqual(OutboxUtil.get_stats()['outbox.mail.done'], 3)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    @patch('apps.core.utils.outbox_util.OutboxUtil.kick')
+    def test_failed_after_max_attempts(self, mock_kick):
+        event = OutboxUtil.record('push', 'apps.core.tests.test_outbox.fail', value='e')
+        OutboxEvent.objects.filter(id=event.id).update(attempts=1)
+
+        self.assertEqual(OutboxUtil.dispatch(), {'done': 0, 'retried': 0, 'failed': 1})
+
+        event.refresh_from_db()
+
+        self.assertEqual(event.state, OutboxEvent.State.failed)
+        self.assertEqual(event.attempts, 2)
+
+    @patch('apps.core.utils.outbox_util.OutboxUtil.kick')
+    def test_purge(self, mock_kick):
+        old = OutboxUtil.record('mail', 'apps.core.tests.test_outbox.handle', value='old')
+        recent = OutboxUtil.record('mail', 'apps.core.tests.test_outbox.handle', value='recent')
+
+        OutboxUtil.dispatch()
+        OutboxEvent.objects.filter(id=old.id).update(processed_at=timezone.now() - datetime.timedelta(days=30))
+
+        self.assertEqual(OutboxUtil.purge(), 1)
+        self.assertEqual(list(OutboxEvent.objects.values_list('id', flat=True)), [recent.id])
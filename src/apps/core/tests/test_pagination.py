@@ -0,0 +1,82 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.core.model_exceptions import DeserializationException
+from apps.core.models.export_file import ExportFile
+from apps.core.utils.count_util import CountUtil
+from apps.core.utils.pagination_util import PaginationUtil
+
+
+class PaginationUtilTest(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+
+        # Two exports share every creation time, so the id has to break the ties
+        for index in range(10):
+            ExportFile.objects.create(
+                name='Export {}'.format(index),
+                file_name='export{}.xlsx'.format(index),
+                created=now - datetime.timedelta(days=index // 2),
+            )
+
+        self.ordering = ['-created', '-id']
+        self.expected = list(ExportFile.objects.order_by('-created', '-id'))
+
+    def test_cursor_pages_cover_every_row_once(self):
+        rows = []
+        cursor = None
+
+        while True:
+            page, cursor = PaginationUtil.paginate(ExportFile.objects.all(), self.ordering, per_page=3, cursor=cursor)
+            rows.extend(page)
+
+            if cursor is None:
+                break
+
+        self.assertEqual(rows, self.expected)
+
+    def test_page_number_matches_cursor(self):
+        first, cursor = PaginationUtil.paginate(ExportFile.objects.all(), self.ordering, per_page=4)
+        second, _ = PaginationUtil.paginate(ExportFile.objects.all(), self.ordering, per_page=4, cursor=cursor)
+
+        self.assertEqual(first, self.expected[:4])
+        self.assertEqual(second, PaginationUtil.paginate(ExportFile.objects.all(), self.ordering, 4, page=2)[0])
+
+    def test_last_page_has_no_cursor(self):
+        page, cursor = PaginationUtil.paginate(ExportFile.objects.all(), self.ordering, per_page=10)
+
+        self.assertEqual(len(page), 10)
+        self.assertIsNone(cursor)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(DeserializationException):
+            PaginationUtil.paginate(ExportFile.objects.all(), self.ordering, per_page=3, cursor='not a cursor')
+
+        with self.assertRaises(DeserializationException):
+            PaginationUtil.paginate(
+                ExportFile.objects.all(), self.ordering, per_page=3, cursor=PaginationUtil.encode_cursor([1]),
+            )
+
+
+class CountUtilTest(TestCase):
+
+    def test_total_is_cached_until_the_table_changes(self):
+        ExportFile.objects.create(name='Export', file_name='export.xlsx')
+
+        self.assertEqual(CountUtil.get_total(ExportFile.objects.all()), 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(CountUtil.get_total(ExportFile.objects.all()), 1)
+
+        # The generation is only bumped once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            ExportFile.objects.create(name='Export', file_name='export2.xlsx')
+
+            with self.assertNumQueries(0):
+                CountUtil.get_total(ExportFile.objects.all())
+
+        self.assertEqual(CountUtil.get_total(ExportFile.objects.all()), 2)
+        self.assertEqual(CountUtil.get_total(ExportFile.objects.filter(file_name='export.xlsx')), 1)
@@ -0,0 +1,62 @@
+import datetime
+import uuid
+from decimal import Decimal
+from io import BytesIO
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.parsers import FastJSONParser
+from apps.core.renderers import FastJSONRenderer
+from apps.core.utils.json_util import FastJsonResponse, JSONUtil
+
+
+class FastJSONRendererTest(TestCase):
+
+    def setUp(self):
+        self.payload = {
+            'id': uuid.uuid4(),
+            'created_at': timezone.now(),
+            'date': datetime.date(2024, 3, 1),
+            'time': datetime.time(8, 30),
+            'distance': Decimal('12.5'),
+            'nested': [{'id': uuid.uuid4(), 'title': 'Job'}],
+            'empty': None,
+        }
+
+    def test_matches_default_renderer(self):
+        self.assertEqual(
+            JSONUtil.loads(FastJSONRenderer().render(self.payload)),
+            JSONUtil.loads(JSONRenderer().render(self.payload)),
+        )
+
+    def test_render_types(self):
+        data = JSONUtil.loads(FastJSONRenderer().render(self.payload))
+
+        self.assertEqual(data['id'], str(self.payload['id']))
+        self.assertEqual(data['date'], '2024-03-01')
+        self.assertEqual(data['time'], '08:30:00')
+        self.assertEqual(data['distance'], 12.5)
+        self.assertTrue(data['created_at'].endswith('Z'))
+
+    def test_render_none(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_parser(self):
+        data = FastJSONParser().parse(BytesIO(b'{"title": "Job", "workers": [1, 2]}'))
+
+        self.assertEqual(data, {'title': 'Job', 'workers': [1, 2]})
+
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"title": '))
+
+    def test_json_response(self):
+        response = FastJsonResponse({'id': self.payload['id']})
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(JSONUtil.loads(response.content), {'id': str(self.payload['id'])})
+
+        with self.assertRaises(TypeError):
+            FastJsonResponse([1, 2])
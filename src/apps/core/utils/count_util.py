@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class CountUtil:
+    """
+    Cheap totals for paginated endpoints.
+
+    Exact counts are cached per query. Every committed save or delete of a counted model bumps the generation of its
+    table (see apps.core.signals), which is part of the cache key, so totals change as soon as the underlying rows do.
+    Bulk updates bypass the signals and are picked up when the entry expires.
+
+    On PostgreSQL, the total of an unfiltered query on a large table is estimated from the planner statistics
+    instead of counted.
+    """
+
+    key_prefix = 'total_count'
+    generation_prefix = 'total_count_generation'
+
+    table_pattern = re.compile(r'(?:FROM|JOIN) "?(\w+)"?')
+
+    @staticmethod
+    def get_generation_key(table: str) -> str:
+        return '{}:{}'.format(CountUtil.generation_prefix, table)
+
+    @staticmethod
+    def bump_generation(table: str) -> None:
+        key = CountUtil.get_generation_key(table)
+
+        try:
+            cache.add(key, 0, timeout=None)
+            cache.incr(key)
+        except Exception as e:
+            logger.warning('Could not bump count generation of {}: {}'.format(table, e))
+
+    @staticmethod
+    def get_estimate(queryset):
+        """
+        Returns the planner estimate of the row count of an unfiltered PostgreSQL table,
+        or None when the total has to be counted.
+        """
+
+        connection = connections[queryset.db]
+
+        if connection.vendor != 'postgresql' or queryset.query.has_filters() or queryset.query.distinct:
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+
+        if row is None or row[0] < settings.PAGINATION_ESTIMATE_THRESHOLD:
+            return None
+
+        return int(row[0])
+
+    @staticmethod
+    def get_total(queryset) -> int:
+        """
+        Args:
+        queryset (QuerySet): The unpaginated rows of the endpoint.
+
+        Returns:
+        int: The (cached or estimated) number of rows.
+        """
+
+        queryset = queryset.order_by()
+
+        estimate = CountUtil.get_estimate(queryset)
+
+        if estimate is not None:
+            return estimate
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except Exception:
+            # Queries that can never match anything can not be compiled
+            return queryset.count()
+
+        tables = sorted(set(CountUtil.table_pattern.findall(sql)))
+
+        try:
+            generations = cache.get_many([CountUtil.get_generation_key(table) for table in tables])
+            fingerprint = '{}|{}|{}'.format(sql, params, sorted(generations.items()))
+            key = '{}:{}'.format(CountUtil.key_prefix, hashlib.md5(fingerprint.encode('utf-8')).hexdigest())
+
+            total = cache.get(key)
+        except Exception as e:
+            logger.warning('Could not read cached total: {}'.format(e))
+            return queryset.count()
+
+        if total is None:
+            total = queryset.count()
+
+            try:
+                cache.set(key, total, timeout=settings.PAGINATION_TOTAL_CACHE_TIMEOUT)
+            except Exception as e:
+                logger.warning('Could not cache total: {}'.format(e))
+
+        return total
@@ -0,0 +1,151 @@
+import math
+
+from django.db.models import F, Q
+
+from apps.core.utils.geo_util import GeoUtil
+
+
+class GeoIndexUtil:
+    """
+    Geohash spatial index for radius queries on plain PostgreSQL and SQLite, without PostGIS.
+
+    Every Address stores the geohash of its coordinates (see Address.save). A geohash is a base32 string
+    where every extra character narrows a grid cell down, so all points in a cell share a prefix.
+    A radius query covers its bounding box with a few cells and selects them with indexed prefix lookups,
+    after which the exact distance is only computed for the rows in those cells.
+    """
+
+    base32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+    # Precision of the stored geohashes, cells of about 5 by 5 m
+    precision = 9
+
+    # Upper bound on the number of prefix lookups of a radius query
+    max_cells = 24
+
+    @staticmethod
+    def encode(latitude: float, longitude: float, precision: int = None) -> str:
+        precision = precision or GeoIndexUtil.precision
+
+        lat_range = [-90.0, 90.0]
+        lon_range = [-180.0, 180.0]
+
+        geohash = []
+        bits = 0
+        bit_count = 0
+        is_longitude = True
+
+        while len(geohash) < precision:
+            value, value_range = (longitude, lon_range) if is_longitude else (latitude, lat_range)
+            middle = (value_range[0] + value_range[1]) / 2
+
+            bits <<= 1
+
+            if value >= middle:
+                bits |= 1
+                value_range[0] = middle
+            else:
+                value_range[1] = middle
+
+            is_longitude = not is_longitude
+            bit_count += 1
+
+            if bit_count == 5:
+                geohash.append(GeoIndexUtil.base32[bits])
+                bits = 0
+                bit_count = 0
+
+        return ''.join(geohash)
+
+    @staticmethod
+    def get_cell_size(precision: int):
+        """
+        Returns the height and width of a geohash cell in degrees.
+        """
+
+        bits = precision * 5
+
+        return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** (bits - bits // 2)
+
+    @staticmethod
+    def get_cells(latitude: float, longitude: float, radius_km: float) -> list:
+        """
+        Returns the geohash prefixes of the cells covering every point within radius_km of a point,
+        using the finest precision that needs at most max_cells cells.
+        """
+
+        (min_lat, max_lat), (min_lon, max_lon) = GeoUtil.get_bounding_box(latitude, longitude, radius_km)
+
+        for precision in range(GeoIndexUtil.precision, 0, -1):
+            height, width = GeoIndexUtil.get_cell_size(precision)
+
+            rows = math.ceil((max_lat - min_lat) / height) + 1
+            columns = math.ceil((max_lon - min_lon) / width) + 1
+
+            if rows * columns <= GeoIndexUtil.max_cells or precision == 1:
+                break
+
+        # Sample the box once per cell step, a cell always contains a sample or one of the box edges
+        lats = [min(min_lat + row * height, max_lat) for row in range(rows)] + [max_lat]
+        lons = [min(min_lon + column * width, max_lon) for column in range(columns)] + [max_lon]
+
+        return sorted({GeoIndexUtil.encode(lat, lon, precision) for lat in lats for lon in lons})
+
+    @staticmethod
+    def filter_within(queryset, latitude: float, longitude: float, radius_km: float, address_lookup: str = ''):
+        """
+        Narrows a queryset down to the rows whose address may lie within radius_km of a point,
+        using the geohash index. Rows near the edge of the radius can still be further away, see get_within.
+
+        Args:
+        queryset (QuerySet): Addresses, or any model related to an address.
+        latitude (float): The latitude of the center.
+        longitude (float): The longitude of the center.
+        radius_km (float): The radius in km.
+        address_lookup (str): The lookup from the model to its address, e.g. 'address__' for jobs
+            or 'worker_profile__worker_address__' for workers. Empty for addresses.
+
+        Returns:
+        QuerySet: The candidate rows.
+        """
+
+        cells = Q()
+
+        for cell in GeoIndexUtil.get_cells(latitude, longitude, radius_km):
+            cells |= Q(**{'{}geohash__startswith'.format(address_lookup): cell})
+
+        (min_lat, max_lat), (min_lon, max_lon) = GeoUtil.get_bounding_box(latitude, longitude, radius_km)
+
+        return queryset.filter(cells).filter(**{
+            '{}latitude__range'.format(address_lookup): (min_lat, max_lat),
+            '{}longitude__range'.format(address_lookup): (min_lon, max_lon),
+        })
+
+    @staticmethod
+    def get_within(queryset, latitude: float, longitude: float, radius_km: float, address_lookup: str = '') -> list:
+        """
+        Returns the rows whose address lies within radius_km of a point, closest first.
+
+        Args:
+        See filter_within.
+
+        Returns:
+        list: Tuples of the row and its distance in km.
+        """
+
+        rows = list(GeoIndexUtil.filter_within(queryset, latitude, longitude, radius_km, address_lookup).annotate(
+            geo_latitude=F('{}latitude'.format(address_lookup)),
+            geo_longitude=F('{}longitude'.format(address_lookup)),
+        ))
+
+        if not rows:
+            return []
+
+        distances = GeoUtil.get_distances(
+            latitude, longitude, [row.geo_latitude for row in rows], [row.geo_longitude for row in rows],
+        )
+
+        return sorted(
+            [(row, float(distance)) for row, distance in zip(rows, distances) if distance <= radius_km],
+            key=lambda item: item[1],
+        )
@@ -1,11 +1,16 @@
-from math import radians, sin, cos, sqrt, atan2
+from math import radians, degrees, sin, cos, sqrt, atan2
+
+import numpy as np
 
 
 class GeoUtil:
 
+    # Mean radius of the earth, in km
+    earth_radius = 6373.0
+
     @staticmethod
     def get_distance(lat1: float, lon1: float, lat2: float, lon2: float):
-        r = 6373.0
+        r = GeoUtil.earth_radius
         
         lat1 = radians(lat1)
         lon1 = radians(lon1)
@@ -19,3 +24,46 @@ class GeoUtil:
         c = 2 * atan2(sqrt(a), sqrt(1 - a))
 
         return r * c
+
+    @staticmethod
+    def get_distances(lat: float, lon: float, lats, lons) -> np.ndarray:
+        """
+        Vectorized get_distance from one point to many points.
+
+        Args:
+        lat (float): The latitude of the origin.
+        lon (float): The longitude of the origin.
+        lats (Iterable[float]): The latitudes of the destinations.
+        lons (Iterable[float]): The longitudes of the destinations, in the same order.
+
+        Returns:
+        np.ndarray: The distances in km, in the order of the destinations.
+        """
+
+        lat1 = np.radians(lat)
+        lon1 = np.radians(lon)
+        lat2 = np.radians(np.asarray(lats, dtype=float))
+        lon2 = np.radians(np.asarray(lons, dtype=float))
+
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+        return GeoUtil.earth_radius * c
+
+    @staticmethod
+    def get_bounding_box(lat: float, lon: float, radius_km: float):
+        """
+        Returns the latitude and longitude ranges containing every point within radius_km of a point,
+        to prefilter candidates in SQL before computing exact distances.
+
+        Returns:
+        tuple: (min_lat, max_lat), (min_lon, max_lon)
+        """
+
+        d_lat = degrees(radius_km / GeoUtil.earth_radius)
+
+        # Longitude degrees shrink towards the poles, near them every longitude is in range
+        cos_lat = cos(radians(lat))
+        d_lon = degrees(radius_km / (GeoUtil.earth_radius * cos_lat)) if cos_lat > 1e-6 else 180.0
+
+        return (max(lat - d_lat, -90.0), min(lat + d_lat, 90.0)), (max(lon - d_lon, -180.0), min(lon + d_lon, 180.0))
@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from apps.core.utils.metrics_util import MetricsUtil
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClientUtil:
+    """
+    Shared clients for outbound HTTP requests, one per integration of settings.OUTBOUND_HTTP.
+
+    The clients of an integration keep alive pooled connections per host, and apply its connect and read timeouts
+    and its retries with exponential backoff. Failed connections are always retried, 429 and 5xx answers only for
+    idempotent methods, unless the integration sets retry_all_methods. Every request records its latency and
+    whether it failed as metrics of its integration, see get_stats.
+    """
+
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    idempotent_methods = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'])
+
+    sessions = {}
+
+    lock = threading.Lock()
+
+    @staticmethod
+    def get_config(integration: str) -> dict:
+        return {**settings.OUTBOUND_HTTP['default'], **settings.OUTBOUND_HTTP.get(integration, {})}
+
+    @staticmethod
+    def get_metric(integration: str, name: str) -> str:
+        return 'http.{}.{}'.format(integration, name)
+
+    @staticmethod
+    def record(integration: str, started_at: float, failed: bool) -> None:
+        MetricsUtil.increment(HttpClientUtil.get_metric(integration, 'requests'))
+        MetricsUtil.increment(
+            HttpClientUtil.get_metric(integration, 'ms'), round((time.monotonic() - started_at) * 1000),
+        )
+
+        if failed:
+            MetricsUtil.increment(HttpClientUtil.get_metric(integration, 'errors'))
+
+    @staticmethod
+    def get_session(integration: str) -> requests.Session:
+        session = HttpClientUtil.sessions.get(integration)
+
+        if session is not None:
+            return session
+
+        with HttpClientUtil.lock:
+            if integration not in HttpClientUtil.sessions:
+                config = HttpClientUtil.get_config(integration)
+
+                retry = Retry(
+                    total=config['retries'],
+                    backoff_factor=config['backoff_factor'],
+                    status_forcelist=HttpClientUtil.retry_statuses,
+                    allowed_methods=None if config['retry_all_methods'] else HttpClientUtil.idempotent_methods,
+                    raise_on_status=False,
+                )
+
+                adapter = HTTPAdapter(pool_maxsize=config['pool_size'], max_retries=retry)
+
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+
+                HttpClientUtil.sessions[integration] = session
+
+        return HttpClientUtil.sessions[integration]
+
+    @staticmethod
+    def request(integration: str, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a request with the session of an integration.
+
+        Args:
+        integration (str): The integration, a key of settings.OUTBOUND_HTTP.
+        method (str): The HTTP method.
+        url (str): The url.
+        **kwargs: Passed on to requests, timeout defaults to the timeouts of the integration.
+
+        Returns:
+        requests.Response: The response, also for error statuses. Raises requests.RequestException when
+        no response was received.
+        """
+
+        config = HttpClientUtil.get_config(integration)
+        kwargs.setdefault('timeout', (config['connect_timeout'], config['read_timeout']))
+
+        started_at = time.monotonic()
+
+        try:
+            response = HttpClientUtil.get_session(integration).request(method, url, **kwargs)
+        except requests.RequestException:
+            HttpClientUtil.record(integration, started_at, True)
+            raise
+
+        HttpClientUtil.record(integration, started_at, response.status_code >= 500)
+
+        return response
+
+    @staticmethod
+    def get_stats(integration: str) -> dict:
+        names = ('requests', 'errors', 'ms')
+        values = MetricsUtil.get(*[HttpClientUtil.get_metric(integration, name) for name in names])
+        requests_count, errors, ms = [values[HttpClientUtil.get_metric(integration, name)] for name in names]
+
+        return {
+            'requests': requests_count,
+            'errors': errors,
+            'error_ratio': errors / requests_count if requests_count else None,
+            'average_ms': ms / requests_count if requests_count else None,
+        }
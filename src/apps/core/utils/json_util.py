@@ -0,0 +1,65 @@
+import json
+
+from django.http import HttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+
+class JSONUtil:
+    """
+    Fast JSON encoding and decoding for API payloads.
+
+    Uses orjson when it is installed, which natively serializes the UUIDs, datetimes, dates and times
+    that fill our model views. Anything orjson does not know (Decimal, timedelta, lazy strings, querysets, ...)
+    is handed to DRF's JSONEncoder, so the output matches the default renderer for those types.
+    Without orjson, the standard library json module is used with DRF's encoder.
+    """
+
+    # Shared fallback for the types orjson can not serialize itself
+    encoder = JSONEncoder()
+
+    if orjson is not None:
+        options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    @staticmethod
+    def is_fast() -> bool:
+        return orjson is not None
+
+    @staticmethod
+    def dumps(data, indent: bool = False) -> bytes:
+        if orjson is None:
+            return json.dumps(
+                data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False,
+                indent=2 if indent else None, separators=None if indent else (',', ':'),
+            ).encode('utf-8')
+
+        options = JSONUtil.options | orjson.OPT_INDENT_2 if indent else JSONUtil.options
+
+        return orjson.dumps(data, default=JSONUtil.encoder.default, option=options)
+
+    @staticmethod
+    def loads(data):
+        if orjson is None:
+            if isinstance(data, bytes):
+                data = data.decode('utf-8')
+            return json.loads(data)
+
+        return orjson.loads(data)
+
+
+class FastJsonResponse(HttpResponse):
+    """
+    Drop-in replacement for django.http.JsonResponse that encodes with JSONUtil.
+    """
+
+    def __init__(self, data, safe: bool = True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+
+        kwargs.setdefault('content_type', 'application/json')
+
+        super().__init__(content=JSONUtil.dumps(data), **kwargs)
@@ -0,0 +1,164 @@
+import hashlib
+import logging
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.utils.http_client_util import HttpClientUtil
+from apps.core.utils.metrics_util import MetricsUtil
+from apps.core.utils.single_flight_util import SingleFlightUtil
+
+logger = logging.getLogger(__name__)
+
+
+class MapsProxyUtil:
+    """
+    Proxies the Google Maps geocode, reverse geocode and place search requests of the apps.
+
+    Queries are normalized, so 'Veldstraat  1 ' and 'veldstraat 1' share a cache entry. Responses are cached
+    in the shared cache for the cache_timeout of their endpoint in settings.GOOGLE_MAPS_PROXY, concurrent
+    identical requests wait for the one calling Google, and Google is called with the shared client of HttpClientUtil.
+    """
+
+    endpoints = {
+        'geocode': ('/maps/api/geocode/json', 'address', {}),
+        'reverse_geocode': ('/maps/api/geocode/json', 'latlng', {}),
+        'autocomplete': ('/maps/api/place/textsearch/json', 'input', {'region': 'be'}),
+    }
+
+    # Statuses of complete answers, others like OVER_QUERY_LIMIT are returned but not cached
+    cacheable_statuses = ('OK', 'ZERO_RESULTS')
+
+    key_prefix = 'maps'
+
+    @staticmethod
+    def normalize(endpoint: str, query: str) -> str:
+        if endpoint == 'reverse_geocode':
+            try:
+                return ','.join('{:.6f}'.format(float(value)) for value in query.split(','))
+            except ValueError:
+                pass
+
+        return ' '.join(query.split()).casefold()
+
+    @staticmethod
+    def get_key(endpoint: str, query: str) -> str:
+        return '{}:{}:{}'.format(MapsProxyUtil.key_prefix, endpoint, hashlib.md5(query.encode()).hexdigest())
+
+    @staticmethod
+    def get_metric(endpoint: str, name: str) -> str:
+        return 'maps_proxy.{}.{}'.format(endpoint, name)
+
+    @staticmethod
+    def request(endpoint: str, query: str):
+        """
+        Calls Google, returning the response, or None when the request failed.
+        """
+
+        path, param, extra_params = MapsProxyUtil.endpoints[endpoint]
+
+        started_at = time.monotonic()
+
+        try:
+            response = HttpClientUtil.request(
+                'google',
+                'GET',
+                url='{}{}'.format(settings.GOOGLE_BASE_URL, path),
+                params={param: query, **extra_params, 'key': settings.GOOGLE_API_KEY},
+            )
+        except requests.RequestException as e:
+            logger.warning('Google Maps {} request failed: {}'.format(endpoint, e))
+            return None
+        finally:
+            MetricsUtil.increment(MapsProxyUtil.get_metric(endpoint, 'upstream_calls'))
+            MetricsUtil.increment(
+                MapsProxyUtil.get_metric(endpoint, 'upstream_ms'), round((time.monotonic() - started_at) * 1000),
+            )
+
+        return response if response.ok else None
+
+    @staticmethod
+    def get(endpoint: str, query: str):
+        """
+        Returns the response content of a Google Maps request, from the cache when possible.
+
+        Args:
+        endpoint (str): One of endpoints.
+        query (str): The address, 'latitude,longitude' or search text.
+
+        Returns:
+        bytes: The response content, None when the request failed.
+        """
+
+        query = MapsProxyUtil.normalize(endpoint, query)
+        key = MapsProxyUtil.get_key(endpoint, query)
+
+        def read():
+            try:
+                return cache.get(key)
+            except Exception as e:
+                logger.warning('Could not read {} from cache: {}'.format(endpoint, e))
+                return None
+
+        content = read()
+
+        if content is not None:
+            MetricsUtil.increment(MapsProxyUtil.get_metric(endpoint, 'hits'))
+            return content
+
+        def compute():
+            response = MapsProxyUtil.request(endpoint, query)
+
+            if response is None:
+                return None
+
+            try:
+                cacheable = response.json().get('status') in MapsProxyUtil.cacheable_statuses
+            except ValueError:
+                cacheable = False
+
+            if cacheable:
+                try:
+                    cache.set(key, response.content, timeout=settings.GOOGLE_MAPS_PROXY[endpoint]['cache_timeout'])
+                except Exception as e:
+                    logger.warning('Could not write {} to cache: {}'.format(endpoint, e))
+
+            return response.content
+
+        content, coalesced = SingleFlightUtil.run(key, read, compute)
+
+        if coalesced:
+            MetricsUtil.increment(MapsProxyUtil.get_metric(endpoint, 'coalesced'))
+
+        return content
+
+    @staticmethod
+    def get_stats() -> dict:
+        """
+        Returns per endpoint the cache hits, coalesced requests and Google calls, with the money and
+        the upstream time saved by the requests that did not reach Google, based on the average latency.
+        """
+
+        stats = {}
+
+        for endpoint in MapsProxyUtil.endpoints:
+            names = ('hits', 'coalesced', 'upstream_calls', 'upstream_ms')
+            values = MetricsUtil.get(*[MapsProxyUtil.get_metric(endpoint, name) for name in names])
+            hits, coalesced, upstream_calls, upstream_ms = [values[MapsProxyUtil.get_metric(endpoint, name)] for name in names]
+
+            saved_calls = hits + coalesced
+            total = saved_calls + upstream_calls
+
+            stats[endpoint] = {
+                'hits': hits,
+                'coalesced': coalesced,
+                'upstream_calls': upstream_calls,
+                'ratio': saved_calls / total if total else None,
+                'average_upstream_ms': upstream_ms / upstream_calls if upstream_calls else None,
+                'saved_cost': saved_calls * settings.GOOGLE_MAPS_PROXY[endpoint]['cost'],
+                'saved_ms': saved_calls * upstream_ms / upstream_calls if upstream_calls else 0,
+            }
+
+        return stats
@@ -0,0 +1,57 @@
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsUtil:
+    """
+    Process-independent counters stored in the shared cache, so every worker and Celery process
+    adds to the same totals.
+
+    Counters never expire and are meant to be read from a shell or admin view to see the effect
+    of caches and background jobs in production. Failing to record a metric never breaks the caller.
+    """
+
+    key_prefix = 'metrics'
+
+    @staticmethod
+    def get_key(name: str) -> str:
+        return '{}:{}'.format(MetricsUtil.key_prefix, name)
+
+    @staticmethod
+    def increment(name: str, amount: int = 1) -> None:
+        if amount == 0:
+            return
+
+        key = MetricsUtil.get_key(name)
+
+        try:
+            cache.add(key, 0, timeout=None)
+            cache.incr(key, amount)
+        except Exception as e:
+            logger.warning('Could not record metric {}: {}'.format(name, e))
+
+    @staticmethod
+    def get(*names: str) -> dict:
+        try:
+            values = cache.get_many([MetricsUtil.get_key(name) for name in names])
+        except Exception as e:
+            logger.warning('Could not read metrics: {}'.format(e))
+            values = {}
+
+        return {name: values.get(MetricsUtil.get_key(name), 0) for name in names}
+
+    @staticmethod
+    def get_ratio(hits_name: str, misses_name: str) -> dict:
+        values = MetricsUtil.get(hits_name, misses_name)
+        total = values[hits_name] + values[misses_name]
+
+        values['ratio'] = values[hits_name] / total if total else None
+
+        return values
+
+    @staticmethod
+    def reset(*names: str) -> None:
+        cache.delete_many([MetricsUtil.get_key(name) for name in names])
@@ -0,0 +1,221 @@
+import datetime
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.core.models import OutboxEvent
+from apps.core.utils.metrics_util import MetricsUtil
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxUtil:
+    """
+    Transactional outbox for the side effects of domain changes.
+
+    Business code records events with record, inside the transaction of the change, so an event exists if and only
+    if the change was committed, and a slow or failing provider never delays or breaks the change itself.
+    dispatch claims due events in batches and carries them out with a thread pool per channel, sized by
+    OUTBOX_CHANNELS. Failed events are retried with an exponential backoff up to OUTBOX_MAX_ATTEMPTS attempts.
+
+    Events are delivered at least once: a dispatcher dying mid-batch leaves its events to be claimed again
+    once their lease expires.
+    """
+
+    kick_key = 'outbox:kick'
+
+    metric_prefix = 'outbox'
+
+    @staticmethod
+    def get_metric(channel: str, name: str) -> str:
+        return '{}.{}.{}'.format(OutboxUtil.metric_prefix, channel, name)
+
+    @staticmethod
+    def record(channel: str, handler: str, **payload) -> OutboxEvent:
+        """
+        Records an event, to be carried out once the surrounding transaction commits.
+
+        Args:
+        channel (str): The channel of the event, see OUTBOX_CHANNELS.
+        handler (str): The import path of the function carrying out the event.
+        **payload: The JSON serializable keyword arguments of the handler.
+
+        Returns:
+        OutboxEvent: The recorded event.
+        """
+
+        event = OutboxEvent.objects.create(channel=channel, handler=handler, payload=payload)
+
+        transaction.on_commit(OutboxUtil.kick)
+
+        return event
+
+    @staticmethod
+    def kick() -> None:
+        """
+        Queues a dispatch shortly after events got committed, at most once per OUTBOX_KICK_DELAY.
+        The periodic dispatch picks the events up when the broker is unavailable.
+        """
+
+        from apps.core.tasks import dispatch_outbox
+
+        try:
+            if cache.add(OutboxUtil.kick_key, 1, timeout=settings.OUTBOX_KICK_DELAY):
+                dispatch_outbox.apply_async(countdown=settings.OUTBOX_KICK_DELAY)
+        except Exception as e:
+            logger.warning('Could not queue an outbox dispatch: {}'.format(e))
+
+    @staticmethod
+    def claim(batch_size: int) -> list:
+        """
+        Claims the oldest due events, leasing them for OUTBOX_LEASE seconds.
+        Concurrent dispatchers skip each other's rows instead of waiting for them.
+        """
+
+        now = timezone.now()
+
+        with transaction.atomic():
+            events = list(
+                OutboxEvent.objects.select_for_update(skip_locked=True).filter(
+                    state=OutboxEvent.State.pending,
+                    available_at__lte=now,
+                ).order_by('available_at', 'id')[:batch_size]
+            )
+
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(
+                available_at=now + datetime.timedelta(seconds=settings.OUTBOX_LEASE),
+            )
+
+        return events
+
+    @staticmethod
+    def run(event: OutboxEvent):
+        """
+        Carries out a single event.
+
+        Returns:
+        str: The error of a failed event, or None.
+        """
+
+        try:
+            import_string(event.handler)(**event.payload)
+        except Exception as e:
+            logger.warning('Outbox event {} ({}) failed: {}'.format(event.id, event.handler, e))
+            return str(e) or e.__class__.__name__
+        finally:
+            connection.close()
+
+    @staticmethod
+    def dispatch(batch_size: int = None) -> dict:
+        """
+        Claims and carries out one batch of events.
+
+        Returns:
+        dict: The number of events done, retried and failed for good.
+        """
+
+        events = OutboxUtil.claim(batch_size or settings.OUTBOX_BATCH_SIZE)
+
+        counts = {'done': 0, 'retried': 0, 'failed': 0}
+
+        if not events:
+            return counts
+
+        channels = settings.OUTBOX_CHANNELS
+
+        with ExitStack() as stack:
+            executors = {
+                channel: stack.enter_context(ThreadPoolExecutor(max_workers=channels.get(channel, channels['default'])))
+                for channel in {event.channel for event in events}
+            }
+
+            futures = [(event, executors[event.channel].submit(OutboxUtil.run, event)) for event in events]
+
+        now = timezone.now()
+        done = []
+
+        for event, future in futures:
+            error = future.result()
+
+            if error is None:
+                done.append(event)
+                counts['done'] += 1
+                MetricsUtil.increment(OutboxUtil.get_metric(event.channel, 'done'))
+                continue
+
+            attempts = event.attempts + 1
+
+            if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                state = OutboxEvent.State.failed
+                counts['failed'] += 1
+                MetricsUtil.increment(OutboxUtil.get_metric(event.channel, 'failed'))
+            else:
+                state = OutboxEvent.State.pending
+                counts['retried'] += 1
+                MetricsUtil.increment(OutboxUtil.get_metric(event.channel, 'retried'))
+
+            OutboxEvent.objects.filter(id=event.id).update(
+                state=state,
+                attempts=attempts,
+                error=error[:256],
+                available_at=now + datetime.timedelta(seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)),
+            )
+
+        OutboxEvent.objects.filter(id__in=[event.id for event in done]).update(
+            state=OutboxEvent.State.done,
+            attempts=F('attempts') + 1,
+            error=None,
+            processed_at=now,
+        )
+
+        return counts
+
+    @staticmethod
+    def drain(max_seconds: float = None) -> dict:
+        """
+        Dispatches batches until no event is due or the time budget is spent.
+
+        Returns:
+        dict: The number of events done, retried and failed for good.
+        """
+
+        deadline = time.monotonic() + (max_seconds or settings.OUTBOX_DRAIN_SECONDS)
+        totals = {'done': 0, 'retried': 0, 'failed': 0}
+
+        while time.monotonic() < deadline:
+            counts = OutboxUtil.dispatch()
+
+            for name, count in counts.items():
+                totals[name] += count
+
+            if not any(counts.values()):
+                break
+
+        return totals
+
+    @staticmethod
+    def purge() -> int:
+        """
+        Deletes the events that were done more than OUTBOX_RETENTION_DAYS ago.
+        """
+
+        processed_before = timezone.now() - datetime.timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+
+        deleted, _ = OutboxEvent.objects.filter(state=OutboxEvent.State.done, processed_at__lt=processed_before).delete()
+
+        return deleted
+
+    @staticmethod
+    def get_stats() -> dict:
+        return MetricsUtil.get(*[
+            OutboxUtil.get_metric(channel, name)
+            for channel in settings.OUTBOX_CHANNELS for name in ('done', 'retried', 'failed')
+        ])
@@ -0,0 +1,134 @@
+import base64
+import binascii
+
+from django.db.models import F, Q
+
+from apps.core.model_exceptions import DeserializationException
+from apps.core.utils.json_util import JSONUtil
+
+
+class PaginationUtil:
+    """
+    Keyset (cursor) pagination for list endpoints.
+
+    A page is fetched by filtering on the sort key of the last row of the previous page, instead of an OFFSET,
+    so reading page 1000 costs the same as reading page 1. The ordering must end with a unique field (usually id)
+    to make the sort key of every row unique. Null values sort last, in both directions.
+
+    Requests without a cursor fall back to the classic page number, so existing clients keep working,
+    and every response hands out the cursor of the next page.
+    """
+
+    @staticmethod
+    def get_order_by(ordering) -> list:
+        return [
+            F(field[1:]).desc(nulls_last=True) if field.startswith('-') else F(field).asc(nulls_last=True)
+            for field in ordering
+        ]
+
+    @staticmethod
+    def get_keyset_filter(ordering, values) -> Q:
+        """
+        Builds the filter selecting every row sorted after the row with the given sort key.
+
+        Args:
+        ordering (Iterable[str]): The ordering of the queryset, e.g. ['-start_time', '-id'].
+        values (Iterable): The sort key of the last row of the previous page.
+        """
+
+        conditions = []
+        equal = Q()
+
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+
+            if value is None:
+                # Nothing sorts after a null value, except other nulls with a later tie breaker
+                equal &= Q(**{'{}__isnull'.format(name): True})
+                continue
+
+            lookup = 'lt' if field.startswith('-') else 'gt'
+
+            conditions.append(
+                equal & (Q(**{'{}__{}'.format(name, lookup): value}) | Q(**{'{}__isnull'.format(name): True}))
+            )
+            equal &= Q(**{name: value})
+
+        query = Q(pk__in=[])
+
+        for condition in conditions:
+            query |= condition
+
+        return query
+
+    @staticmethod
+    def get_values(item, ordering) -> list:
+        values = []
+
+        for field in ordering:
+            value = item
+
+            for attribute in field.lstrip('-').split('__'):
+                value = getattr(value, attribute) if value is not None else None
+
+            values.append(value)
+
+        return values
+
+    @staticmethod
+    def encode_cursor(values) -> str:
+        return base64.urlsafe_b64encode(JSONUtil.dumps(list(values))).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str, ordering) -> list:
+        try:
+            values = JSONUtil.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except (ValueError, binascii.Error, UnicodeEncodeError):
+            raise DeserializationException('Invalid cursor')
+
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise DeserializationException('Invalid cursor')
+
+        return values
+
+    @staticmethod
+    def paginate(queryset, ordering, per_page: int, cursor: str = None, page: int = 1):
+        """
+        Fetches one page of a queryset.
+
+        Args:
+        queryset (QuerySet): The rows to paginate, its ordering is replaced by the given ordering.
+        ordering (Iterable[str]): The sort key, ending with a unique field, e.g. ['-start_time', '-id'].
+        per_page (int): The number of rows per page.
+        cursor (str): The next cursor of the previous page. Takes precedence over the page number.
+        page (int): The 1-based page number, used when no cursor is given.
+
+        Returns:
+        tuple: The rows of the page and the cursor of the next page, None on the last page.
+
+        Raises:
+        DeserializationException: When the cursor is malformed.
+        """
+
+        ordering = list(ordering)
+        per_page = max(int(per_page), 1)
+
+        queryset = queryset.order_by(*PaginationUtil.get_order_by(ordering))
+
+        if cursor:
+            queryset = queryset.filter(
+                PaginationUtil.get_keyset_filter(ordering, PaginationUtil.decode_cursor(cursor, ordering))
+            )
+            offset = 0
+        else:
+            offset = (max(int(page), 1) - 1) * per_page
+
+        # One extra row tells whether there is a next page
+        items = list(queryset[offset:offset + per_page + 1])
+
+        if len(items) <= per_page:
+            return items, None
+
+        items = items[:per_page]
+
+        return items, PaginationUtil.encode_cursor(PaginationUtil.get_values(items[-1], ordering))
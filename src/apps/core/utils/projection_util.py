@@ -0,0 +1,40 @@
+from django.http import HttpRequest
+
+from apps.core.utils.wire_names import *
+
+
+class ProjectionUtil:
+    """
+    Reads the sparse fieldset options of list endpoints.
+
+    ?view=summary returns every summary field, ?fields=a,b,c returns only the listed summary fields.
+    Without either option the endpoint returns its full model views.
+    """
+
+    summary_view = 'summary'
+
+    @staticmethod
+    def get_summary_fields(request: HttpRequest, available_fields) -> list:
+        """
+        Args:
+        request (HttpRequest): The request holding the query parameters.
+        available_fields (Iterable[str]): The summary fields the endpoint supports, in response order.
+
+        Returns:
+        list: The summary fields to render, or None when the full view was requested.
+        """
+
+        available_fields = list(available_fields)
+
+        fields = request.GET.get(k_fields)
+
+        if fields:
+            requested = set(field.strip() for field in fields.split(','))
+
+            # The id is always included, so clients can match summaries to full views
+            return [field for field in available_fields if field in requested or field == k_id]
+
+        if request.GET.get(k_view) == ProjectionUtil.summary_view:
+            return available_fields
+
+        return None
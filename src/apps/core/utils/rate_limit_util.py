@@ -0,0 +1,28 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls evenly at a maximum rate, for batch jobs calling rate-limited APIs.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def acquire(self) -> None:
+        """
+        Blocks until the next call is allowed.
+        """
+
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+            self.count += 1
+
+        if wait > 0:
+            time.sleep(wait)
@@ -0,0 +1,67 @@
+import logging
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightUtil:
+    """
+    Collapses concurrent computations of the same value across processes, with a lock in the shared cache.
+
+    The first caller computes the value and publishes it wherever read looks. Concurrent callers poll read
+    until the value shows up, and compute it themselves when the lock is released or times out without it,
+    e.g. because the value was not worth publishing.
+    """
+
+    key_prefix = 'single_flight'
+
+    poll_interval = 0.1
+
+    @staticmethod
+    def run(key: str, read, compute, lock_timeout: float = 10):
+        """
+        Args:
+        key (str): Identifies the value, e.g. a cache key.
+        read (Callable[[], Any]): Returns the published value, or None when not there yet.
+        compute (Callable[[], Any]): Computes and publishes the value.
+        lock_timeout (float): Seconds to wait for a concurrent computation.
+
+        Returns:
+        tuple: The value, and whether it came from a concurrent computation.
+        """
+
+        lock_key = '{}:{}'.format(SingleFlightUtil.key_prefix, key)
+
+        try:
+            locked = cache.add(lock_key, 1, timeout=lock_timeout)
+        except Exception as e:
+            logger.warning('Could not lock {}: {}'.format(key, e))
+            locked = True
+
+        if not locked:
+            deadline = time.monotonic() + lock_timeout
+
+            while time.monotonic() < deadline:
+                time.sleep(SingleFlightUtil.poll_interval)
+
+                value = read()
+
+                if value is not None:
+                    return value, True
+
+                if cache.get(lock_key) is None:
+                    # Read once more, the value may have been published right before the lock was released
+                    value = read()
+
+                    if value is not None:
+                        return value, True
+
+                    break
+
+        try:
+            return compute(), False
+        finally:
+            if locked:
+                cache.delete(lock_key)
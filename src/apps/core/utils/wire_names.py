@@ -59,11 +59,15 @@ k_zip_code = 'zip_code'
 k_city = 'city'
 k_country = 'country'
 k_distance = 'distance'
+k_distance_estimated = 'distance_estimated'
+k_radius_km = 'radius_km'
 
 k_profile_picture = 'profile_picture'
 k_company = 'company'
 k_hours = 'hours'
 k_has_active_job = 'has_active_job'
+k_open_jobs_count = 'open_jobs_count'
+k_done_jobs_count = 'done_jobs_count'
 
 k_job = 'job'
 k_application = 'application'
@@ -71,14 +75,30 @@ k_jobs = 'jobs'
 k_times = 'times'
 
 k_success = 'success'
+k_results = 'results'
+
+k_approve = 'approve'
+k_deny = 'deny'
+
+k_stages = 'stages'
+k_attempts = 'attempts'
+k_error = 'error'
+k_updated_at = 'updated_at'
 
 k_customers = 'customers'
 k_workers = 'workers'
 k_dimonas = 'dimonas'
 
+k_view = 'view'
+k_fields = 'fields'
+k_sort = 'sort'
+
 k_items_per_page = 'items_per_page'
 k_page = 'page'
+k_count = 'count'
 k_total = 'total'
+k_cursor = 'cursor'
+k_next_cursor = 'next_cursor'
 
 k_start = 'start'
 k_end = 'end'
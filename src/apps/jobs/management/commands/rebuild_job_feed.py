@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs.utils.job_feed_util import JobFeedUtil
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the upcoming jobs feed of workers from the jobs table'
+
+    def handle(self, *args, **options):
+        count = JobFeedUtil.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the job feed with {count} jobs"))
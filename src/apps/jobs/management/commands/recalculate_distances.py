@@ -1,87 +1,163 @@
+import datetime
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 from django.utils import timezone
-from datetime import datetime
-from apps.jobs.models import JobApplication, JobApplicationState
-from apps.jobs.services.contract_service import JobApplicationService
-import json
+
+from apps.core.utils.rate_limit_util import RateLimiter
+from apps.jobs.models import Job, JobApplication, JobApplicationState
+from apps.jobs.services.distance_service import DistanceService
+
+
+def parse_date(value):
+    return timezone.make_aware(datetime.datetime.strptime(value, '%Y-%m-%d'))
+
 
 class Command(BaseCommand):
-    help = 'Recalculates distances for approved job applications from March jobs'
+    help = 'Recalculates the distances of job applications, resuming from its checkpoint after an interruption'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=parse_date, help='Only jobs starting on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--end', type=parse_date, help='Only jobs starting before this date (YYYY-MM-DD)')
+        parser.add_argument('--job', action='append', dest='jobs', default=[], help='Only this job, repeatable')
+        parser.add_argument('--worker', action='append', dest='workers', default=[], help='Only this worker, repeatable')
+        parser.add_argument('--state', action='append', dest='states', default=[],
+                            choices=JobApplicationState.values, help='Only applications in this state, repeatable')
+        parser.add_argument('--missing-only', action='store_true',
+                            help='Only applications without a distance or with an estimated distance')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent route matrix requests')
+        parser.add_argument('--rate', type=float, default=5, help='Maximum route matrix requests per second')
+        parser.add_argument('--batch-size', type=int, default=50, help='Jobs written and checkpointed at once')
+        parser.add_argument('--checkpoint', default='recalculate_distances.checkpoint.json',
+                            help='File keeping the progress of the run')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+
+    def get_applications(self, options):
+        applications = JobApplication.objects.all()
+
+        if options['start']:
+            applications = applications.filter(job__start_time__gte=options['start'])
+        if options['end']:
+            applications = applications.filter(job__start_time__lt=options['end'])
+        if options['jobs']:
+            applications = applications.filter(job_id__in=options['jobs'])
+        if options['workers']:
+            applications = applications.filter(worker_id__in=options['workers'])
+        if options['states']:
+            applications = applications.filter(application_state__in=options['states'])
+        if options['missing_only']:
+            applications = applications.filter(Q(distance__isnull=True) | Q(distance_estimated=True))
+
+        return applications
+
+    def get_signature(self, options) -> str:
+        # A checkpoint only resumes a run with the same filters
+        filters = {
+            key: options[key] for key in ('start', 'end', 'jobs', 'workers', 'states', 'missing_only')
+        }
+
+        return hashlib.md5(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()
+
+    def load_checkpoint(self, path: str, signature: str):
+        try:
+            with open(path) as file:
+                checkpoint = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if checkpoint.get('signature') != signature:
+            self.stdout.write(self.style.WARNING(f"Ignoring checkpoint {path} of a run with other filters"))
+            return None
+
+        return checkpoint
+
+    def save_checkpoint(self, path: str, checkpoint: dict) -> None:
+        # Replace the file at once, so an interruption never leaves half a checkpoint
+        with open(f"{path}.tmp", 'w') as file:
+            json.dump(checkpoint, file)
+
+        os.replace(f"{path}.tmp", path)
 
     def handle(self, *args, **options):
-        # Get the start and end of March
-        current_year = timezone.now().year
-        start_date = timezone.make_aware(datetime(current_year, 3, 1))
-        end_date = timezone.make_aware(datetime(current_year, 4, 1))
-
-        # Get all approved applications for jobs in March
-        applications = JobApplication.objects.filter(
-            application_state=JobApplicationState.approved,
-            job__start_time__gte=start_date,
-            job__start_time__lt=end_date
-        )
+        applications = self.get_applications(options)
+        jobs = Job.objects.filter(id__in=applications.values('job_id')).select_related('address').order_by('id')
+
+        signature = self.get_signature(options)
+        checkpoint = None if options['restart'] else self.load_checkpoint(options['checkpoint'], signature)
+
+        if checkpoint:
+            self.stdout.write(f"Resuming after job {checkpoint['last_job_id']}")
+            jobs = jobs.filter(id__gt=checkpoint['last_job_id'])
+        else:
+            checkpoint = {'signature': signature, 'last_job_id': None, 'jobs': 0, 'applications': 0, 'estimated': 0}
 
         self.stdout.write(f"Found {applications.count()} applications to process")
 
-        success_count = 0
-        error_count = 0
-
-        for application in applications:
-            try:
-                # Get the addresses
-                job_address = application.job.address
-                application_address = application.address
-
-                if job_address and application_address:
-                    # Use JobApplicationService to recalculate the distance
-                    directions_response = JobApplicationService.fetch_directions(
-                        lat=application_address.latitude,
-                        lon=application_address.longitude,
-                        to_lat=job_address.latitude,
-                        to_lon=job_address.longitude
-                    )
-
-                    if directions_response:
-                        response = json.loads(directions_response)
-                        new_distance = (response["routes"][0]["distanceMeters"] / 1000) * 2
-                        old_distance = application.distance
-
-                        # Update the distance
-                        application.distance = new_distance
-                        application.save(update_fields=['distance'])
-
-                        self.stdout.write(
-                            f"Updated application {application.id}: "
-                            f"Old distance: {old_distance:.2f}km, "
-                            f"New distance: {new_distance:.2f}km"
-                        )
-                        success_count += 1
-                    else:
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f"Could not get directions for application {application.id}"
-                            )
-                        )
-                        error_count += 1
-                else:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f"Missing address information for application {application.id}"
-                        )
-                    )
-                    error_count += 1
-
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f"Error processing application {application.id}: {str(e)}"
-                    )
-                )
-                error_count += 1
+        rate_limiter = RateLimiter(options['rate'])
+        started_at = time.monotonic()
+        applications_count = 0
+
+        def fetch(plan):
+            if not plan['missing']:
+                return []
+
+            return DistanceService.request_route_matrix(
+                [plan['origins'][cache_key] for cache_key in plan['missing']], plan['destination'], rate_limiter,
+            )
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            while True:
+                batch = list(jobs[:options['batch_size']])
+
+                if not batch:
+                    break
+
+                # Only the route requests run in the pool, the database is read and written from this thread
+                plans = [
+                    DistanceService.prepare_job_distances(job, applications.filter(job_id=job.id), recompute=True)
+                    for job in batch
+                ]
+
+                updated = []
+
+                for plan, fetched in zip(plans, executor.map(fetch, plans)):
+                    updated += DistanceService.apply_job_distances(plan, fetched)
+
+                JobApplication.objects.bulk_update(updated, ['distance', 'distance_estimated'], batch_size=500)
+
+                applications_count += len(updated)
+
+                checkpoint['last_job_id'] = str(batch[-1].id)
+                checkpoint['jobs'] += len(batch)
+                checkpoint['applications'] += len(updated)
+                checkpoint['estimated'] += sum(1 for application in updated if application.distance_estimated)
+
+                self.save_checkpoint(options['checkpoint'], checkpoint)
+
+                jobs = jobs.filter(id__gt=batch[-1].id)
+
+                self.stdout.write(f"Updated {checkpoint['applications']} applications of {checkpoint['jobs']} jobs")
+
+        if os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+
+        elapsed = time.monotonic() - started_at
+
+        self.stdout.write(
+            f"Processed {applications_count} applications in {elapsed:.1f}s "
+            f"({applications_count / elapsed if elapsed else 0:.1f} applications/s), "
+            f"with {rate_limiter.count} route requests ({rate_limiter.count / elapsed if elapsed else 0:.1f} requests/s)"
+        )
 
         self.stdout.write(
             self.style.SUCCESS(
                 f"Finished processing applications. "
-                f"Success: {success_count}, Errors: {error_count}"
+                f"Jobs: {checkpoint['jobs']}, Applications: {checkpoint['applications']}, "
+                f"Estimated: {checkpoint['estimated']}"
             )
-        )
\ No newline at end of file
+        )
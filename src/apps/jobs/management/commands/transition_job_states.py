@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs.utils.job_state_util import JobStateUtil
+
+
+class Command(BaseCommand):
+    help = 'Moves jobs through their lifecycle, like the periodic transition_job_states task'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count the jobs each rule would move')
+
+    def handle(self, *args, **options):
+        counts = JobStateUtil.transition(dry_run=options['dry_run'])
+
+        for name, count in counts.items():
+            self.stdout.write(f"{name}: {count}")
+
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+
+        self.stdout.write(self.style.SUCCESS(f"{verb} {sum(counts.values())} jobs"))
@@ -1,14 +1,17 @@
-import datetime
+from itertools import chain
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count
+from django.utils import timezone
 
-from itertools import chain
+from apps.core.utils.count_util import CountUtil
 from apps.core.utils.formatters import FormattingUtil
 from apps.jobs.models import JobApplication, Job, JobApplicationState
-from apps.notifications.managers.notification_manager import NotificationManager, create_global_notification
+from apps.jobs.utils.approval_pipeline_util import ApprovalPipelineUtil
+from apps.jobs.utils.conflict_util import ConflictUtil
 from apps.notifications.models import ApprovedMailTemplate, DeniedMailTemplate, SelectedWorkerTemplate
-from apps.legal.utils.contract_util import ContractUtil
-from apps.legal.services.link2prisma_service import Link2PrismaService
+from apps.notifications.outbox import record_mail, record_user_notification, record_workers_notification
+from apps.legal.outbox import record_dimona_cancellation
 
 
 class JobManager(models.Manager):
@@ -35,26 +38,42 @@ class JobManager(models.Manager):
 
         send_new_push = application.job.max_workers - application.job.selected_workers == 0
 
-        application.application_state = JobApplicationState.rejected
-        application.save()
+        with transaction.atomic():
+            application.application_state = JobApplicationState.rejected
+            application.save()
 
-        job = application.job
-        selected_workers = JobManager.calculate_selected_workers(application)
+            job = application.job
+            selected_workers = JobManager.calculate_selected_workers(application)
 
-        if (job.max_workers - selected_workers) > 0 and send_new_push:
-            JobManager.send_job_notification(job=job, title='New spot available!')
+            if (job.max_workers - selected_workers) > 0 and send_new_push:
+                JobManager.send_job_notification(job=job, title='New spot available!')
 
-        Link2PrismaService.handle_job_cancellation(application)
-        
-        # Only send notifications if explicitly requested AND the application was pending before
-        if send_notifications and was_pending:
-            DeniedMailTemplate().send(recipients=[{'Email': application.worker.email}], data={"job_title": job.title, "city": job.address.city or 'Belgium'})
-            NotificationManager.create_notification_for_user(application.worker, 'Job full! - {}'.format(job.title), 'You weren\'t selected for a job you applied to!', image_url=None, send_mail=False)
+            record_dimona_cancellation(application)
+
+            # Only send notifications if explicitly requested AND the application was pending before
+            if send_notifications and was_pending:
+                JobManager._notify_denied_worker(application)
+
+    @staticmethod
+    def _notify_denied_worker(application: JobApplication) -> None:
+        """
+        Records the mail and notification telling a worker they were not selected for a job.
+
+        Args:
+        Application (JobApplication): The denied job application.
+        """
+
+        job = application.job
+
+        record_mail(DeniedMailTemplate, [{'Email': application.worker.email}],
+                    {"job_title": job.title, "city": job.address.city or 'Belgium'})
+        record_user_notification(application.worker, 'Job full! - {}'.format(job.title),
+                                 'You weren\'t selected for a job you applied to!')
 
     @staticmethod
     def _notify_approved_worker(application: JobApplication) -> None:
         """
-        Handles the approval of a job application by notifying the worker.
+        Handles the approval of a job application by recording the mails and notification for the worker and customer.
 
         Args:
         Application (JobApplication): The job application being approved.
@@ -69,24 +88,22 @@ class JobManager(models.Manager):
         end = job.end_time
 
         # Worker email
-        ApprovedMailTemplate().send(recipients=[{'Email': application.worker.email}], 
-                                    data={"job_title": job.title, "weekday": FormattingUtil.to_day_of_the_week(start), 
-                                          "date": FormattingUtil.to_date(start), "time_interval": FormattingUtil.to_time_interval(start, end), 
-                                          "customer_name": job.customer.get_full_name(), "address": job.address.to_readable(),})
+        record_mail(ApprovedMailTemplate, [{'Email': application.worker.email}],
+                    {"job_title": job.title, "weekday": FormattingUtil.to_day_of_the_week(start),
+                     "date": FormattingUtil.to_date(start), "time_interval": FormattingUtil.to_time_interval(start, end),
+                     "customer_name": job.customer.get_full_name(), "address": job.address.to_readable(),})
 
         # Worker notification
-        NotificationManager.create_notification_for_user(application.worker,
-                                                         'Approved job - {}'.format(job.title),
-                                                         'You\'ve been approved by an admin for a job in {}'.format(
-                                                             job.address.city or job.address.country or 'Belgium'),
-                                                         image_url=None,
-                                                         send_mail=False, )
+        record_user_notification(application.worker,
+                                 'Approved job - {}'.format(job.title),
+                                 'You\'ve been approved by an admin for a job in {}'.format(
+                                     job.address.city or job.address.country or 'Belgium'))
 
         # Customer email
-        SelectedWorkerTemplate().send(recipients=[{'Email': application.job.customer.email}],   
-                                      data={"title": job.title, "weekday": FormattingUtil.to_day_of_the_week(start), 
-                                            "date": FormattingUtil.to_date(start), "interval": FormattingUtil.to_readable_time(start), \
-                                            "worker": application.worker.first_name or "", "address": job.address.to_readable(), "phone_number": application.worker.phone_number or "", })
+        record_mail(SelectedWorkerTemplate, [{'Email': application.job.customer.email}],
+                    {"title": job.title, "weekday": FormattingUtil.to_day_of_the_week(start),
+                     "date": FormattingUtil.to_date(start), "interval": FormattingUtil.to_readable_time(start),
+                     "worker": application.worker.first_name or "", "address": job.address.to_readable(), "phone_number": application.worker.phone_number or "", })
 
 
     @staticmethod
@@ -95,39 +112,35 @@ class JobManager(models.Manager):
         """
         Processes job application approval by performing the following steps:
         - Updates the application state to 'approved'.
-        - Sends a notification to the worker about the approval.
         - Rejects overlapping applications to prevent scheduling conflicts.
         - Updates the count of selected workers for the job.
-        - Generates a contract PDF using ContractUtil.generate_contract.
+        - Starts the approval pipeline, which declares the Dimona, generates the contract and notifies
+          the worker and customer in the background (see ApprovalPipelineUtil).
 
         Args:
         application (JobApplication): The job application to approve.
         """
 
-        Link2PrismaService.handle_job_approval(application)
+        with transaction.atomic():
+            # Serializes with concurrent approvals of the same job, see update_applications
+            Job.objects.select_for_update().filter(id=application.job_id).first()
 
-        application.application_state = JobApplicationState.approved
+            application.application_state = JobApplicationState.approved
 
-        JobManager._notify_approved_worker(application)
+            JobManager.remove_overlap_applications(application)
+            JobManager.calculate_selected_workers(application)
 
-        JobManager.remove_overlap_applications(application)
-        JobManager.calculate_selected_workers(application)
+            application.save()
 
-        application.save()
+            ApprovalPipelineUtil.start([application])
 
-        try:
-            ContractUtil.generate_contract(application)
-        except Exception as e:
-            print(e)
-            pass
     @staticmethod
     def remove_unselected_workers(job: Job) -> None:
         """Rejects pending applications and notifies workers."""
         pending = JobApplication.objects.filter(job_id=job.id, application_state=JobApplicationState.pending)
         for app in pending:
             JobManager.deny_application(app, send_notifications=False)
-            DeniedMailTemplate().send(recipients=[{'Email': app.worker.email}], data={"job_title": job.title, "city": job.address.city or 'Belgium'})
-            NotificationManager.create_notification_for_user(app.worker, 'Job full! - {}'.format(job.title), 'You weren\'t selected for a job you applied to!', image_url=None, send_mail=False)
+            JobManager._notify_denied_worker(app)
 
     @staticmethod
     def calculate_selected_workers(application: JobApplication):
@@ -181,7 +194,7 @@ class JobManager(models.Manager):
         
         """
         Handles notifications to workers about a new job.
-        This function formats the job's start time and location, then creates 
+        This function formats the job's start time and location, then records
         a global notification for workers, with the provided title and a description 
         containing the job's location, date, and time.
 
@@ -198,89 +211,22 @@ class JobManager(models.Manager):
 
         description = 'in {} on {} at {}'.format(city, date, time, )
 
-        create_global_notification(title, description, image_url=None, send_push=True)
-
-    @staticmethod
-    def get_overlap_applications(application: JobApplication, state: JobApplicationState = JobApplicationState.pending):
-        
-        """
-        Retrieves job applications that overlap with the start time of the specified application for the same worker.
-
-        The function checks for applications that fall within a 3-hour buffer before and after the 
-        start and end time of the job associated with the provided application. This allows the system 
-        to account for potential scheduling conflicts.
-
-        Args:
-        application (JobApplication): The job application for which overlapping applications are checked.
-        state (JobApplicationState): The state of the application to filter by. Defaults to 'pending'.
-    
-        Returns:
-        QuerySet: A queryset of JobApplication objects for the same worker that overlap with the specified 
-                  application's job start time within the 3-hour buffer.
-        """
-
-        date_range = [application.job.start_time - datetime.timedelta(hours=3),
-                      application.job.end_time + datetime.timedelta(hours=3)]
-
-        overlap_applications = JobApplication.objects.filter(worker_id=application.worker_id,
-                                                             job__start_time__range=date_range,
-                                                             application_state=state, )
-        return overlap_applications
+        record_workers_notification(title, description)
 
     @staticmethod
-    def get_end_overlap_applications(application: JobApplication,
-                                     state: JobApplicationState = JobApplicationState.pending):
+    def remove_overlap_applications(application: JobApplication) -> list:
         
-
         """
-        Retrieves job applications for the worker that overlap with the end time of the specified job application.
-    
-        This method looks for applications that are in the same state (default is 'pending') and whose job's 
-        end time falls within a 3-hour buffer before and after the job's end time. The function is used to 
-        prevent scheduling conflicts with jobs.
+        Rejects the pending applications of the same worker for conflicting jobs, see ConflictUtil.
 
         Args:
-        application (JobApplication): The job application for which overlapping applications are checked.
-        state (JobApplicationState): The state of the job applications to filter by (default is 'pending').
+        application (JobApplication): The job application whose overlaps are to be checked and removed.
 
         Returns:
-        QuerySet: A queryset of JobApplication objects for the same worker that overlap with the specified 
-                  application's job end time within the 3-hour buffer.
-        """
-        
-
-        date_range = [application.job.start_time - datetime.timedelta(hours=3),
-                      application.job.end_time + datetime.timedelta(hours=3)]
-
-        overlap_applications = JobApplication.objects.filter(worker_id=application.worker_id,
-                                                             job__end_time__range=date_range,
-                                                             application_state=state, )
-        return overlap_applications
-
-    @staticmethod
-    def remove_overlap_applications(application: JobApplication) -> None:
-        
-        """
-        Rejects overlapping job applications for the same worker to prevent scheduling conflicts.
-
-        This method checks for job applications that overlap with the specified application. It retrieves both 
-        the applications that overlap with the job's start time and the ones that overlap with the job's end time.
-        Any overlapping applications that are not already rejected will have their state updated to 'rejected', 
-        ensuring that the worker is not scheduled for conflicting jobs.
-
-        Args:
-        application (JobApplication): The job application whose overlaps are to be checked and removed.
+        list: The ids of the rejected applications.
         """
 
-        overlap_applications = JobManager.get_overlap_applications(application)
-        end_overlap_applications = JobManager.get_end_overlap_applications(application)
-
-        applications = set(chain(overlap_applications, end_overlap_applications))
-
-        for overlap_application in applications:
-            if overlap_application.application_state != JobApplicationState.rejected:
-                overlap_application.application_state = JobApplicationState.rejected
-            overlap_application.save()
+        return ConflictUtil.reject_conflicts([application])
 
     @staticmethod
     def create(job: Job):
@@ -312,3 +258,118 @@ class JobManager(models.Manager):
             JobManager.send_job_notification(job)
 
         return job
+
+    @staticmethod
+    def update_applications(approved: list, denied: list) -> dict:
+        """
+        Approves and denies validated applications of any number of jobs in a single transaction.
+
+        The affected jobs are locked first, so the free spots are counted while no other approval can take them:
+        approvals beyond the max workers of a job are not carried out, the ones listed first are kept.
+        The states are changed with bulk updates, conflicting applications of the approved workers are rejected
+        (see ConflictUtil) and the selected workers of every affected job are recounted once. Jobs that got full
+        reject their remaining pending applications.
+
+        The side effects are recorded in the same transaction: the approval pipeline of the approved applications
+        (see ApprovalPipelineUtil), Dimona cancellations of denied approvals, mails and notifications of denied
+        pending applications and pushes for jobs with a spot available again (see OutboxUtil).
+
+        Args:
+        approved (list[JobApplication]): The applications to approve, in order of preference.
+        denied (list[JobApplication]): The applications to deny.
+
+        Returns:
+        dict: The states of the denied applications before the update ('previous_states'), the approvals left out
+              because their job was full ('over_capacity'), the pending applications rejected because their job got
+              full ('full') and the jobs with a spot available again ('reopened').
+        """
+
+        now = timezone.now()
+        job_ids = {application.job_id for application in chain(approved, denied)}
+
+        over_capacity = []
+        full = []
+        reopened = []
+
+        with transaction.atomic():
+            jobs = list(Job.objects.select_for_update().select_related('address').filter(id__in=job_ids))
+
+            # The states as committed by concurrent updates, read under the job locks
+            previous_states = dict(
+                JobApplication.objects.filter(id__in=[application.id for application in denied])
+                .values_list('id', 'application_state')
+            )
+
+            JobApplication.objects.filter(id__in=[application.id for application in denied]).update(
+                application_state=JobApplicationState.rejected, modified_at=now,
+            )
+
+            counts = dict(
+                JobApplication.objects.filter(job_id__in=job_ids, application_state=JobApplicationState.approved)
+                .exclude(id__in=[application.id for application in approved])
+                .values('job_id').annotate(count=Count('id')).values_list('job_id', 'count')
+            )
+            max_workers = {job.id: job.max_workers for job in jobs}
+            requested, approved = approved, []
+
+            for application in requested:
+                count = counts.get(application.job_id, 0)
+
+                if max_workers[application.job_id] is not None and count >= max_workers[application.job_id]:
+                    over_capacity.append(application)
+                else:
+                    counts[application.job_id] = count + 1
+                    approved.append(application)
+
+            JobApplication.objects.filter(id__in=[application.id for application in approved]).update(
+                application_state=JobApplicationState.approved, modified_at=now,
+            )
+
+            ConflictUtil.reject_conflicts(approved)
+
+            counts = dict(
+                JobApplication.objects.filter(job_id__in=job_ids, application_state=JobApplicationState.approved)
+                .values('job_id').annotate(count=Count('id')).values_list('job_id', 'count')
+            )
+
+            for job in jobs:
+                was_full = job.max_workers is not None and (job.selected_workers or 0) >= job.max_workers
+
+                job.selected_workers = counts.get(job.id, 0)
+                job.save()
+
+                if job.max_workers is not None and job.selected_workers >= job.max_workers:
+                    full += JobApplication.objects.filter(
+                        job_id=job.id, application_state=JobApplicationState.pending,
+                    ).select_related('job__address', 'worker')
+                elif was_full:
+                    reopened.append(job)
+
+            JobApplication.objects.filter(id__in=[application.id for application in full]).update(
+                application_state=JobApplicationState.rejected, modified_at=now,
+            )
+
+            # The bulk updates bypass the signals keeping paginated totals in sync
+            CountUtil.bump_generation(JobApplication._meta.db_table)
+
+            for application in approved:
+                application.application_state = JobApplicationState.approved
+
+            for application in chain(denied, full):
+                application.application_state = JobApplicationState.rejected
+
+            ApprovalPipelineUtil.start(approved)
+
+            for application in denied:
+                if previous_states.get(application.id) == JobApplicationState.approved:
+                    record_dimona_cancellation(application)
+                elif previous_states.get(application.id) == JobApplicationState.pending:
+                    JobManager._notify_denied_worker(application)
+
+            for application in full:
+                JobManager._notify_denied_worker(application)
+
+            for job in reopened:
+                JobManager.send_job_notification(job=job, title='New spot available!')
+
+        return {'previous_states': previous_states, 'over_capacity': over_capacity, 'full': full, 'reopened': reopened}
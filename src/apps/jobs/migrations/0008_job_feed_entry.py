@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:39
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def populate_job_feed(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobFeedEntry = apps.get_model('jobs', 'JobFeedEntry')
+
+    jobs = Job.objects.filter(
+        start_time__gt=timezone.now(),
+        archived=False,
+        selected_workers__lt=models.F('max_workers'),
+        tag__isnull=False,
+        application_start_time__isnull=False,
+        application_end_time__isnull=False,
+    ).values('id', 'tag_id', 'start_time', 'end_time', 'application_start_time', 'application_end_time')
+
+    JobFeedEntry.objects.bulk_create([
+        JobFeedEntry(
+            job_id=job['id'],
+            tag_id=job['tag_id'],
+            start_time=job['start_time'],
+            end_time=job['end_time'],
+            application_start_time=job['application_start_time'],
+            application_end_time=job['application_end_time'],
+        )
+        for job in jobs
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_alter_dimona_created'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFeedEntry',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_entry', serialize=False, to='jobs.job')),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField(null=True)),
+                ('application_start_time', models.DateTimeField()),
+                ('application_end_time', models.DateTimeField()),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='jobs.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'start_time'], name='jobs_feed_tag_start_idx')],
+            },
+        ),
+        migrations.RunPython(populate_job_feed, migrations.RunPython.noop),
+    ]
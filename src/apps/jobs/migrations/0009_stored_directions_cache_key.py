@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def fill_cache_keys(apps, schema_editor):
+    """
+    Keys the existing directions like DirectionsUtil.get_cache_key, keeping the newest row of every key.
+    """
+
+    StoredDirections = apps.get_model('jobs', 'StoredDirections')
+
+    # DIRECTIONS_CACHE_PRECISION when this migration was written, fixed so the keys never depend on later settings
+    precision = 4
+    seen = set()
+    duplicates = []
+    batch = []
+
+    directions_rows = StoredDirections.objects.order_by('-created_at').only('id', 'from_lat', 'from_lon', 'to_lat', 'to_lon')
+
+    for directions in directions_rows.iterator(chunk_size=1000):
+        key = ','.join('{:.{}f}'.format(value, precision) for value in (
+            directions.from_lat, directions.from_lon, directions.to_lat, directions.to_lon,
+        ))
+
+        if key in seen:
+            duplicates.append(directions.id)
+            continue
+
+        seen.add(key)
+        directions.cache_key = key
+        batch.append(directions)
+
+        if len(batch) == 1000:
+            StoredDirections.objects.bulk_update(batch, ['cache_key'])
+            batch = []
+
+    StoredDirections.objects.bulk_update(batch, ['cache_key'])
+
+    for start in range(0, len(duplicates), 1000):
+        StoredDirections.objects.filter(id__in=duplicates[start:start + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_job_feed_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storeddirections',
+            name='cache_key',
+            field=models.CharField(max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='storeddirections',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(fill_cache_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:52
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_stored_directions_cache_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DetourFactor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=12, unique=True)),
+                ('factor', models.FloatField()),
+                ('samples', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='jobapplication',
+            name='distance_estimated',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:00
+
+import json
+import zlib
+
+from django.db import migrations, models
+
+
+def compact_directions(apps, schema_editor):
+    """
+    Splits the stored responses into columns like DirectionsUtil.to_columns.
+    """
+
+    StoredDirections = apps.get_model('jobs', 'StoredDirections')
+
+    batch = []
+
+    for directions in StoredDirections.objects.only('id', 'directions_response').iterator(chunk_size=1000):
+        try:
+            route = json.loads(directions.directions_response)['routes'][0]
+        except (ValueError, KeyError, IndexError, TypeError):
+            route = None
+
+        if route is not None:
+            duration = route.get('duration')
+            encoded_polyline = route.get('polyline', {}).get('encodedPolyline')
+
+            directions.distance_meters = route.get('distanceMeters', 0)
+            directions.duration_seconds = round(float(duration.rstrip('s'))) if duration else None
+            directions.polyline = zlib.compress(encoded_polyline.encode(), 9) if encoded_polyline else None
+
+        batch.append(directions)
+
+        if len(batch) >= 1000:
+            StoredDirections.objects.bulk_update(batch, ['distance_meters', 'duration_seconds', 'polyline'])
+            batch = []
+
+    StoredDirections.objects.bulk_update(batch, ['distance_meters', 'duration_seconds', 'polyline'])
+
+
+def expand_directions(apps, schema_editor):
+    """
+    Rebuilds the responses from the columns like DirectionsUtil.to_response.
+    """
+
+    StoredDirections = apps.get_model('jobs', 'StoredDirections')
+
+    batch = []
+
+    directions_rows = StoredDirections.objects.only('id', 'distance_meters', 'duration_seconds', 'polyline')
+
+    for directions in directions_rows.iterator(chunk_size=1000):
+        response = {}
+
+        if directions.distance_meters is not None:
+            route = {'distanceMeters': directions.distance_meters}
+
+            if directions.duration_seconds is not None:
+                route['duration'] = '{}s'.format(directions.duration_seconds)
+            if directions.polyline is not None:
+                route['polyline'] = {'encodedPolyline': zlib.decompress(bytes(directions.polyline)).decode()}
+
+            response = {'routes': [route]}
+
+        directions.directions_response = json.dumps(response)
+        batch.append(directions)
+
+        if len(batch) >= 1000:
+            StoredDirections.objects.bulk_update(batch, ['directions_response'])
+            batch = []
+
+    StoredDirections.objects.bulk_update(batch, ['directions_response'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_distance_estimates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storeddirections',
+            name='distance_meters',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='storeddirections',
+            name='duration_seconds',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='storeddirections',
+            name='polyline',
+            field=models.BinaryField(null=True),
+        ),
+        # Nullable first, so unapplying the migration can add the column back to a filled table
+        migrations.AlterField(
+            model_name='storeddirections',
+            name='directions_response',
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(compact_directions, expand_directions),
+        migrations.RemoveField(
+            model_name='storeddirections',
+            name='directions_response',
+        ),
+    ]
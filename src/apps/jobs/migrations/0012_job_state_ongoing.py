@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_compact_stored_directions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='job_state',
+            field=models.CharField(choices=[('fulfilled', 'Fulfilled'), ('pending', 'Pending'), ('ongoing', 'Ongoing'), ('done', 'Done'), ('cancelled', 'Cancelled')], default='pending', max_length=64),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_job_state_ongoing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalStage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32)),
+                ('state', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=256, null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='approval_stages', to='jobs.jobapplication')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='approvalstage',
+            constraint=models.UniqueConstraint(fields=('application', 'name'), name='jobs_approval_stage_unique'),
+        ),
+    ]
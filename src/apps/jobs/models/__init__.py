@@ -6,10 +6,14 @@ Imported Modules and Classes:
 - JobApplication: Defines the JobApplication model, which represents an application for a job.
 - Job: Contains the Job model, which represents a job position within the system.
 - JobApplicationState: Defines different states for job applications (approved, pending, rejected).
-- JobState: Defines different states for jobs (fulfilled, pending, done, cancelled).
+- JobState: Defines different states for jobs (fulfilled, pending, ongoing, done, cancelled).
 - TimeRegistration: Manages time registration related for workers.
-- StoredDirections: Stores directions between two locations and automatically cleans up expired directions after a predefined time period.
+- StoredDirections: Stores directions between two locations, expired directions are purged periodically after a predefined time period.
 - Dimona: Handles operations related to the Dimona service.
+- JobFeedEntry: Indexes the jobs that are open to applications, for the upcoming jobs feed of workers.
+- DetourFactor: Driving to straight-line distance ratios per region, used to estimate distances without Google.
+- ApprovalStage: Tracks the background stages following the approval of an application.
+- ApprovalStageState: Defines different states for approval stages (pending, running, done, failed).
 
 By importing these components here, users can access them using:
     from jobs import JobApplication, Job, JobApplicationState, JobState, TimeRegistration, StoredDirections, Dimona
@@ -24,3 +28,7 @@ from .time_registration import TimeRegistration
 from .stored_directions import StoredDirections
 from .dimona import Dimona
 from .tag import Tag
+from .job_feed_entry import JobFeedEntry
+from .detour_factor import DetourFactor
+from .approval_stage import ApprovalStage
+from .approval_stage_state import ApprovalStageState
@@ -40,6 +40,9 @@ class JobApplication(models.Model):
 
     distance = models.FloatField(null=True)
 
+    # Whether the distance is an estimate, made while Google was unavailable (see DistanceEstimatorUtil)
+    distance_estimated = models.BooleanField(default=False)
+
     no_travel_cost = models.BooleanField(default=True)
 
     created_at = models.DateTimeField()
@@ -74,7 +77,8 @@ class JobApplication(models.Model):
         Ensure the location between the job address and application address is calculated before saving the job application.
         If the distance is not set, it calculates the distance between both locations by making a request to Google Directions API.
         When the location is set, the distance is extracted from the response in meters to kilometers.
-        If any error occurs, it raises a ValidationError with an error message.
+        When Google is unavailable, the distance is estimated and marked as such, to be refined later
+        by the refine_estimated_distances task.
         When the distance is calculated and in kilometers, it saves the job application to the database.
 
         Args:
@@ -84,6 +88,8 @@ class JobApplication(models.Model):
 
         import json
         from apps.jobs.services.contract_service import JobApplicationService
+        from apps.jobs.services.distance_service import DistanceService
+        from apps.jobs.utils.directions_util import DirectionsUtil
 
         # Calculate distance if it's not set
         if self.distance is None:
@@ -92,27 +98,53 @@ class JobApplication(models.Model):
 
             if job_address and application_address:
                 try:
-                    # Use JobApplicationService to calculate the distance using Google Directions API
-                    directions_response = JobApplicationService.fetch_directions(
-                        lat=application_address.latitude,
-                        lon=application_address.longitude,
-                        to_lat=job_address.latitude,
-                        to_lon=job_address.longitude
+                    # Stored trips only need their distance column
+                    distance_meters = DirectionsUtil.get_distance(
+                        application_address.latitude,
+                        application_address.longitude,
+                        job_address.latitude,
+                        job_address.longitude,
                     )
 
-                    if directions_response:
-                        response = json.loads(directions_response)
+                    if distance_meters is None:
+                        # Use JobApplicationService to calculate the distance using Google Directions API
+                        directions_response = JobApplicationService.fetch_directions(
+                            lat=application_address.latitude,
+                            lon=application_address.longitude,
+                            to_lat=job_address.latitude,
+                            to_lon=job_address.longitude
+                        )
+
+                        if directions_response:
+                            response = json.loads(directions_response)
+
+                            distance_meters = response["routes"][0]["distanceMeters"]
 
-                        self.distance = (response["routes"][0]["distanceMeters"] / 1000) * 2
+                    if distance_meters is not None:
+                        self.distance = DistanceService.to_travel_distance(distance_meters)
 
                 except Exception as e:
                     pass
                     # Log the error and raise a ValidationError
                     # raise ValidationError(f"Failed to calculate distance: {str(e)}")
 
+                if self.distance is None and None not in (
+                    application_address.latitude, application_address.longitude,
+                    job_address.latitude, job_address.longitude,
+                ):
+                    from apps.jobs.utils.distance_estimator_util import DistanceEstimatorUtil
+
+                    estimate = DistanceEstimatorUtil.estimate(
+                        [(application_address.latitude, application_address.longitude)],
+                        (job_address.latitude, job_address.longitude),
+                    )[0]
+
+                    self.distance = DistanceService.to_travel_distance(estimate)
+                    self.distance_estimated = True
+
         super().save(*args, **kwargs)
 
-    def to_model_view(self):
+    def to_model_view(self, job_view: dict = None, worker_view: dict = None):
 
         """
         Handles retrieving the URL of the contract associated with the job application,
@@ -121,6 +153,8 @@ class JobApplication(models.Model):
 
         Args:
         self (JobApplication): Intance of JobApplication model.
+        job_view (dict): An already serialized view of the job, rendered with JobUtil when omitted.
+        worker_view (dict): An already serialized view of the worker, rendered with WorkerUtil when omitted.
 
         Returns:
         Dictionnary of key-value pairs where each key corresponds to an attribute.
@@ -139,17 +173,18 @@ class JobApplication(models.Model):
 
         return {
             k_id: self.id,
-            k_job: JobUtil.to_model_view(self.job),
+            k_job: job_view if job_view is not None else JobUtil.to_model_view(self.job),
             k_start_time: FormattingUtil.to_timestamp(self.job.start_time),
             k_end_time: FormattingUtil.to_timestamp(self.job.end_time),
             k_max_workers: self.job.max_workers,
             k_selected_workers: self.job.selected_workers,
             k_application_start_time: FormattingUtil.to_timestamp(self.job.application_start_time),
             k_application_end_time: FormattingUtil.to_timestamp(self.job.application_end_time),
-            k_worker: WorkerUtil.to_worker_view(self.worker),
+            k_worker: worker_view if worker_view is not None else WorkerUtil.to_worker_view(self.worker),
             k_address: self.address.to_model_view(),
             k_state: self.application_state,
             k_distance: self.distance,
+            k_distance_estimated: self.distance_estimated,
             k_no_travel_cost: self.no_travel_cost,
             k_created_at: FormattingUtil.to_timestamp(self.created_at),
             k_note: self.note,
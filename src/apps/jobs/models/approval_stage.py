@@ -0,0 +1,29 @@
+from django.db import models
+from django.utils import timezone
+
+from .application import JobApplication
+from .approval_stage_state import ApprovalStageState
+
+
+class ApprovalStage(models.Model):
+    """
+    Progress of one stage of the background work following the approval of an application,
+    run by ApprovalPipelineUtil: the Dimona declaration, the contract and the notifications.
+    """
+
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='approval_stages')
+
+    name = models.CharField(max_length=32)
+
+    state = models.CharField(max_length=16, choices=ApprovalStageState.choices, default=ApprovalStageState.pending)
+
+    attempts = models.PositiveIntegerField(default=0)
+
+    error = models.CharField(max_length=256, null=True, blank=True)
+
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['application', 'name'], name='jobs_approval_stage_unique'),
+        ]
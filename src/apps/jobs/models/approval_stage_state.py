@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class ApprovalStageState(models.TextChoices):
+
+    """
+    This class defines the possible states for a stage of the approval pipeline using Django's TextChoices class.
+
+    The states include:
+    - 'pending': The stage is waiting to run, or to be retried after a failed attempt.
+    - 'running': The stage is being run by a worker.
+    - 'done': The stage succeeded.
+    - 'failed': The stage failed on every attempt.
+
+    Args:
+    models (TextChoices): Inherits from Django's TextChoices to define the states as text choices.
+
+    """
+
+    pending = "pending"
+
+    running = "running"
+
+    done = "done"
+
+    failed = "failed"
@@ -0,0 +1,19 @@
+from django.db import models
+from django.utils import timezone
+
+
+class DetourFactor(models.Model):
+    """
+    Ratio of the driving distance to the straight-line distance of trips starting in a region,
+    fitted from StoredDirections by DistanceEstimatorUtil.fit.
+
+    Regions are geohash prefixes of the origin. The row with an empty region holds the factor of all trips.
+    """
+
+    region = models.CharField(max_length=12, unique=True)
+
+    factor = models.FloatField()
+
+    samples = models.PositiveIntegerField()
+
+    updated_at = models.DateTimeField(default=timezone.now)
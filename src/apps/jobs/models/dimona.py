@@ -13,6 +13,9 @@ class Dimona(models.Model):
     Each static method is documented with its purpose, paramaters and returns values.
     """
     
+    # Reason of a declaration cancelled after its application was denied, see Link2PrismaService
+    cancelled_reason = 'Dimona declaration cancelled'
+
     id = models.CharField(primary_key=True, null=False, max_length=64)  # Increased to handle Link2Prisma UniqueIdentifiers
 
     application = models.ForeignKey(JobApplication, on_delete=models.PROTECT, default=None)
@@ -24,13 +27,14 @@ class Dimona(models.Model):
     created = models.DateTimeField(auto_now_add=True, null=True)
 
 
-    def to_model_view(self):
+    def to_model_view(self, application_view: dict = None):
 
         """
         Converts the Dimona instance into a dictionnary representation.
 
         Args:
         self (Dimona): Instance of Dimona model.
+        application_view (dict): An already serialized view of the application, rendered when omitted.
 
         Returns:
         Dictionnary of key-value pairs representing the attributes
@@ -39,7 +43,7 @@ class Dimona(models.Model):
 
         return {
             k_id: self.id,
-            k_application: self.application.to_model_view(),
+            k_application: application_view if application_view is not None else self.application.to_model_view(),
             k_success: self.success,
             k_description: self.reason,
             k_created_at: self.created,
@@ -0,0 +1,31 @@
+from django.db import models
+
+from .job import Job
+from .tag import Tag
+
+
+class JobFeedEntry(models.Model):
+    """
+    Denormalized index of the jobs workers can apply to, read by the upcoming jobs feed of workers.
+
+    Holds one row per job that is not archived, has free places and a tag, with the times the feed filters on,
+    so the feed is a range read on (tag, start_time). Rows are kept in sync with their job by JobFeedUtil,
+    from the job signals in apps.jobs.signals.
+    """
+
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='feed_entry')
+
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    start_time = models.DateTimeField()
+
+    end_time = models.DateTimeField(null=True)
+
+    application_start_time = models.DateTimeField()
+
+    application_end_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tag', 'start_time'], name='jobs_feed_tag_start_idx'),
+        ]
@@ -9,6 +9,7 @@ class JobState(models.TextChoices):
     The states include:
     - 'fulfilled': The job has been fulfilled.
     - 'pending': The job is still under review.
+    - 'ongoing': The job has started and is being worked on.
     - 'done': The job has been done.
     - 'cancelled': The job has been cancelled.
 
@@ -21,6 +22,8 @@ class JobState(models.TextChoices):
 
     pending = "pending"
 
+    ongoing = "ongoing"
+
     done = "done"
 
     cancelled = "cancelled"
@@ -1,16 +1,20 @@
 import datetime
 import uuid
 
-import pytz
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
-from apps.core.models.geo import Address
-from apps.jobs.models.job_state import JobState
-
 
 class StoredDirections(models.Model):
+    """
+    Cached Google Routes response between two points, looked up by cache_key (see DirectionsUtil).
+
+    The response is stored as its distance and duration, and its zlib compressed encoded polyline.
+    Distance lookups only read distance_meters, the polyline is only read to rebuild a full response.
+    Expired rows are never read and are purged by the purge_expired_directions task.
+    """
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     from_lat = models.FloatField()
@@ -19,13 +23,17 @@ class StoredDirections(models.Model):
     to_lat = models.FloatField()
     to_lon = models.FloatField()
 
-    directions_response = models.TextField()
+    # The quantized origin and destination, see DirectionsUtil.get_cache_key
+    cache_key = models.CharField(max_length=64, unique=True, null=True)
+
+    # None when there is no route between the points
+    distance_meters = models.PositiveIntegerField(null=True)
+
+    duration_seconds = models.PositiveIntegerField(null=True)
+
+    polyline = models.BinaryField(null=True)
 
-    created_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
 
-    def check_expired(self):
-        if self.created_at + datetime.timedelta(days=settings.GOOGLE_DIRECTIONS_EXPIRES_IN_DAYS) < timezone.now():
-            self.delete()
-            return True
-        
-        return False
\ No newline at end of file
+    def is_expired(self):
+        return self.created_at + datetime.timedelta(days=settings.GOOGLE_DIRECTIONS_EXPIRES_IN_DAYS) < timezone.now()
@@ -37,7 +37,15 @@ class TimeRegistration(models.Model):
     worker_signature = models.ImageField(upload_to=get_upload_path, null=True, blank=True)
     customer_signature = models.ImageField(upload_to=get_upload_path, null=True, blank=True)
 
-    def to_model_view(self):
+    def to_model_view(self, worker_view: dict = None):
+        """
+        Args:
+        worker_view (dict): An already serialized view of the worker, rendered with WorkerUtil when omitted.
+        """
+
+        if worker_view is None and self.worker:
+            worker_view = WorkerUtil.to_worker_view(self.worker)
+
         data = {
             k_id: self.id,
             k_start_time: FormattingUtil.to_timestamp(self.start_time),
@@ -45,7 +53,7 @@ class TimeRegistration(models.Model):
             k_break_time: FormattingUtil.to_timestamp(self.break_time),
             k_worker_signature:  MediaUtil.to_media_url(self.worker_signature.url) if self.worker_signature else None,
             k_customer_signature: MediaUtil.to_media_url(self.customer_signature.url) if self.customer_signature else None,
-            k_worker: WorkerUtil.to_worker_view(self.worker) if self.worker else None,
+            k_worker: worker_view,
         }
 
         return data
@@ -1,15 +1,17 @@
 import datetime
+import uuid
 
-import requests
 from apps.authentication.models import FavoriteAddress
 from apps.core.utils.formatters import FormattingUtil
+from apps.core.utils.http_client_util import HttpClientUtil
 from apps.core.utils.wire_names import *
 from apps.jobs.job_exceptions import JobNotFoundException
-from django.db.models import F, Q
+from django.db.models import F
 
-from apps.jobs.models.stored_directions import StoredDirections
 from apps.jobs.managers.job_manager import JobManager
 from apps.jobs.models import JobApplication, JobApplicationState, Job, JobState
+from apps.jobs.utils.application_util import ApplicationUtil
+from apps.jobs.utils.directions_cache_util import DirectionsCacheUtil
 from django.shortcuts import get_object_or_404
 
 from apps.authentication.utils.worker_util import WorkerUtil
@@ -34,7 +36,7 @@ class JobApplicationService:
     def approve_application(application_id):
         """
         Approves the job application if the worker's profile is 100% complete.
-        Also creates a Dimona declaration in Link2Prisma.
+        Also creates a Dimona declaration in Link2Prisma, see JobManager.approve_application.
 
         Args:
             application_id (int): The ID of the job application to approve.
@@ -42,11 +44,9 @@ class JobApplicationService:
         Raises:
             ValidationError: If the worker's profile is incomplete (less than 100%).
         """
-        from apps.legal.services.link2prisma_service import Link2PrismaService
-
         application = get_object_or_404(JobApplication, id=application_id)
         worker = application.worker
-        
+
         # Validate worker's profile before approval
         completion_data = WorkerUtil.calculate_worker_completion(worker)
         completion_percentage = completion_data[0]
@@ -58,115 +58,174 @@ class JobApplicationService:
                 f"Completion percentage: {completion_percentage}%. Missing fields: {', '.join(missing_fields)}"
             )
 
-        # If the profile is completed, proceed with approval
+        # If the profile is completed, proceed with approval, which also creates the Dimona declaration
         JobManager.approve_application(application)
         application.job.save()
         application.save()
 
-        # Create Dimona declaration in Link2Prisma
-        try:
-            Link2PrismaService.handle_job_approval(application)
-        except Exception as e:
-            # Log error but don't prevent approval
-            from apps.notifications.managers.notification_manager import NotificationManager
-            NotificationManager.notify_admin(
-                'Link2Prisma Job Approval Error',
-                f"Error creating Dimona declaration: {str(e)}"
-            )
-
     @staticmethod
     def deny_application(application_id):
         """
-        Denies the job application and cancels any existing Dimona declaration.
+        Denies the job application, JobManager.deny_application records the cancellation of any existing
+        Dimona declaration.
         """
-        from apps.legal.services.link2prisma_service import Link2PrismaService
-
         application = get_object_or_404(JobApplication, id=application_id)
-        old_state = application.application_state
-        
+
         JobManager.deny_application(application)
         application.job.save()
         application.save()
 
-        # If application was previously approved, cancel Dimona declaration
-        if old_state == JobApplicationState.approved:
+    @staticmethod
+    def update_applications(approve_ids, deny_ids):
+        """
+        Approves and denies many applications at once, e.g. to staff a whole job.
+
+        Every application is validated first, the valid ones then change state in a single transaction
+        recording their side effects, see JobManager.update_applications. Approvals fail when their job
+        is full once its lock is held.
+        Applications already in the requested state are left untouched.
+
+        Args:
+            approve_ids (list): The ids of the applications to approve.
+            deny_ids (list): The ids of the applications to deny.
+
+        Returns:
+            list: A result per requested application, in the order of the request.
+        """
+        requested = [(application_id, JobApplicationState.approved) for application_id in approve_ids]
+        requested += [(application_id, JobApplicationState.rejected) for application_id in deny_ids]
+
+        # Requested ids by their canonical form, ids that are not a UUID can never be found
+        valid_ids = {}
+
+        for application_id, _ in requested:
             try:
-                Link2PrismaService.handle_job_cancellation(application)
-            except Exception as e:
-                # Log error but don't prevent denial
-                from apps.notifications.managers.notification_manager import NotificationManager
-                NotificationManager.notify_admin(
-                    'Link2Prisma Job Cancellation Error',
-                    f"Error cancelling Dimona declaration: {str(e)}"
-                )
+                valid_ids[str(application_id)] = str(uuid.UUID(str(application_id)))
+            except ValueError:
+                pass
+
+        applications = {
+            str(application.id): application
+            for application in JobApplication.objects.filter(id__in=valid_ids.values()).select_related(
+                'job__address', 'job__customer__customer_profile', 'worker__worker_profile__worker_address',
+            )
+        }
+
+        results = []
+        approved, denied = [], []
+        seen = {}
+
+        for application_id, state in requested:
+            key = valid_ids.get(str(application_id), str(application_id))
+            application = applications.get(key)
+            error = None
+
+            if key in seen:
+                error = 'Application is listed more than once'
+            elif application is None:
+                error = 'Application not found'
+            elif application.application_state == state:
+                pass
+            elif state == JobApplicationState.rejected:
+                denied.append(application)
+            else:
+                completion_percentage, missing_fields = WorkerUtil.calculate_worker_completion(application.worker)
+
+                if completion_percentage < 100:
+                    error = 'Profile is incomplete, missing fields: {}'.format(', '.join(missing_fields))
+                else:
+                    approved.append(application)
+
+            result = {
+                k_id: application_id,
+                k_state: state if error is None else getattr(application, 'application_state', None),
+                k_success: error is None,
+                k_message: error,
+            }
+
+            seen.setdefault(key, result)
+            results.append(result)
+
+        if approved or denied:
+            updates = JobManager.update_applications(approved, denied)
+
+            # Approvals beyond the free spots of a job fail, the ones listed first are kept
+            for application in updates['over_capacity']:
+                seen[str(application.id)].update({
+                    k_state: application.application_state, k_success: False, k_message: 'Job is full',
+                })
+
+        return results
 
     @staticmethod
     def fetch_directions(lat, lon, to_lat, to_lon):
+        """
+        Returns the directions response of a route, see DirectionsCacheUtil for the cache layers in front of Google.
+        """
 
-        import json
+        return DirectionsCacheUtil.get_or_fetch(
+            lat, lon, to_lat, to_lon,
+            lambda: JobApplicationService.request_directions(lat, lon, to_lat, to_lon),
+        )
 
-        stored_directions = StoredDirections.objects.filter(
-            Q(from_lat=lat) & Q(from_lon=lon) & Q(to_lat=to_lat) & Q(to_lon=to_lon)
-        ).first()
+    @staticmethod
+    def request_directions(lat, lon, to_lat, to_lon):
+        """
+        Calls the Google Routes API, returning None when there is no route.
+        Raises when the API is unavailable, see DirectionsCacheUtil.get_or_fetch.
+        """
 
-        if stored_directions and not stored_directions.check_expired():
-            return stored_directions.directions_response
-        
-        else: 
-            from django.conf import settings
-            response = requests.post(
-                url='{}/directions/v2:computeRoutes'.format(settings.GOOGLE_ROUTES_URL),
-                headers={
-                    "X-Goog-Api-Key": settings.GOOGLE_API_KEY,
-                    "X-Goog-FieldMask": "routes.distanceMeters,routes.polyline",
-                },
-                json={
-                    "origin": {
-                        "location": {
-                            "latLng": {
-                                "latitude": lat,
-                                "longitude": lon
-                            }   
-                        }
-                    },
-                "destination": {
+        import json
+
+        from django.conf import settings
+        response = HttpClientUtil.request(
+            'google',
+            'POST',
+            url='{}/directions/v2:computeRoutes'.format(settings.GOOGLE_ROUTES_URL),
+            headers={
+                "X-Goog-Api-Key": settings.GOOGLE_API_KEY,
+                "X-Goog-FieldMask": "routes.distanceMeters,routes.duration,routes.polyline",
+            },
+            json={
+                "origin": {
                     "location": {
                         "latLng": {
-                            "latitude": to_lat,
-                            "longitude": to_lon,
+                            "latitude": lat,
+                            "longitude": lon
                         }
                     }
                 },
-                "travelMode": "DRIVE",
-                },
-            )
-
-            if response.ok:
-                directions_response = json.dumps(response.json())
+            "destination": {
+                "location": {
+                    "latLng": {
+                        "latitude": to_lat,
+                        "longitude": to_lon,
+                    }
+                }
+            },
+            "travelMode": "DRIVE",
+            },
+        )
 
-                StoredDirections(
-                    from_lat=lat,
-                    from_lon=lon,
-                    to_lat=to_lat,
-                    to_lon=to_lon,
-                    directions_response=directions_response
-                ).save()
+        if response.status_code == 429 or response.status_code >= 500:
+            response.raise_for_status()
 
-                return directions_response
-            else:
-                return None
+        if response.ok:
+            return json.dumps(response.json())
+        else:
+            return None
 
     @staticmethod
     def get_my_applications(user):
         
         applications = JobApplication.objects.filter(
-            job__job_state=JobState.pending,
+            job__job_state__in=[JobState.pending, JobState.fulfilled, JobState.ongoing],
             worker_id=user.id,
             job__archived=False).exclude(
                 job__worked_times__worker_id=user.id
             ).distinct()
 
-        return [application.to_model_view() for application in applications]
+        return ApplicationUtil.to_model_views(applications)
 
     @staticmethod
     def create_application(data, user):
@@ -210,7 +269,7 @@ class JobApplicationService:
         else:
             applications = JobApplication.objects.filter(
                 application_state=JobApplicationState.pending,
-                job__job_state=JobState.pending,
+                job__job_state__in=[JobState.pending, JobState.fulfilled],
                 job__selected_workers__lt=F('job__max_workers'),
                 job__archived=False
             ).order_by('job__start_time')
@@ -0,0 +1,215 @@
+import logging
+
+import requests
+from django.conf import settings
+
+from apps.core.utils.http_client_util import HttpClientUtil
+
+from apps.jobs.models import JobApplication
+from apps.jobs.utils.directions_cache_util import DirectionsCacheUtil
+from apps.jobs.utils.directions_util import DirectionsUtil
+from apps.jobs.utils.distance_estimator_util import DistanceEstimatorUtil
+
+logger = logging.getLogger(__name__)
+
+
+class DistanceService:
+    """
+    Computes the travel distances of job applications per job, with route matrix requests
+    instead of one directions request per application.
+    """
+
+    @staticmethod
+    def to_travel_distance(distance_meters) -> float:
+        # Workers are compensated for the trip to the job and back, in km
+        return (distance_meters / 1000) * 2
+
+    @staticmethod
+    def request_route_matrix(origins: list, destination: tuple, rate_limiter=None) -> list:
+        """
+        Requests the driving distances from many origins to one destination,
+        in chunks of at most settings.ROUTE_MATRIX_MAX_ELEMENTS origins.
+        Nothing is requested while the Routes API is backed off from, see DirectionsCacheUtil.
+
+        Args:
+        origins (list): (latitude, longitude) tuples.
+        destination (tuple): The (latitude, longitude) of the destination.
+        rate_limiter (RateLimiter): Paces the requests, when given.
+
+        Returns:
+        list: The distance in meters of every origin, None when there is no route or the request failed.
+        """
+
+        def to_waypoint(latitude, longitude):
+            return {'waypoint': {'location': {'latLng': {'latitude': latitude, 'longitude': longitude}}}}
+
+        distances = [None] * len(origins)
+        chunk_size = settings.ROUTE_MATRIX_MAX_ELEMENTS
+
+        for offset in range(0, len(origins), chunk_size):
+            if DirectionsCacheUtil.is_upstream_down():
+                break
+
+            chunk = origins[offset:offset + chunk_size]
+
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+
+            try:
+                response = HttpClientUtil.request(
+                    'google',
+                    'POST',
+                    url='{}/distanceMatrix/v2:computeRouteMatrix'.format(settings.GOOGLE_ROUTES_URL),
+                    headers={
+                        'X-Goog-Api-Key': settings.GOOGLE_API_KEY,
+                        'X-Goog-FieldMask': 'originIndex,distanceMeters,condition',
+                    },
+                    json={
+                        'origins': [to_waypoint(*origin) for origin in chunk],
+                        'destinations': [to_waypoint(*destination)],
+                        'travelMode': 'DRIVE',
+                    },
+                )
+            except requests.RequestException as e:
+                logger.warning('Route matrix request failed: {}'.format(e))
+                DirectionsCacheUtil.mark_upstream_down()
+                continue
+
+            if response.status_code == 429 or response.status_code >= 500:
+                logger.warning('Route matrix request failed with status {}'.format(response.status_code))
+                DirectionsCacheUtil.mark_upstream_down()
+                continue
+
+            if not response.ok:
+                logger.warning('Route matrix request failed with status {}'.format(response.status_code))
+                continue
+
+            for element in response.json():
+                if element.get('condition') != 'ROUTE_EXISTS':
+                    continue
+
+                # Zero values are left out of the response, the first origin has no originIndex
+                distances[offset + element.get('originIndex', 0)] = element.get('distanceMeters', 0)
+
+        return distances
+
+    @staticmethod
+    def prepare_job_distances(job, applications=None, recompute: bool = False) -> dict:
+        """
+        Collects the applications of a job that need a distance, grouped by origin,
+        and resolves the trips with stored directions in one query.
+
+        Args:
+        job (Job): The job, with its address.
+        applications (QuerySet): The applications to compute, all applications of the job by default.
+        recompute (bool): Whether to overwrite distances that are already set.
+
+        Returns:
+        dict: The applications, the destination, the origins by cache key, the stored distances by cache key
+        and the cache keys that still need a route (missing), see apply_job_distances.
+        """
+
+        destination = (job.address.latitude, job.address.longitude)
+
+        if None in destination:
+            return {'applications': [], 'destination': destination, 'origins': {}, 'distances': {}, 'missing': []}
+
+        if applications is None:
+            applications = JobApplication.objects.filter(job_id=job.id)
+
+        if not recompute:
+            applications = applications.filter(distance__isnull=True)
+
+        applications = list(applications.filter(
+            address__latitude__isnull=False,
+            address__longitude__isnull=False,
+        ).select_related('address'))
+
+        origins = {}
+
+        for application in applications:
+            origin = (application.address.latitude, application.address.longitude)
+            origins.setdefault(DirectionsUtil.get_cache_key(*origin, *destination), origin)
+
+        distances = DirectionsUtil.get_distances(origins.keys())
+
+        return {
+            'applications': applications,
+            'destination': destination,
+            'origins': origins,
+            'distances': distances,
+            'missing': [cache_key for cache_key in origins if cache_key not in distances],
+        }
+
+    @staticmethod
+    def apply_job_distances(plan: dict, fetched: list) -> list:
+        """
+        Sets the distances of the applications of a plan made by prepare_job_distances, without saving them.
+        Trips without a stored or fetched route get an estimated distance, see DistanceEstimatorUtil.
+
+        Args:
+        plan (dict): The plan of a job.
+        fetched (list): The distances in meters of the missing trips of the plan, see request_route_matrix.
+
+        Returns:
+        list: The updated applications.
+        """
+
+        origins, destination = plan['origins'], plan['destination']
+
+        distances = dict(plan['distances'])
+        distances.update((cache_key, meters) for cache_key, meters in zip(plan['missing'], fetched) if meters is not None)
+
+        unresolved = [cache_key for cache_key in origins if cache_key not in distances]
+        estimates = dict(zip(
+            unresolved,
+            DistanceEstimatorUtil.estimate([origins[cache_key] for cache_key in unresolved], destination),
+        ))
+
+        for application in plan['applications']:
+            cache_key = DirectionsUtil.get_cache_key(
+                application.address.latitude, application.address.longitude, *destination,
+            )
+
+            distance_meters = distances.get(cache_key)
+            application.distance_estimated = distance_meters is None
+
+            if distance_meters is None:
+                distance_meters = estimates[cache_key]
+
+            application.distance = DistanceService.to_travel_distance(float(distance_meters))
+
+        return plan['applications']
+
+    @staticmethod
+    def compute_job_distances(job, applications=None, recompute: bool = False) -> int:
+        """
+        Fills in the distances of the applications of a job.
+
+        Applications from the same place share one origin. Trips with stored directions are read in one query,
+        the others are resolved with route matrix requests, and all distances are written with one bulk update.
+        Trips the Routes API could not resolve get an estimated distance, see DistanceEstimatorUtil.
+
+        Args:
+        job (Job): The job, with its address.
+        applications (QuerySet): The applications to compute, all applications of the job by default.
+        recompute (bool): Whether to overwrite distances that are already set.
+
+        Returns:
+        int: The number of updated applications.
+        """
+
+        plan = DistanceService.prepare_job_distances(job, applications, recompute)
+
+        fetched = []
+
+        if plan['missing']:
+            fetched = DistanceService.request_route_matrix(
+                [plan['origins'][cache_key] for cache_key in plan['missing']], plan['destination'],
+            )
+
+        applications = DistanceService.apply_job_distances(plan, fetched)
+
+        JobApplication.objects.bulk_update(applications, ['distance', 'distance_estimated'], batch_size=500)
+
+        return len(applications)
@@ -1,15 +1,21 @@
-import datetime
+import numpy as np
 
 from apps.core.model_exceptions import DeserializationException
+from apps.core.utils.geo_index_util import GeoIndexUtil
+from apps.core.utils.geo_util import GeoUtil
+from apps.core.utils.count_util import CountUtil
 from apps.core.utils.formatters import FormattingUtil
+from apps.core.utils.pagination_util import PaginationUtil
 from apps.core.utils.wire_names import *
 from apps.jobs.managers.job_manager import JobManager
 from apps.jobs.models import Job, JobApplication, JobApplicationState, JobState, TimeRegistration
 from apps.jobs.utils.job_util import JobUtil
-from apps.notifications.managers.notification_manager import NotificationManager
+from apps.jobs.utils.job_feed_util import JobFeedUtil
+from apps.jobs.utils.application_util import ApplicationUtil
 from apps.notifications.models.mail_template import CancelledMailTemplate, TimeRegisteredTemplate
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import F, Q
+from apps.notifications.outbox import record_mail, record_user_notification
+from apps.legal.outbox import record_dimona_cancellation
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
@@ -26,36 +32,25 @@ class JobService:
 
     @staticmethod
     def delete_job(job_id):
-        from apps.legal.services.link2prisma_service import Link2PrismaService
-
         job = get_object_or_404(Job, id=job_id)
-        job.archived = True
-        job.selected_workers = 0
-        job.save(update_fields=['archived', 'selected_workers'])
 
-        # Get approved applications before changing their state
-        applications = JobApplication.objects.filter(job_id=job.id, application_state=JobApplicationState.approved)
-        
-        # Cancel Dimona declarations for all approved applications
-        for application in applications:
-            try:
-                Link2PrismaService.handle_job_cancellation(application)
-            except Exception as e:
-                # Log error but don't prevent job deletion
-                NotificationManager.notify_admin(
-                    'Link2Prisma Job Cancellation Error',
-                    f"Error cancelling Dimona declaration for job {job.id}, worker {application.worker.id}: {str(e)}"
-                )
-
-            NotificationManager.create_notification_for_user(
-                application.worker, 'Your job got cancelled!', application.job.title, send_mail=False, image_url=None
-            )
+        with transaction.atomic():
+            job.archived = True
+            job.selected_workers = 0
+            job.save(update_fields=['archived', 'selected_workers'])
 
-            CancelledMailTemplate().send(recipients=[{'Email': application.worker.email}],
-                                       data={"job_title": application.job.title,})
+            # Get approved applications before changing their state
+            applications = JobApplication.objects.filter(
+                job_id=job.id, application_state=JobApplicationState.approved,
+            ).select_related('worker')
 
-        # Update application states after handling Dimona cancellations
-        applications.update(application_state=JobApplicationState.rejected)
+            # Record the Dimona cancellations, mails and notifications, carried out once the job is archived
+            for application in applications:
+                record_dimona_cancellation(application)
+                record_user_notification(application.worker, 'Your job got cancelled!', job.title)
+                record_mail(CancelledMailTemplate, [{'Email': application.worker.email}], {"job_title": job.title,})
+
+            applications.update(application_state=JobApplicationState.rejected)
 
     @staticmethod
     def update_job(job_id, data):
@@ -171,42 +166,24 @@ class JobService:
         return job.id
 
     @staticmethod
-    def get_upcoming_jobs(user, is_worker=True, start=None, end=None):
+    def get_upcoming_jobs(user, is_worker=True, start=None, end=None, summary_fields=None,
+                          radius_km=None, sort_by_distance=False):
         now = timezone.now()
         
         if is_worker:
-            # Gets the current time
-            current_time = timezone.now()
-
-            # Query for upcoming jobs based on specified criteria
+            # Read the precomputed feed of jobs open to applications
             jobs = Job.objects.filter(
-                # The job must start in the future
-                start_time__gt=current_time,
-                # Ensure the application window is open
-                application_start_time__lte=current_time,
-                application_end_time__gte=current_time,
-                selected_workers__lt=F('max_workers'),
-                archived=False,
-                tag__in=user.worker_profile.tags.all(),
-            ).exclude(
-                # Exclude jobs with Pending or Approved applications from the user
-                jobapplication__worker=user,
-                jobapplication__application_state__in=[JobApplicationState.pending, JobApplicationState.approved],
-            ).exclude(
-                # Exclude jobs that overlap with an already approved job of the user
-                Q(
-                    jobapplication__job__start_time__lt=F('end_time'),
-                    jobapplication__job__end_time__gt=F('start_time'),
-                    jobapplication__application_state=JobApplicationState.approved,
-                    jobapplication__worker=user
-                )
-            ).distinct().order_by('start_time')
+                id__in=JobFeedUtil.get_worker_feed(user).values('job_id')
+            ).order_by('start_time', 'id')
+
+            if radius_km is not None or sort_by_distance:
+                return JobService.get_nearby_jobs(jobs, user, radius_km, sort_by_distance, summary_fields)
 
         else:
             if not start or not end:
                 jobs = Job.objects.filter(
                     start_time__gt=now,
-                    job_state=JobState.pending,
+                    job_state__in=[JobState.pending, JobState.fulfilled],
                     is_draft=False,
                     archived=False
                 ).order_by('start_time')
@@ -218,17 +195,80 @@ class JobService:
                     start = now
                 jobs = Job.objects.filter( 
                     start_time__range=[start, end],
-                    job_state=JobState.pending,
+                    job_state__in=[JobState.pending, JobState.fulfilled],
                     is_draft=False,
                     archived=False
                 ).order_by('start_time')
 
-        return [JobUtil.to_model_view(job) for job in jobs]
+        if summary_fields:
+            return JobUtil.to_summary_views(jobs, summary_fields)
+
+        return JobUtil.to_model_views(jobs)
     
+    @staticmethod
+    def get_nearby_jobs(jobs, worker, radius_km=None, sort_by_distance=False, summary_fields=None):
+        """
+        Adds the straight-line distance from the home address of the worker to job views,
+        optionally keeping only the jobs within a radius and ranking them by distance.
+
+        Jobs are prefiltered with the geohash index of their address, the exact distances of the candidates
+        are computed at once with GeoUtil.get_distances. Without a home address, the jobs are returned
+        in their own order without a distance.
+
+        Args:
+            jobs: Queryset of the jobs, in the order to keep for equal distances
+            worker: The worker to measure the distance from
+            radius_km: Maximum distance in km (default: None, no maximum)
+            sort_by_distance: Whether to rank the jobs by distance (default: False)
+            summary_fields: Summary keys to render summaries instead of full job views (default: None)
+
+        Returns:
+            list: The job views, with their distance in km
+        """
+        worker_profile = getattr(worker, 'worker_profile', None)
+        origin = worker_profile.worker_address if worker_profile is not None else None
+
+        if origin is None or origin.latitude is None or origin.longitude is None:
+            distances = {}
+            job_ids = list(jobs.values_list('id', flat=True))
+        else:
+            if radius_km is not None:
+                jobs = GeoIndexUtil.filter_within(jobs, origin.latitude, origin.longitude, radius_km, 'address__')
+
+            rows = list(jobs.values_list('id', 'address__latitude', 'address__longitude'))
+
+            located = [row for row in rows if row[1] is not None and row[2] is not None]
+
+            values = GeoUtil.get_distances(
+                origin.latitude, origin.longitude, [row[1] for row in located], [row[2] for row in located],
+            )
+
+            order = np.argsort(values, kind='stable') if sort_by_distance else np.arange(len(located))
+
+            if radius_km is not None:
+                order = order[values[order] <= radius_km]
+
+            distances = {located[i][0]: round(float(values[i]), 2) for i in order}
+
+            # Jobs without coordinates can only be listed, after the located ones, when no radius is set
+            job_ids = list(distances.keys())
+
+            if radius_km is None:
+                job_ids += [row[0] for row in rows if row[0] not in distances]
+
+        selected = Job.objects.filter(id__in=job_ids)
+
+        if summary_fields:
+            views = {view[k_id]: view for view in JobUtil.to_summary_views(selected, summary_fields)}
+        else:
+            views = {view[k_id]: view for view in JobUtil.to_model_views(selected)}
+
+        return [dict(views[job_id], **{k_distance: distances.get(job_id)}) for job_id in job_ids]
+
     @staticmethod
     def get_approved_jobs(user):
         return Job.objects.filter(
-            job_state=JobState.pending,
+            job_state__in=[JobState.pending, JobState.fulfilled],
             is_draft=False,
             archived=False,
             worker_id=user.id,
@@ -241,9 +281,9 @@ class JobService:
             job__start_time__gt=start,
             worker_id=user.id,
             application_state=JobApplicationState.approved
-        )[:50]
+        ).select_related('job')[:50]
 
-        return [JobUtil.to_model_view(application.job) for application in applications]
+        return JobUtil.to_model_views([application.job for application in applications])
 
     @staticmethod
     def get_jobs_based_on_user(worker_id=None, customer_id=None):
@@ -269,7 +309,7 @@ class JobService:
         else:
             jobs = Job.objects.all()[:50]
 
-        return [JobUtil.to_model_view(job) for job in jobs]
+        return JobUtil.to_model_views(jobs)
 
     @staticmethod
     def get_time_registrations(job_id):
@@ -306,16 +346,17 @@ class JobService:
             worker_signature=worker_signature,
             customer_signature=customer_signature,
         )
-        time_registration.save()
+        with transaction.atomic():
+            time_registration.save()
 
-        TimeRegisteredTemplate().send(recipients=[{'Email': job.customer.email}], 
-                                      data={"title": job.title, "interval": FormattingUtil.to_time_interval(start_time, end_time), "worker": user.get_full_name(),})
+            record_mail(TimeRegisteredTemplate, [{'Email': job.customer.email}],
+                        {"title": job.title, "interval": FormattingUtil.to_time_interval(start_time, end_time), "worker": user.get_full_name(),})
 
-        time_registration_count = TimeRegistration.objects.filter(job_id=job.id).count()
-        if time_registration_count >= job.selected_workers:
-            job.job_state = JobState.done
-            job.customer.save()
-            job.save()
+            time_registration_count = TimeRegistration.objects.filter(job_id=job.id).count()
+            if time_registration_count >= job.selected_workers:
+                job.job_state = JobState.done
+                job.customer.save()
+                job.save()
 
         return job.id
 
@@ -337,26 +378,23 @@ class JobService:
         return time_registration.id
 
     @staticmethod
-    def get_active_jobs():
+    def get_active_jobs(summary_fields=None):
+        # Jobs that started are moved to ongoing by JobStateUtil, started jobs it did not reach yet are included too
         jobs = Job.objects.filter(
-            job_state__in=[JobState.pending, JobState.fulfilled],
-            start_time__lt=datetime.datetime.utcnow(),
+            job_state__in=[JobState.pending, JobState.fulfilled, JobState.ongoing],
+            start_time__lt=timezone.now(),
+            selected_workers__gt=0,
             archived=False,
             is_draft=False
         ).order_by('start_time')[:50]
 
-        jobs_model_list = []
-        for job in jobs:
-            if job.archived or job.selected_workers == 0:
-                job.job_state = JobState.cancelled
-                job.save()
-                continue
-            jobs_model_list.append(JobUtil.to_model_view(job))
+        if summary_fields:
+            return JobUtil.to_summary_views(jobs, summary_fields)
 
-        return jobs_model_list
+        return JobUtil.to_model_views(jobs)
 
     @staticmethod
-    def get_done_jobs(start, end):
+    def get_done_jobs(start, end, summary_fields=None):
         if not start or not end:
             jobs = Job.objects.filter(
                 job_state__in=[JobState.done, JobState.cancelled],
@@ -369,78 +407,95 @@ class JobService:
                 start_time__range=[start, end]
             ).order_by('-start_time')[:50]
 
-        return [JobUtil.to_model_view(job) for job in jobs]
+        if summary_fields:
+            return JobUtil.to_summary_views(jobs, summary_fields)
+
+        return JobUtil.to_model_views(jobs)
 
     @staticmethod
     def get_draft_jobs():
         jobs = Job.objects.filter(is_draft=True, archived=False)[:50]
-        return [JobUtil.to_model_view(job) for job in jobs]
+        return JobUtil.to_model_views(jobs)
     
     @staticmethod
-    def get_washer_job_history(worker_id, page=1, per_page=25):
+    def get_washer_job_history(worker_id, page=1, per_page=25, cursor=None):
         """
         Get paginated list of all approved jobs for a washer that haven't been deleted.
         
         Args:
             worker_id: ID of the worker
-            page: Page number (default: 1)
+            page: Page number (default: 1), used when no cursor is given
             per_page: Number of items per page (default: 25)
+            cursor: Next cursor of the previous page (default: None)
             
         Returns:
             dict containing:
             - jobs: List of job model views
             - total: Total number of jobs
             - items_per_page: Number of items per page
+            - next_cursor: Cursor of the next page, None on the last page
+
+        Raises:
+            DeserializationException: When the cursor is malformed
         """
-        jobs = JobApplication.objects.filter(
+        applications = JobApplication.objects.filter(
             worker__id=worker_id,
             application_state=JobApplicationState.approved,
             job__archived=False,
-        ).order_by('-job__start_time').distinct()
-        
-        paginator = Paginator(jobs, per_page=per_page)
-        
-        try:
-            paginated_jobs = paginator.page(page)
-        except (EmptyPage, PageNotAnInteger):
-            paginated_jobs = paginator.page(1)
-            
+        )
+
+        paginated_applications, next_cursor = PaginationUtil.paginate(
+            applications.select_related(*ApplicationUtil.select_related_fields),
+            ['-job__start_time', '-id'],
+            per_page=per_page,
+            cursor=cursor,
+            page=page,
+        )
+
         return {
-            'applications': [job.to_model_view() for job in paginated_jobs],
-            'total': jobs.count(),
-            'items_per_page': per_page
+            'applications': ApplicationUtil.to_model_views(paginated_applications),
+            'total': CountUtil.get_total(applications),
+            'items_per_page': per_page,
+            'next_cursor': next_cursor,
         }
 
     @staticmethod
-    def get_customer_job_history(customer_id, page=1, per_page=25):
+    def get_customer_job_history(customer_id, page=1, per_page=25, cursor=None):
         """
         Get paginated list of all jobs (including future jobs) for a customer.
         
         Args:
             customer_id: ID of the customer
-            page: Page number (default: 1)
+            page: Page number (default: 1), used when no cursor is given
             per_page: Number of items per page (default: 25)
+            cursor: Next cursor of the previous page (default: None)
             
         Returns:
             dict containing:
             - jobs: List of job model views
             - total: Total number of jobs
             - items_per_page: Number of items per page
+            - next_cursor: Cursor of the next page, None on the last page
+
+        Raises:
+            DeserializationException: When the cursor is malformed
         """
         jobs = Job.objects.filter(
             customer_id=customer_id,
             archived=False
-        ).order_by('-start_time')
-        
-        paginator = Paginator(jobs, per_page=per_page)
-        
-        try:
-            paginated_jobs = paginator.page(page)
-        except (EmptyPage, PageNotAnInteger):
-            paginated_jobs = paginator.page(1)
-            
+        )
+
+        paginated_jobs, next_cursor = PaginationUtil.paginate(
+            jobs.select_related(*JobUtil.select_related_fields),
+            ['-start_time', '-id'],
+            per_page=per_page,
+            cursor=cursor,
+            page=page,
+        )
+
         return {
-            'jobs': [JobUtil.to_model_view(job) for job in paginated_jobs],
-            'total': jobs.count(),
-            'items_per_page': per_page
+            'jobs': JobUtil.to_model_views(paginated_jobs),
+            'total': CountUtil.get_total(jobs),
+            'items_per_page': per_page,
+            'next_cursor': next_cursor,
         }
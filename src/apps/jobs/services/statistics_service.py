@@ -3,7 +3,8 @@ from django.utils import timezone
 from datetime import date
 
 from apps.jobs.models import Job, JobApplicationState, JobState, TimeRegistration
-from django.db.models import Sum, F
+from django.db.models import Count, DurationField, Exists, ExpressionWrapper, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from apps.core.utils.wire_names import *
 from apps.jobs.models.application import JobApplication
 from apps.core.utils.formatters import FormattingUtil
@@ -27,13 +28,13 @@ class StatisticsService:
         ).aggregate(total_duration=Sum('duration'))['total_duration'] or timezone.timedelta()
 
         upcoming_hours = jobs.filter(
-            job_state=JobState.pending
+            job_state__in=[JobState.pending, JobState.fulfilled]
         ).annotate(
             duration=F('end_time') - F('start_time')
         ).aggregate(total_duration=Sum('duration'))['total_duration'] or timezone.timedelta()
 
         completed_jobs_count = jobs.filter(job_state=JobState.done).count()
-        upcoming_jobs_count = jobs.filter(job_state=JobState.pending).count()
+        upcoming_jobs_count = jobs.filter(job_state__in=[JobState.pending, JobState.fulfilled]).count()
 
         daily_hours = {}
         today = date.today()
@@ -52,7 +53,7 @@ class StatisticsService:
             if day > today:
                 upcoming_work = jobs.filter(
                     start_time__date=day,
-                    job_state=JobState.pending
+                    job_state__in=[JobState.pending, JobState.fulfilled]
                 ).annotate(
                     duration=F('end_time') - F('start_time')
                 ).aggregate(total_duration=Sum('duration'))['total_duration'] or timezone.timedelta()
@@ -93,7 +94,7 @@ class StatisticsService:
             )
 
             completed_jobs_year_count += jobs.filter(job_state=JobState.done).count()
-            upcoming_jobs_year_count += jobs.filter(job_state=JobState.pending).count()
+            upcoming_jobs_year_count += jobs.filter(job_state__in=[JobState.pending, JobState.fulfilled]).count()
 
             if month_start <= now:
                 worked_hours = TimeRegistration.objects.filter(
@@ -109,7 +110,7 @@ class StatisticsService:
 
             if month_start > now:
                 upcoming_hours = jobs.filter(
-                    job_state=JobState.pending
+                    job_state__in=[JobState.pending, JobState.fulfilled]
                 ).annotate(
                     duration=F('end_time') - F('start_time')
                 ).aggregate(total_duration=Sum('duration'))['total_duration'] or timezone.timedelta()
@@ -178,7 +179,7 @@ class StatisticsService:
         ).count()
 
         unserviced_jobs_count = jobs.filter(
-            job_state=JobState.pending,
+            job_state=JobState.cancelled,
             end_time__lte=timezone.now(),
         ).count()
 
@@ -202,6 +203,45 @@ class StatisticsService:
                 k_trend_hours_worked: trend_hours_worked,
         }
 
+    @staticmethod
+    def annotate_customer_directory(customers):
+        """
+        Annotates the job statistics of the customer directory, computed by the database
+        as correlated subqueries of the customers query itself.
+
+        Annotations:
+        has_active_job (bool): Whether the customer has a pending job that already started.
+        open_jobs_count (int): The number of pending, non archived jobs.
+        done_jobs_count (int): The number of done, non archived jobs.
+        done_duration (timedelta): The total duration of the done, non archived jobs, None without done jobs.
+
+        Args:
+        customers (QuerySet): The customers to annotate.
+
+        Returns:
+        QuerySet: The annotated customers.
+        """
+
+        jobs = Job.objects.filter(customer_id=OuterRef('pk'), archived=False).order_by().values('customer_id')
+
+        def count(*states):
+            return Coalesce(Subquery(jobs.filter(job_state__in=states).annotate(count=Count('id')).values('count')), 0)
+
+        done_duration = jobs.filter(job_state=JobState.done).annotate(
+            duration=Sum(ExpressionWrapper(F(k_end_time) - F(k_start_time), output_field=DurationField()))
+        ).values('duration')
+
+        return customers.annotate(
+            has_active_job=Exists(Job.objects.filter(
+                customer_id=OuterRef('pk'),
+                start_time__lt=timezone.now(),
+                job_state__in=[JobState.pending, JobState.fulfilled, JobState.ongoing],
+            )),
+            open_jobs_count=count(JobState.pending, JobState.fulfilled, JobState.ongoing),
+            done_jobs_count=count(JobState.done),
+            done_duration=Subquery(done_duration, output_field=DurationField()),
+        )
+
     @staticmethod
     def get_customer_hours(customer_id: str):
 
@@ -223,7 +263,7 @@ class StatisticsService:
     @staticmethod
     def calculate_trend_job_count(start, end):
         return Job.objects.filter(
-            job_state__in=[JobState.pending, JobState.done],
+            job_state__in=[JobState.pending, JobState.fulfilled, JobState.ongoing, JobState.done],
             start_time__range=(
                 start - (end - start),
                 start,
@@ -0,0 +1,108 @@
+"""
+Keeps the job view cache (see JobCacheUtil) in sync with every model that is rendered inside a job view,
+and the upcoming jobs feed (see JobFeedUtil) in sync with the jobs.
+
+Related models only invalidate the jobs that actually render them. Newly created addresses, tags and users
+cannot be referenced by an existing job yet, so their creation is ignored. Addresses and tags are
+invalidated before deletion, while the references to them still exist.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.authentication.models import CustomerProfile, WorkerProfile
+from apps.core.models.geo import Address
+from apps.jobs.models import Job, Tag, TimeRegistration
+from apps.jobs.utils.job_cache_util import JobCacheUtil
+from apps.jobs.utils.job_feed_util import JobFeedUtil
+
+User = get_user_model()
+
+# User fields that are part of the customer and worker views
+RENDERED_USER_FIELDS = {'first_name', 'last_name', 'email', 'date_joined', 'phone_number', 'profile_picture'}
+
+
+def invalidate_jobs(query: Q) -> None:
+    JobCacheUtil.invalidate(Job.objects.filter(query).values_list('id', flat=True).distinct())
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job(sender, instance: Job, **kwargs):
+    JobCacheUtil.invalidate([instance.id])
+
+
+@receiver(post_save, sender=Job)
+def sync_job_feed(sender, instance: Job, **kwargs):
+    # Deleted jobs, and jobs losing their tag, drop their feed entry through its cascading foreign keys
+    JobFeedUtil.sync_jobs([instance.id])
+
+
+@receiver(post_save, sender=TimeRegistration)
+@receiver(post_delete, sender=TimeRegistration)
+def invalidate_time_registration_job(sender, instance: TimeRegistration, **kwargs):
+    JobCacheUtil.invalidate([instance.job_id])
+
+
+@receiver(post_save, sender=Address)
+@receiver(pre_delete, sender=Address)
+def invalidate_address_jobs(sender, instance: Address, created: bool = False, **kwargs):
+    if created:
+        return
+
+    invalidate_jobs(
+        Q(address_id=instance.id)
+        | Q(customer__customer_profile__customer_address_id=instance.id)
+        | Q(customer__customer_profile__customer_billing_address_id=instance.id)
+        | Q(worked_times__worker__worker_profile__worker_address_id=instance.id)
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def invalidate_tag_jobs(sender, instance: Tag, created: bool = False, **kwargs):
+    if created:
+        return
+
+    invalidate_jobs(
+        Q(tag_id=instance.id)
+        | Q(customer__customer_profile__tag_id=instance.id)
+        | Q(worked_times__worker__worker_profile__tags__id=instance.id)
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_jobs(sender, instance: User, created: bool = False, update_fields=None, **kwargs):
+    if created:
+        return
+
+    if update_fields is not None and not RENDERED_USER_FIELDS.intersection(update_fields):
+        return
+
+    invalidate_jobs(Q(customer_id=instance.id) | Q(worked_times__worker_id=instance.id))
+
+
+@receiver(post_save, sender=CustomerProfile)
+@receiver(post_delete, sender=CustomerProfile)
+def invalidate_customer_profile_jobs(sender, instance: CustomerProfile, **kwargs):
+    invalidate_jobs(Q(customer_id=instance.user_id))
+
+
+@receiver(post_save, sender=WorkerProfile)
+@receiver(post_delete, sender=WorkerProfile)
+def invalidate_worker_profile_jobs(sender, instance: WorkerProfile, **kwargs):
+    invalidate_jobs(Q(worked_times__worker_id=instance.user_id))
+
+
+@receiver(m2m_changed, sender=WorkerProfile.tags.through)
+def invalidate_worker_tag_jobs(sender, instance, action: str, reverse: bool, pk_set=None, **kwargs):
+    if reverse:
+        # A tag changed its worker profiles; pk_set holds worker profile ids, except when clearing
+        if action == 'pre_clear':
+            invalidate_jobs(Q(worked_times__worker__worker_profile__tags__id=instance.id))
+        elif action in ('post_add', 'post_remove'):
+            invalidate_jobs(Q(worked_times__worker__worker_profile__id__in=pk_set))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_jobs(Q(worked_times__worker_id=instance.user_id))
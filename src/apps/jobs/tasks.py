@@ -0,0 +1,87 @@
+from celery import shared_task
+
+from apps.jobs.utils.directions_util import DirectionsUtil
+
+
+@shared_task
+def purge_expired_directions():
+    """
+    Daily task deleting the expired StoredDirections.
+    """
+
+    return {'deleted': DirectionsUtil.purge_expired()}
+
+
+@shared_task
+def fit_detour_factors():
+    """
+    Daily task refitting the detour factors of the distance estimator from the stored directions.
+    """
+
+    from apps.jobs.utils.distance_estimator_util import DistanceEstimatorUtil
+
+    return {'regions': len(DistanceEstimatorUtil.fit())}
+
+
+@shared_task
+def refine_estimated_distances(max_jobs: int = 100):
+    """
+    Hourly task replacing estimated application distances with real routes, for the jobs starting first.
+    Skipped while the Routes API is backed off from.
+    """
+
+    from apps.jobs.models import Job, JobApplication
+    from apps.jobs.services.distance_service import DistanceService
+    from apps.jobs.utils.directions_cache_util import DirectionsCacheUtil
+
+    estimated = JobApplication.objects.filter(distance_estimated=True)
+
+    jobs = Job.objects.filter(id__in=estimated.values('job_id')).select_related('address').order_by('start_time')
+
+    refined = 0
+
+    for job in jobs[:max_jobs]:
+        if DirectionsCacheUtil.is_upstream_down():
+            break
+
+        job_applications = estimated.filter(job_id=job.id)
+        count = job_applications.count()
+
+        DistanceService.compute_job_distances(job, applications=job_applications, recompute=True)
+
+        refined += count - job_applications.count()
+
+    return {'refined': refined}
+
+
+@shared_task
+def transition_job_states(dry_run: bool = False):
+    """
+    Task run every few minutes moving jobs through their lifecycle (see JobStateUtil).
+    """
+
+    from apps.jobs.utils.job_state_util import JobStateUtil
+
+    return JobStateUtil.transition(dry_run=dry_run)
+
+
+@shared_task
+def run_approval_stage(application_id: str, stage: str):
+    """
+    Runs a stage of the approval pipeline of an application and queues what comes next (see ApprovalPipelineUtil).
+    """
+
+    from apps.jobs.utils.approval_pipeline_util import ApprovalPipelineUtil
+
+    return ApprovalPipelineUtil.run(application_id, stage)
+
+
+@shared_task
+def resume_approval_pipelines():
+    """
+    Task run every ten minutes queueing the approval pipelines that stopped moving.
+    """
+
+    from apps.jobs.utils.approval_pipeline_util import ApprovalPipelineUtil
+
+    return {'resumed': ApprovalPipelineUtil.resume()}
@@ -0,0 +1,89 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from apps.core.utils.geo_util import GeoUtil
+
+
+class FakeRoutesServer:
+    """
+    A local stand-in for the Google Routes API, answering with straight-line distances.
+
+    Use it as a context manager and point settings.GOOGLE_ROUTES_URL at its url.
+    Every request body is recorded in requests by path.
+    """
+
+    def __init__(self):
+        self.requests = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                server.requests.append((self.path, body))
+
+                if self.path == '/distanceMatrix/v2:computeRouteMatrix':
+                    payload = server.compute_route_matrix(body)
+                elif self.path == '/directions/v2:computeRoutes':
+                    payload = server.compute_routes(body)
+                else:
+                    self.send_error(404)
+                    return
+
+                data = json.dumps(payload).encode()
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+
+    @property
+    def url(self) -> str:
+        return 'http://127.0.0.1:{}'.format(self.httpd.server_port)
+
+    @staticmethod
+    def get_distance_meters(origin: dict, destination: dict) -> int:
+        origin, destination = origin['location']['latLng'], destination['location']['latLng']
+
+        return round(GeoUtil.get_distance(
+            origin['latitude'], origin['longitude'], destination['latitude'], destination['longitude'],
+        ) * 1000)
+
+    def compute_route_matrix(self, body: dict) -> list:
+        elements = []
+
+        for origin_index, origin in enumerate(body['origins']):
+            for destination_index, destination in enumerate(body['destinations']):
+                element = {
+                    'distanceMeters': self.get_distance_meters(origin['waypoint'], destination['waypoint']),
+                    'condition': 'ROUTE_EXISTS',
+                }
+
+                # Like the real API, zero indexes are left out
+                if origin_index:
+                    element['originIndex'] = origin_index
+                if destination_index:
+                    element['destinationIndex'] = destination_index
+
+                elements.append(element)
+
+        return elements
+
+    def compute_routes(self, body: dict) -> dict:
+        return {'routes': [{'distanceMeters': self.get_distance_meters(body['origin'], body['destination'])}]}
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,106 @@
+import datetime
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.core.models.geo import Address
+from apps.jobs.models import Job, JobApplication
+from apps.jobs.tests.fake_routes_server import FakeRoutesServer
+
+User = get_user_model()
+
+
+class RecalculateDistancesCommandTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        customer = User.objects.create_user(username='customer', email='customer@werkr.be')
+        now = timezone.now()
+
+        applications = []
+
+        for index in range(3):
+            job = Job.objects.create(
+                customer=customer,
+                address=Address.objects.create(city='Gent', latitude=51.05, longitude=3.72 + index / 100),
+                start_time=now + datetime.timedelta(days=index),
+                end_time=now + datetime.timedelta(days=index, hours=4),
+            )
+
+            for worker_index in range(4):
+                worker = User.objects.create_user(
+                    username='worker{}{}'.format(index, worker_index), email='w{}{}@werkr.be'.format(index, worker_index),
+                )
+                applications.append(JobApplication(
+                    job=job,
+                    worker=worker,
+                    address=Address.objects.create(city='Brussel', latitude=50.85 + worker_index / 100, longitude=4.35),
+                    created_at=now,
+                    modified_at=now,
+                ))
+
+        JobApplication.objects.bulk_create(applications)
+
+        self.job_ids = sorted(str(job_id) for job_id in Job.objects.values_list('id', flat=True))
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+
+    def call(self, *args):
+        out = StringIO()
+
+        with FakeRoutesServer() as server, self.settings(GOOGLE_ROUTES_URL=server.url):
+            call_command('recalculate_distances', '--checkpoint', self.checkpoint, '--batch-size', '1', *args, stdout=out)
+
+        return server, out.getvalue()
+
+    def test_resumes_from_checkpoint(self):
+        # An earlier run with --missing-only got through the first two jobs
+        with open(self.checkpoint, 'w') as file:
+            json.dump({
+                'signature': self.get_signature(),
+                'last_job_id': self.job_ids[1],
+                'jobs': 2,
+                'applications': 8,
+                'estimated': 0,
+            }, file)
+
+        server, out = self.call('--missing-only')
+
+        self.assertEqual(len(server.requests), 1)
+        self.assertIn('Jobs: 3, Applications: 12', out)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+        distances = JobApplication.objects.filter(distance__isnull=False).values_list('job_id', flat=True)
+
+        self.assertEqual({str(job_id) for job_id in distances}, {self.job_ids[2]})
+
+    def test_ignores_checkpoint_of_other_filters(self):
+        with open(self.checkpoint, 'w') as file:
+            json.dump({'signature': self.get_signature(), 'last_job_id': self.job_ids[2]}, file)
+
+        server, out = self.call('--job', self.job_ids[0])
+
+        self.assertIn('Ignoring checkpoint', out)
+        self.assertEqual(JobApplication.objects.filter(distance__isnull=False).count(), 4)
+
+    def test_filters_and_throughput(self):
+        server, out = self.call('--worker', str(User.objects.get(username='worker10').id))
+
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(JobApplication.objects.filter(distance__isnull=False).count(), 1)
+        self.assertIn('applications/s', out)
+        self.assertIn('with 1 route requests', out)
+
+    def get_signature(self):
+        from apps.jobs.management.commands.recalculate_distances import Command
+
+        return Command().get_signature({
+            'start': None, 'end': None, 'jobs': [], 'workers': [], 'states': [], 'missing_only': True,
+        })
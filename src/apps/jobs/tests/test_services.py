@@ -1,12 +1,31 @@
 # file: src/apps/jobs/tests/test_job_application_service.py
 
 from unittest.mock import patch, MagicMock
+from apps.jobs.managers.job_manager import JobManager
 from apps.jobs.services.contract_service import JobApplicationService
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 import datetime
 from apps.jobs.services.statistics_service import StatisticsService
+from apps.jobs.services.distance_service import DistanceService
 from apps.jobs.services.job_service import JobService
-from apps.jobs.models import Job, JobApplication, JobApplicationState, JobState, TimeRegistration
+from apps.jobs.tests.fake_routes_server import FakeRoutesServer
+from apps.jobs.tasks import refine_estimated_distances
+from apps.jobs.utils.directions_cache_util import DirectionsCacheUtil
+from apps.jobs.utils.approval_pipeline_util import ApprovalPipelineUtil
+from apps.jobs.utils.directions_util import DirectionsUtil
+from apps.jobs.models import (
+    ApprovalStage, ApprovalStageState, Dimona, Job, JobApplication, JobApplicationState, JobState, TimeRegistration,
+)
+from apps.authentication.models import WorkerProfile
+from apps.core.models import OutboxEvent
+from apps.core.models.geo import Address
+from apps.core.utils.wire_names import *
+from apps.core.utils.geo_util import GeoUtil
+
+User = get_user_model()
 
 
 class JobApplicationServiceTest(TestCase):
@@ -164,6 +183,281 @@ class StatisticsServiceTest(TestCase):
         self.assertEqual(result['monthly_stats']['Jan']['total_upcoming_hours'], 5)
 
 
+class CustomerDirectoryTest(TestCase):
+
+    def setUp(self):
+        self.customer = User.objects.create_user(username='customer', email='customer@werkr.be')
+        self.other_customer = User.objects.create_user(username='other', email='other@werkr.be')
+
+        now = timezone.now()
+
+        for state, start, hours in [
+            (JobState.pending, now - datetime.timedelta(hours=1), 2),
+            (JobState.pending, now + datetime.timedelta(days=1), 2),
+            (JobState.done, now - datetime.timedelta(days=2), 3),
+            (JobState.done, now - datetime.timedelta(days=3), 26),
+        ]:
+            Job.objects.create(
+                customer=self.customer,
+                address=Address.objects.create(city='Gent'),
+                job_state=state,
+                start_time=start,
+                end_time=start + datetime.timedelta(hours=hours),
+            )
+
+    def test_annotate_customer_directory(self):
+        customers = StatisticsService.annotate_customer_directory(User.objects.order_by('username'))
+
+        with self.assertNumQueries(1):
+            customer, other_customer = list(customers)
+
+        self.assertTrue(customer.has_active_job)
+        self.assertEqual(customer.open_jobs_count, 2)
+        self.assertEqual(customer.done_jobs_count, 2)
+        self.assertEqual(customer.done_duration, datetime.timedelta(hours=29))
+
+        self.assertFalse(other_customer.has_active_job)
+        self.assertEqual(other_customer.open_jobs_count, 0)
+        self.assertIsNone(other_customer.done_duration)
+
+
+class DistanceServiceTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        customer = User.objects.create_user(username='customer', email='customer@werkr.be')
+        now = timezone.now()
+
+        self.job = Job.objects.create(
+            customer=customer,
+            address=Address.objects.create(city='Gent', latitude=51.05, longitude=3.72),
+            start_time=now + datetime.timedelta(days=1),
+            end_time=now + datetime.timedelta(days=1, hours=4),
+        )
+
+        applications = []
+
+        for index in range(80):
+            worker = User.objects.create_user(username='worker{}'.format(index), email='w{}@werkr.be'.format(index))
+            applications.append(JobApplication(
+                job=self.job,
+                worker=worker,
+                # Every other applicant lives at the same place
+                address=Address.objects.create(city='Brussel', latitude=50.8 + (index // 2) / 100, longitude=4.35),
+                created_at=now,
+                modified_at=now,
+            ))
+
+        # Bulk creation skips the distance lookup of JobApplication.save
+        JobApplication.objects.bulk_create(applications)
+
+    @override_settings(ROUTE_MATRIX_MAX_ELEMENTS=25)
+    def test_compute_job_distances(self):
+        # One of the trips is already stored
+        DirectionsUtil.store(50.8, 4.35, 51.05, 3.72, '{"routes": [{"distanceMeters": 60000}]}')
+
+        with FakeRoutesServer() as server, self.settings(GOOGLE_ROUTES_URL=server.url):
+            self.assertEqual(DistanceService.compute_job_distances(self.job), 80)
+
+        # 39 remaining origins in chunks of 25
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual([len(body['origins']) for _, body in server.requests], [25, 14])
+
+        distances = dict(JobApplication.objects.values_list('address__latitude', 'distance'))
+
+        self.assertEqual(distances[50.8], 120)
+        self.assertAlmostEqual(distances[51.0], 2 * GeoUtil.get_distance(51.0, 4.35, 51.05, 3.72), delta=0.01)
+
+        # Applications with a distance are left alone
+        with FakeRoutesServer() as server, self.settings(GOOGLE_ROUTES_URL=server.url):
+            self.assertEqual(DistanceService.compute_job_distances(self.job), 0)
+
+        self.assertEqual(server.requests, [])
+
+    def test_estimates_while_upstream_is_down(self):
+        DirectionsCacheUtil.mark_upstream_down()
+
+        with FakeRoutesServer() as server, self.settings(GOOGLE_ROUTES_URL=server.url):
+            self.assertEqual(DistanceService.compute_job_distances(self.job), 80)
+
+        self.assertEqual(server.requests, [])
+        self.assertEqual(JobApplication.objects.filter(distance_estimated=True).count(), 80)
+
+        application = JobApplication.objects.select_related('address').first()
+        straight_distance = 2 * GeoUtil.get_distance(application.address.latitude, 4.35, 51.05, 3.72)
+
+        self.assertAlmostEqual(application.distance, straight_distance * 1.3, delta=0.01)
+
+        # Estimates are refined with real routes once the backoff expired
+        cache.clear()
+
+        with FakeRoutesServer() as server, self.settings(GOOGLE_ROUTES_URL=server.url):
+            self.assertEqual(refine_estimated_distances(), {'refined': 80})
+
+        self.assertEqual(len(server.requests), 1)
+        self.assertFalse(JobApplication.objects.filter(distance_estimated=True).exists())
+
+
+class UpdateApplicationsTest(TestCase):
+
+    def setUp(self):
+        customer = User.objects.create_user(username='customer', email='customer@werkr.be')
+        now = timezone.now()
+
+        self.job = Job.objects.create(
+            customer=customer,
+            address=Address.objects.create(city='Gent', latitude=51.05, longitude=3.72),
+            start_time=now + datetime.timedelta(days=1),
+            end_time=now + datetime.timedelta(days=1, hours=4),
+            max_workers=2,
+            selected_workers=0,
+        )
+
+        applications = []
+
+        for index in range(5):
+            worker = User.objects.create_user(username='worker{}'.format(index), email='w{}@werkr.be'.format(index))
+            address = Address.objects.create(city='Brussel', latitude=50.85, longitude=4.35)
+
+            # The last worker did not complete their profile
+            WorkerProfile.objects.create(
+                user=worker,
+                worker_address=address,
+                iban='BE68539007547034',
+                ssn='85073003328' if index < 4 else None,
+                date_of_birth=datetime.date(2000, 1, 1),
+            )
+
+            applications.append(JobApplication(
+                job=self.job,
+                worker=worker,
+                address=address,
+                application_state=JobApplicationState.pending,
+                distance=10.0,
+                created_at=now,
+                modified_at=now,
+            ))
+
+        # Bulk creation skips the distance lookup of JobApplication.save
+        self.applications = JobApplication.objects.bulk_create(applications)
+
+    def test_update_applications(self):
+        first, second, third, fourth, incomplete = self.applications
+
+        results = JobApplicationService.update_applications(
+            [first.id, second.id, third.id, incomplete.id, 'unknown'], [fourth.id, first.id],
+        )
+
+        self.assertEqual([result[k_success] for result in results], [True, True, False, False, False, True, False])
+        self.assertEqual(results[2][k_message], 'Job is full')
+        self.assertTrue(results[3][k_message].startswith('Profile is incomplete'))
+        self.assertEqual(results[4][k_message], 'Application not found')
+        self.assertEqual(results[6][k_message], 'Application is listed more than once')
+
+        states = dict(JobApplication.objects.values_list('id', 'application_state'))
+
+        self.assertEqual(
+            [states[application.id] for application in self.applications],
+            [JobApplicationState.approved] * 2 + [JobApplicationState.rejected] * 3,
+        )
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.selected_workers, 2)
+
+        # The approved applications continue in their approval pipeline
+        self.assertEqual(
+            set(ApprovalStage.objects.values_list('application_id', flat=True)), {first.id, second.id},
+        )
+        # The denied application and the two left pending when the job got full are told through the outbox
+        self.assertEqual(
+            OutboxEvent.objects.filter(channel='mail', payload__template__endswith='DeniedMailTemplate').count(), 3,
+        )
+        self.assertEqual(OutboxEvent.objects.filter(channel='push').count(), 3)
+
+    def test_update_applications_counts_under_lock(self):
+        first, second, third = self.applications[:3]
+
+        # Approved concurrently, after the bulk update was validated
+        JobApplication.objects.filter(id=first.id).update(application_state=JobApplicationState.approved)
+
+        updates = JobManager.update_applications([second, third], [])
+
+        self.assertEqual(updates['over_capacity'], [third])
+        self.assertEqual(
+            JobApplication.objects.filter(job=self.job, application_state=JobApplicationState.approved).count(), 2,
+        )
+
+    @patch('apps.jobs.utils.approval_pipeline_util.ApprovalPipelineUtil.enqueue')
+    @patch('apps.legal.utils.contract_util.ContractUtil.generate_contract')
+    @patch('apps.jobs.managers.job_manager.JobManager._notify_approved_worker')
+    @patch('apps.legal.services.link2prisma_service.Link2PrismaService.handle_job_approval')
+    def test_approval_pipeline(self, mock_approval, mock_notify, mock_contract, mock_enqueue):
+        application = self.applications[0]
+        mock_approval.side_effect = [False, True]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            JobApplicationService.approve_application(application.id)
+
+        mock_enqueue.assert_called_once_with(str(application.id), 'dimona')
+
+        # The Dimona declaration fails once and is retried later
+        self.assertEqual(ApprovalPipelineUtil.run(str(application.id), 'dimona'), ApprovalStageState.pending)
+        mock_enqueue.assert_called_with(str(application.id), 'dimona', countdown=30)
+
+        for stage in ['dimona', 'contract', 'notifications']:
+            self.assertEqual(ApprovalPipelineUtil.run(str(application.id), stage), ApprovalStageState.done)
+
+        # Finished stages are never run again
+        self.assertIsNone(ApprovalPipelineUtil.run(str(application.id), 'contract'))
+
+        self.assertEqual(mock_approval.call_count, 2)
+        mock_contract.assert_called_once()
+        mock_notify.assert_called_once()
+
+        status = ApprovalPipelineUtil.get_status(JobApplication.objects.get(id=application.id))
+
+        self.assertEqual(status[k_state], JobApplicationState.approved)
+        self.assertEqual(
+            [(stage[k_name], stage[k_state], stage[k_attempts]) for stage in status[k_stages]],
+            [('dimona', 'done', 2), ('contract', 'done', 1), ('notifications', 'done', 1)],
+        )
+
+
+    @patch('apps.core.utils.outbox_util.OutboxUtil.kick')
+    @patch('apps.jobs.utils.approval_pipeline_util.ApprovalPipelineUtil.enqueue')
+    @patch('apps.legal.utils.contract_util.ContractUtil.generate_contract')
+    @patch('apps.jobs.managers.job_manager.JobManager._notify_approved_worker')
+    @patch('apps.legal.services.link2prisma_service.Link2PrismaService.handle_job_approval')
+    def test_approval_pipeline_after_denial(self, mock_approval, mock_notify, mock_contract, mock_enqueue, mock_kick):
+        application = self.applications[0]
+
+        def declare(declared):
+            Dimona.objects.create(id='dimona-{}'.format(mock_approval.call_count), application=declared)
+            return True
+
+        mock_approval.side_effect = declare
+
+        def approve():
+            with self.captureOnCommitCallbacks(execute=True):
+                JobApplicationService.approve_application(application.id)
+
+            for stage in ApprovalPipelineUtil.get_names():
+                self.assertEqual(ApprovalPipelineUtil.run(str(application.id), stage), ApprovalStageState.done)
+
+        approve()
+
+        JobApplicationService.deny_application(application.id)
+        Dimona.objects.update(success=False, reason=Dimona.cancelled_reason)
+
+        # Approved again, the whole pipeline runs again with a new declaration
+        approve()
+
+        self.assertEqual(mock_approval.call_count, 2)
+        self.assertEqual(mock_contract.call_count, 2)
+        self.assertEqual(mock_notify.call_count, 2)
+        self.assertEqual(list(ApprovalStage.objects.values_list('attempts', flat=True).distinct()), [1])
+
+
 class JobServiceTest(TestCase):
 
     @patch('apps.jobs.services.job_service.get_object_or_404')
@@ -180,13 +474,16 @@ class JobServiceTest(TestCase):
 
     @patch('apps.jobs.services.job_service.get_object_or_404')
     @patch('apps.jobs.services.job_service.JobApplication.objects.filter')
-    @patch('apps.jobs.services.job_service.NotificationManager.create_notification_for_user')
-    @patch('apps.jobs.services.job_service.CancelledMailTemplate.send')
-    def test_delete_job(self, mock_send, mock_create_notification, mock_filter, mock_get_object_or_404):
+    @patch('apps.jobs.services.job_service.record_dimona_cancellation')
+    @patch('apps.jobs.services.job_service.record_user_notification')
+    @patch('apps.jobs.services.job_service.record_mail')
+    def test_delete_job(self, mock_record_mail, mock_record_notification, mock_record_cancellation, mock_filter,
+                        mock_get_object_or_404):
         mock_job = MagicMock()
         mock_get_object_or_404.return_value = mock_job
         mock_application = MagicMock()
-        mock_filter.return_value = [mock_application]
+        mock_applications = mock_filter.return_value.select_related.return_value
+        mock_applications.__iter__.return_value = iter([mock_application])
 
         JobService.delete_job('job_id')
         mock_get_object_or_404.assert_called_once_with(Job, id='job_id')
@@ -194,9 +491,10 @@ class JobServiceTest(TestCase):
         self.assertEqual(mock_job.selected_workers, 0)
         mock_job.save.assert_called_once_with(update_fields=['archived', 'selected_workers'])
         mock_filter.assert_called_once_with(job_id=mock_job.id, application_state=JobApplicationState.approved)
-        mock_application.save.assert_called_once()
-        mock_create_notification.assert_called_once()
-        mock_send.assert_called_once()
+        mock_applications.update.assert_called_once_with(application_state=JobApplicationState.rejected)
+        mock_record_cancellation.assert_called_once_with(mock_application)
+        mock_record_notification.assert_called_once()
+        mock_record_mail.assert_called_once()
 
     @patch('apps.jobs.services.job_service.get_object_or_404')
     @patch('apps.jobs.services.job_service.FormattingUtil')
@@ -229,40 +527,40 @@ class JobServiceTest(TestCase):
         mock_create.assert_called_once()
 
     @patch('apps.jobs.services.job_service.Job.objects.filter')
-    @patch('apps.jobs.services.job_service.JobUtil.to_model_view')
-    def test_get_upcoming_jobs(self, mock_to_model_view, mock_filter):
+    @patch('apps.jobs.services.job_service.JobUtil.to_model_views')
+    def test_get_upcoming_jobs(self, mock_to_model_views, mock_filter):
         mock_job = MagicMock()
         mock_filter.return_value = [mock_job]
-        mock_to_model_view.return_value = {'id': 'job_id'}
+        mock_to_model_views.return_value = [{'id': 'job_id'}]
 
         result = JobService.get_upcoming_jobs(MagicMock())
         self.assertEqual(result, [{'id': 'job_id'}])
         mock_filter.assert_called_once()
-        mock_to_model_view.assert_called_once_with(mock_job)
+        mock_to_model_views.assert_called_once_with(mock_filter.return_value)
 
     @patch('apps.jobs.services.job_service.JobApplication.objects.filter')
-    @patch('apps.jobs.services.job_service.JobUtil.to_model_view')
-    def test_get_history_jobs(self, mock_to_model_view, mock_filter):
+    @patch('apps.jobs.services.job_service.JobUtil.to_model_views')
+    def test_get_history_jobs(self, mock_to_model_views, mock_filter):
         mock_application = MagicMock()
-        mock_filter.return_value = [mock_application]
-        mock_to_model_view.return_value = {'id': 'job_id'}
+        mock_filter.return_value.select_related.return_value = [mock_application]
+        mock_to_model_views.return_value = [{'id': 'job_id'}]
 
         result = JobService.get_history_jobs(MagicMock(), datetime.datetime.now(), datetime.datetime.now())
         self.assertEqual(result, [{'id': 'job_id'}])
         mock_filter.assert_called_once()
-        mock_to_model_view.assert_called_once_with(mock_application.job)
+        mock_to_model_views.assert_called_once_with([mock_application.job])
 
     @patch('apps.jobs.services.job_service.Job.objects.filter')
-    @patch('apps.jobs.services.job_service.JobUtil.to_model_view')
-    def test_get_jobs_based_on_user(self, mock_to_model_view, mock_filter):
+    @patch('apps.jobs.services.job_service.JobUtil.to_model_views')
+    def test_get_jobs_based_on_user(self, mock_to_model_views, mock_filter):
         mock_job = MagicMock()
         mock_filter.return_value = [mock_job]
-        mock_to_model_view.return_value = {'id': 'job_id'}
+        mock_to_model_views.return_value = [{'id': 'job_id'}]
 
         result = JobService.get_jobs_based_on_user(worker_id='worker_id')
         self.assertEqual(result, [{'id': 'job_id'}])
         mock_filter.assert_called_once()
-        mock_to_model_view.assert_called_once_with(mock_job)
+        mock_to_model_views.assert_called_once_with(mock_filter.return_value)
 
     @patch('apps.jobs.services.job_service.get_object_or_404')
     @patch('apps.jobs.services.job_service.TimeRegistration.objects.filter')
@@ -279,7 +577,7 @@ class JobServiceTest(TestCase):
 
     @patch('apps.jobs.services.job_service.get_object_or_404')
     @patch('apps.jobs.services.job_service.FormattingUtil')
-    @patch('apps.jobs.services.job_service.TimeRegisteredTemplate.send')
+    @patch('apps.jobs.services.job_service.record_mail')
     def test_register_time(self, mock_send, mock_formatting_util, mock_get_object_or_404):
         mock_job = MagicMock()
         mock_get_object_or_404.return_value = mock_job
@@ -309,37 +607,37 @@ class JobServiceTest(TestCase):
         mock_time_registration.save.assert_called_once()
 
     @patch('apps.jobs.services.job_service.Job.objects.filter')
-    @patch('apps.jobs.services.job_service.JobUtil.to_model_view')
-    def test_get_active_jobs(self, mock_to_model_view, mock_filter):
+    @patch('apps.jobs.services.job_service.JobUtil.to_model_views')
+    def test_get_active_jobs(self, mock_to_model_views, mock_filter):
         mock_job = MagicMock()
         mock_filter.return_value = [mock_job]
-        mock_to_model_view.return_value = {'id': 'job_id'}
+        mock_to_model_views.return_value = [{'id': 'job_id'}]
 
         result = JobService.get_active_jobs()
         self.assertEqual(result, [{'id': 'job_id'}])
         mock_filter.assert_called_once()
-        mock_to_model_view.assert_called_once_with(mock_job)
+        mock_to_model_views.assert_called_once_with([mock_job])
 
     @patch('apps.jobs.services.job_service.Job.objects.filter')
-    @patch('apps.jobs.services.job_service.JobUtil.to_model_view')
-    def test_get_done_jobs(self, mock_to_model_view, mock_filter):
+    @patch('apps.jobs.services.job_service.JobUtil.to_model_views')
+    def test_get_done_jobs(self, mock_to_model_views, mock_filter):
         mock_job = MagicMock()
         mock_filter.return_value = [mock_job]
-        mock_to_model_view.return_value = {'id': 'job_id'}
+        mock_to_model_views.return_value = [{'id': 'job_id'}]
 
         result = JobService.get_done_jobs(datetime.datetime.now(), datetime.datetime.now())
         self.assertEqual(result, [{'id': 'job_id'}])
         mock_filter.assert_called_once()
-        mock_to_model_view.assert_called_once_with(mock_job)
+        mock_to_model_views.assert_called_once_with(mock_filter.return_value)
 
     @patch('apps.jobs.services.job_service.Job.objects.filter')
-    @patch('apps.jobs.services.job_service.JobUtil.to_model_view')
-    def test_get_draft_jobs(self, mock_to_model_view, mock_filter):
+    @patch('apps.jobs.services.job_service.JobUtil.to_model_views')
+    def test_get_draft_jobs(self, mock_to_model_views, mock_filter):
         mock_job = MagicMock()
         mock_filter.return_value = [mock_job]
-        mock_to_model_view.return_value = {'id': 'job_id'}
+        mock_to_model_views.return_value = [{'id': 'job_id'}]
 
         result = JobService.get_draft_jobs()
         self.assertEqual(result, [{'id': 'job_id'}])
         mock_filter.assert_called_once()
-        mock_to_model_view.assert_called_once_with(mock_job)
\ No newline at end of file
+        mock_to_model_views.assert_called_once_with(mock_filter.return_value)
\ No newline at end of file
@@ -0,0 +1,630 @@
+import datetime
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.authentication.models import CustomerProfile, WorkerProfile
+from apps.core.models.geo import Address
+from apps.core.utils.geo_util import GeoUtil
+from apps.core.utils.lru_cache_util import LRUCache
+from apps.core.utils.wire_names import *
+from apps.jobs.models import (
+    Job, JobApplication, JobApplicationState, JobFeedEntry, JobState, StoredDirections, Tag, TimeRegistration,
+)
+from apps.jobs.services.job_service import JobService
+from apps.jobs.utils.application_util import ApplicationUtil
+from apps.jobs.utils.conflict_util import ConflictUtil
+from apps.jobs.utils.directions_cache_util import DirectionsCacheUtil
+from apps.jobs.utils.directions_util import DirectionsUtil
+from apps.jobs.utils.distance_estimator_util import DistanceEstimatorUtil
+from apps.jobs.utils.job_feed_util import JobFeedUtil
+from apps.jobs.utils.job_state_util import JobStateUtil
+from apps.jobs.utils.job_util import JobUtil
+
+User = get_user_model()
+
+
+class UtilTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.tag = Tag.objects.create(title='Cleaning', color='#FFFFFF', icon='<svg/>')
+
+    def _create_job(self, index):
+        customer = User.objects.create_user(username='customer{}'.format(index), email='c{}@werkr.be'.format(index))
+        CustomerProfile.objects.create(
+            user=customer,
+            customer_address=Address.objects.create(city='Gent', latitude=51.05, longitude=3.72),
+            customer_billing_address=Address.objects.create(city='Gent', latitude=51.05, longitude=3.72),
+            tag=self.tag,
+        )
+        worker = User.objects.create_user(username='worker{}'.format(index), email='w{}@werkr.be'.format(index))
+        worker_profile = WorkerProfile.objects.create(
+            user=worker,
+            worker_address=Address.objects.create(city='Brussel', latitude=50.85, longitude=4.35),
+        )
+        worker_profile.tags.add(self.tag)
+
+        job = Job.objects.create(
+            customer=customer,
+            title='Job {}'.format(index),
+            address=Address.objects.create(city='Antwerpen', latitude=51.22, longitude=4.40),
+            job_state=JobState.pending,
+            start_time=timezone.now() + datetime.timedelta(days=1),
+            end_time=timezone.now() + datetime.timedelta(days=1, hours=4),
+            max_workers=2,
+            selected_workers=1,
+            tag=self.tag,
+        )
+        TimeRegistration.objects.create(
+            job=job,
+            worker=worker,
+            start_time=job.start_time,
+            end_time=job.end_time,
+        )
+        return job
+
+    def _apply(self, job, index):
+        worker = User.objects.create_user(username='applicant{}'.format(index), email='a{}@werkr.be'.format(index))
+        WorkerProfile.objects.create(user=worker).tags.add(self.tag)
+
+        return JobApplication.objects.create(
+            job=job,
+            worker=worker,
+            address=Address.objects.create(city='Leuven', latitude=50.88, longitude=4.70),
+            application_state=JobApplicationState.pending,
+            distance=10.0,
+            created_at=timezone.now(),
+            modified_at=timezone.now(),
+        )
+
+
+class JobUtilTest(UtilTestCase):
+
+    def test_to_model_views_matches_to_model_view(self):
+        job = self._create_job(0)
+
+        self.assertEqual(JobUtil.to_model_views(Job.objects.filter(id=job.id)), [JobUtil.to_model_view(job)])
+
+    def test_to_model_views_query_count_is_constant(self):
+        for index in range(2):
+            self._create_job(index)
+
+        with self.assertNumQueries(3):
+            views = JobUtil.to_model_views(Job.objects.all())
+
+        for index in range(2, 6):
+            self._create_job(index)
+
+        with self.assertNumQueries(3):
+            views = JobUtil.to_model_views(Job.objects.all())
+
+        self.assertEqual(len(views), 6)
+        self.assertEqual(views[0][k_time_registrations][0][k_worker][k_tags][0]['title'], 'Cleaning')
+        self.assertEqual(views[0][k_customer][k_address][k_city], 'Gent')
+
+    def test_to_model_views_reads_through_cache(self):
+        job = self._create_job(0)
+        JobUtil.to_model_views(Job.objects.all())
+
+        with self.assertNumQueries(1):
+            views = JobUtil.to_model_views(Job.objects.all())
+
+        self.assertEqual(views[0][k_title], 'Job 0')
+
+    def test_related_saves_invalidate_cache(self):
+        job = self._create_job(0)
+        JobUtil.to_model_views(Job.objects.all())
+
+        registration = job.worked_times.first()
+        registration.break_time = datetime.time(hour=1)
+        registration.save()
+
+        self.assertEqual(JobUtil.to_model_view(job)[k_time_registrations][0][k_break_time], 60)
+
+        self.tag.title = 'Windows'
+        self.tag.save()
+
+        view = JobUtil.to_model_views(Job.objects.all())[0]
+        self.assertEqual(view[k_tag]['title'], 'Windows')
+        self.assertEqual(view[k_time_registrations][0][k_worker][k_tags][0]['title'], 'Windows')
+
+        job.customer.customer_profile.customer_address.city = 'Brugge'
+        job.customer.customer_profile.customer_address.save()
+
+        self.assertEqual(JobUtil.to_model_views(Job.objects.all())[0][k_customer][k_address][k_city], 'Brugge')
+
+    def test_to_summary_views(self):
+        job = self._create_job(0)
+
+        with self.assertNumQueries(1):
+            views = JobUtil.to_summary_views(Job.objects.all())
+
+        self.assertEqual(views[0][k_id], job.id)
+        self.assertEqual(views[0][k_city], 'Antwerpen')
+        self.assertEqual(views[0][k_start_time], JobUtil.to_model_view(job)[k_start_time])
+        self.assertEqual(views[0][k_tag]['title'], 'Cleaning')
+        self.assertNotIn(k_customer, views[0])
+
+        views = JobUtil.to_summary_views(Job.objects.all(), fields=[k_id, k_title])
+        self.assertEqual(views, [{k_id: job.id, k_title: 'Job 0'}])
+
+    def test_to_model_views_accepts_lists(self):
+        jobs = [self._create_job(index) for index in range(3)]
+        jobs = list(Job.objects.filter(id__in=[job.id for job in jobs]))
+
+        with self.assertNumQueries(9):
+            views = JobUtil.to_model_views(jobs)
+
+        self.assertEqual(len(views), 3)
+
+
+class ApplicationUtilTest(UtilTestCase):
+
+    def test_to_model_views_matches_to_model_view(self):
+        application = self._apply(self._create_job(0), 0)
+
+        self.assertEqual(
+            ApplicationUtil.to_model_views(JobApplication.objects.filter(id=application.id)),
+            [JobApplication.objects.get(id=application.id).to_model_view()],
+        )
+
+    def test_to_model_views_query_count_is_constant(self):
+        job = self._create_job(0)
+        for index in range(2):
+            self._apply(job, index)
+
+        with self.assertNumQueries(4):
+            ApplicationUtil.to_model_views(JobApplication.objects.all())
+
+        for index in range(2, 10):
+            self._apply(job, index)
+
+        # The job view is served from the cache now, only the applicants are loaded
+        with self.assertNumQueries(2):
+            views = ApplicationUtil.to_model_views(JobApplication.objects.all())
+
+        self.assertEqual(len(views), 10)
+        self.assertIs(views[0][k_job], views[-1][k_job])
+
+    def test_to_summary_views(self):
+        application = self._apply(self._create_job(0), 0)
+
+        with self.assertNumQueries(1):
+            views = ApplicationUtil.to_summary_views(JobApplication.objects.all())
+
+        self.assertEqual(views[0][k_id], application.id)
+        self.assertEqual(views[0][k_state], JobApplicationState.pending)
+        self.assertEqual(views[0][k_worker][k_id], application.worker_id)
+        self.assertEqual(views[0][k_job][k_title], 'Job 0')
+
+
+class ScheduleTestCase(UtilTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.worker = User.objects.create_user(username='feed_worker', email='feed@werkr.be')
+        WorkerProfile.objects.create(user=self.worker).tags.add(self.tag)
+
+        self.customer = User.objects.create_user(username='feed_customer', email='feed_customer@werkr.be')
+
+    def _create_open_job(self, start_in_hours, hours=4, **kwargs):
+        now = timezone.now()
+        start = now + datetime.timedelta(hours=start_in_hours)
+
+        fields = {
+            'customer': self.customer,
+            'address': Address.objects.create(city='Gent', latitude=51.05, longitude=3.72),
+            'start_time': start,
+            'end_time': start + datetime.timedelta(hours=hours),
+            'application_start_time': now - datetime.timedelta(days=1),
+            'application_end_time': start,
+            'max_workers': 2,
+            'selected_workers': 0,
+            'tag': self.tag,
+        }
+        fields.update(kwargs)
+
+        return Job.objects.create(**fields)
+
+    def _apply_to(self, job, worker, state=JobApplicationState.pending):
+        return JobApplication.objects.create(
+            job=job,
+            worker=worker,
+            address=job.address,
+            application_state=state,
+            created_at=timezone.now(),
+            modified_at=timezone.now(),
+        )
+
+
+class JobFeedUtilTest(ScheduleTestCase):
+
+    def _get_feed(self):
+        return list(JobFeedUtil.get_worker_feed(self.worker).values_list('job_id', flat=True))
+
+    def test_feed_follows_job_changes(self):
+        job = self._create_open_job(24)
+        later_job = self._create_open_job(48)
+
+        self.assertEqual(self._get_feed(), [job.id, later_job.id])
+
+        job.selected_workers = 2
+        job.save()
+
+        self.assertEqual(self._get_feed(), [later_job.id])
+
+        later_job.delete()
+
+        self.assertEqual(self._get_feed(), [])
+
+    def test_feed_filters_windows_and_tags(self):
+        self._create_open_job(24, application_end_time=timezone.now() - datetime.timedelta(hours=1))
+        self._create_open_job(24, tag=Tag.objects.create(title='Other', color='#000000', icon='<svg/>'))
+        self._create_open_job(24, archived=True)
+
+        self.assertEqual(self._get_feed(), [])
+
+    def test_feed_excludes_applied_and_overlapping_jobs(self):
+        applied_job = self._create_open_job(24)
+        approved_job = self._create_open_job(48)
+        overlapping_job = self._create_open_job(50)
+        free_job = self._create_open_job(72)
+
+        for job, state in [(applied_job, JobApplicationState.pending), (approved_job, JobApplicationState.approved)]:
+            JobApplication.objects.create(
+                job=job,
+                worker=self.worker,
+                address=job.address,
+                application_state=state,
+                created_at=timezone.now(),
+                modified_at=timezone.now(),
+            )
+
+        self.assertEqual(self._get_feed(), [free_job.id])
+
+    def test_rebuild(self):
+        job = self._create_open_job(24)
+        JobFeedEntry.objects.all().delete()
+
+        self.assertEqual(JobFeedUtil.rebuild(), 1)
+        self.assertEqual(self._get_feed(), [job.id])
+
+    def test_nearby_jobs(self):
+        self.worker.worker_profile.worker_address = Address.objects.create(city='Gent', latitude=51.05, longitude=3.72)
+        self.worker.worker_profile.save()
+
+        far_job = self._create_open_job(24, address=Address.objects.create(latitude=51.22, longitude=4.40))
+        near_job = self._create_open_job(48, address=Address.objects.create(latitude=51.06, longitude=3.73))
+
+        jobs = JobService.get_upcoming_jobs(self.worker, sort_by_distance=True)
+
+        self.assertEqual([job[k_id] for job in jobs], [near_job.id, far_job.id])
+        self.assertLess(jobs[0][k_distance], 2)
+
+        jobs = JobService.get_upcoming_jobs(self.worker, radius_km=10, summary_fields=[k_id, k_title])
+
+        self.assertEqual([job[k_id] for job in jobs], [near_job.id])
+
+
+class JobStateUtilTest(UtilTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.customer = User.objects.create_user(username='state_customer', email='state@werkr.be')
+
+    def _create_job(self, start_in_hours, selected_workers=1, job_state=JobState.pending, **kwargs):
+        start = timezone.now() + datetime.timedelta(hours=start_in_hours)
+
+        return Job.objects.create(
+            customer=self.customer,
+            address=Address.objects.create(city='Gent', latitude=51.05, longitude=3.72),
+            job_state=job_state,
+            start_time=start,
+            end_time=start + datetime.timedelta(hours=4),
+            application_start_time=start - datetime.timedelta(days=7),
+            application_end_time=start - datetime.timedelta(days=1),
+            max_workers=2,
+            selected_workers=selected_workers,
+            tag=self.tag,
+            **kwargs
+        )
+
+    def _get_states(self, *jobs):
+        return [Job.objects.get(id=job.id).job_state for job in jobs]
+
+    def test_transition(self):
+        open_job = self._create_job(48)
+        closed_job = self._create_job(12)
+        unstaffed_job = self._create_job(-1, selected_workers=0)
+        started_job = self._create_job(-1)
+        ended_job = self._create_job(-12)
+        draft_job = self._create_job(-12, is_draft=True)
+
+        counts = JobStateUtil.transition()
+
+        self.assertEqual(counts, {
+            'applications_closed': 3,
+            'started': 2,
+            'started_without_workers': 1,
+            'ended': 1,
+            'ended_without_workers': 0,
+        })
+        self.assertEqual(
+            self._get_states(open_job, closed_job, unstaffed_job, started_job, ended_job, draft_job),
+            [JobState.pending, JobState.fulfilled, JobState.cancelled, JobState.ongoing, JobState.done, JobState.pending],
+        )
+        self.assertEqual(JobStateUtil.get_stats()['job_state.started'], 2)
+
+        self.assertEqual(sum(JobStateUtil.transition().values()), 0)
+
+    def test_dry_run(self):
+        job = self._create_job(-12)
+
+        self.assertEqual(JobStateUtil.transition(dry_run=True)['applications_closed'], 1)
+        self.assertEqual(self._get_states(job), [JobState.pending])
+        self.assertEqual(JobStateUtil.get_stats()['job_state.runs'], 0)
+
+    def test_transition_invalidates_job_views(self):
+        job = self._create_job(-1)
+
+        self.assertEqual(JobUtil.to_model_view(job)[k_state], JobState.pending)
+
+        JobStateUtil.transition()
+
+        self.assertEqual(JobUtil.to_model_view(Job.objects.get(id=job.id))[k_state], JobState.ongoing)
+
+
+ROUTE = '{"routes": [{"distanceMeters": 12000, "duration": "600s", "polyline": {"encodedPolyline": "_p~iF~ps|U_ulLnnqC"}}]}'
+
+
+class ConflictUtilTest(ScheduleTestCase):
+
+    def test_reject_conflicts(self):
+        other_worker = User.objects.create_user(username='other_worker', email='other@werkr.be')
+
+        approved_job = self._create_open_job(24)
+        overlapping_job = self._create_open_job(26)
+        buffered_job = self._create_open_job(30)
+        free_job = self._create_open_job(48)
+
+        approved = [self._apply_to(approved_job, self.worker), self._apply_to(approved_job, other_worker)]
+        conflicts = [self._apply_to(overlapping_job, self.worker), self._apply_to(buffered_job, other_worker)]
+        free = [self._apply_to(free_job, self.worker), self._apply_to(buffered_job, self.worker, JobApplicationState.approved)]
+
+        self.assertEqual(sorted(ConflictUtil.reject_conflicts(approved)), sorted(application.id for application in conflicts))
+
+        states = {application.id: application.application_state for application in JobApplication.objects.all()}
+
+        self.assertEqual([states[application.id] for application in conflicts], [JobApplicationState.rejected] * 2)
+        self.assertEqual(
+            [states[application.id] for application in approved + free],
+            [JobApplicationState.pending] * 3 + [JobApplicationState.approved],
+        )
+
+    @override_settings(JOB_CONFLICT_BUFFER_HOURS=0)
+    def test_buffer_is_configurable(self):
+        approved_job = self._create_open_job(24)
+        next_job = self._create_open_job(29)
+
+        application = self._apply_to(approved_job, self.worker)
+        self._apply_to(next_job, self.worker)
+
+        self.assertEqual(ConflictUtil.reject_conflicts([application]), [])
+
+
+class DirectionsUtilTest(TestCase):
+
+    def test_jittered_coordinates_share_the_cache(self):
+        DirectionsUtil.store(51.050001, 3.720001, 50.85, 4.35, ROUTE)
+
+        self.assertEqual(DirectionsUtil.get(51.049998, 3.719999, 50.850002, 4.35), ROUTE)
+        self.assertIsNone(DirectionsUtil.get(51.06, 3.72, 50.85, 4.35))
+
+    def test_responses_are_stored_compactly(self):
+        DirectionsUtil.store(51.05, 3.72, 50.85, 4.35, ROUTE)
+        DirectionsUtil.store(51.06, 3.72, 50.85, 4.35, '{}')
+
+        directions = StoredDirections.objects.get(from_lat=51.05)
+
+        self.assertEqual(directions.distance_meters, 12000)
+        self.assertEqual(directions.duration_seconds, 600)
+
+        self.assertEqual(DirectionsUtil.get_distance(51.05, 3.72, 50.85, 4.35), 12000)
+        self.assertEqual(DirectionsUtil.get(51.06, 3.72, 50.85, 4.35), '{}')
+        self.assertIsNone(DirectionsUtil.get_distance(51.06, 3.72, 50.85, 4.35))
+
+        with self.assertNumQueries(1):
+            distances = DirectionsUtil.get_distances([
+                DirectionsUtil.get_cache_key(51.05, 3.72, 50.85, 4.35),
+                DirectionsUtil.get_cache_key(51.06, 3.72, 50.85, 4.35),
+            ])
+
+        self.assertEqual(list(distances.values()), [12000])
+
+    def test_expired_directions_are_ignored_and_purged(self):
+        DirectionsUtil.store(51.05, 3.72, 50.85, 4.35, '{}')
+        StoredDirections.objects.update(created_at=timezone.now() - datetime.timedelta(days=365))
+
+        self.assertIsNone(DirectionsUtil.get(51.05, 3.72, 50.85, 4.35))
+        self.assertEqual(StoredDirections.objects.count(), 1)
+
+        # Storing the trip again replaces the expired row
+        DirectionsUtil.store(51.05, 3.72, 50.85, 4.35, ROUTE)
+
+        self.assertEqual(DirectionsUtil.get(51.05, 3.72, 50.85, 4.35), ROUTE)
+        self.assertEqual(StoredDirections.objects.count(), 1)
+
+        DirectionsUtil.store(51.06, 3.72, 50.85, 4.35, '{}')
+        StoredDirections.objects.filter(from_lat=51.06).update(created_at=timezone.now() - datetime.timedelta(days=365))
+
+        self.assertEqual(DirectionsUtil.purge_expired(batch_size=1), 1)
+        self.assertEqual(StoredDirections.objects.count(), 1)
+
+
+class DirectionsCacheUtilTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        DirectionsCacheUtil.lru.clear()
+
+    def test_layers_are_filled_and_read_in_order(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return ROUTE
+
+        for _ in range(3):
+            self.assertEqual(DirectionsCacheUtil.get_or_fetch(51.05, 3.72, 50.85, 4.35, fetch), ROUTE)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(StoredDirections.objects.count(), 1)
+
+        # Another process only shares the cache and the database
+        DirectionsCacheUtil.lru.clear()
+        self.assertEqual(DirectionsCacheUtil.get_or_fetch(51.05, 3.72, 50.85, 4.35, fetch), ROUTE)
+
+        DirectionsCacheUtil.lru.clear()
+        cache.delete(DirectionsCacheUtil.get_key(DirectionsUtil.get_cache_key(51.05, 3.72, 50.85, 4.35)))
+        self.assertEqual(DirectionsCacheUtil.get_or_fetch(51.05, 3.72, 50.85, 4.35, fetch), ROUTE)
+
+        self.assertEqual(len(calls), 1)
+
+        stats = DirectionsCacheUtil.get_stats()
+
+        self.assertEqual(stats[DirectionsCacheUtil.lru_hits_metric], 2)
+        self.assertEqual(stats[DirectionsCacheUtil.shared_hits_metric], 1)
+        self.assertEqual(stats[DirectionsCacheUtil.database_hits_metric], 1)
+        self.assertEqual(stats[DirectionsCacheUtil.upstream_calls_metric], 1)
+        self.assertEqual(stats['ratio'], 0.8)
+
+    def test_missing_routes_are_cached_briefly(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return None
+
+        for _ in range(2):
+            self.assertIsNone(DirectionsCacheUtil.get_or_fetch(51.05, 3.72, 50.85, 4.35, fetch))
+
+        # Another process only shares the cache
+        DirectionsCacheUtil.lru.clear()
+        self.assertIsNone(DirectionsCacheUtil.get_or_fetch(51.05, 3.72, 50.85, 4.35, fetch))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(StoredDirections.objects.count(), 0)
+
+    def test_failed_calls_are_not_cached(self):
+        def fail():
+            raise Exception('Unavailable')
+
+        self.assertIsNone(DirectionsCacheUtil.get_or_fetch(51.05, 3.72, 50.85, 4.35, fail))
+
+        cache.delete(DirectionsCacheUtil.backoff_key)
+        self.assertEqual(DirectionsCacheUtil.get_or_fetch(51.05, 3.72, 50.85, 4.35, lambda: '{}'), '{}')
+
+    @patch('apps.jobs.utils.directions_cache_util.DirectionsUtil.store')
+    @patch('apps.jobs.utils.directions_cache_util.DirectionsUtil.get', return_value=None)
+    def test_concurrent_misses_make_one_call(self, mock_get, mock_store):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return ROUTE
+
+        def request():
+            results.append(DirectionsCacheUtil.get_or_fetch(51.05, 3.72, 50.85, 4.35, fetch))
+
+        threads = [threading.Thread(target=request)]
+        threads[0].start()
+        started.wait(5)
+
+        threads += [threading.Thread(target=request) for _ in range(3)]
+
+        for thread in threads[1:]:
+            thread.start()
+
+        release.set()
+
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [ROUTE] * 4)
+        self.assertEqual(mock_store.call_count, 1)
+        self.assertEqual(DirectionsCacheUtil.get_stats()[DirectionsCacheUtil.coalesced_metric], 3)
+
+    def test_failing_upstream_is_backed_off_from(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            raise ConnectionError('timed out')
+
+        self.assertIsNone(DirectionsCacheUtil.get_or_fetch(51.05, 3.72, 50.85, 4.35, fetch))
+        self.assertIsNone(DirectionsCacheUtil.get_or_fetch(51.06, 3.72, 50.85, 4.35, fetch))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(DirectionsCacheUtil.get_stats()[DirectionsCacheUtil.upstream_skipped_metric], 1)
+
+    def test_lru_is_bounded(self):
+        lru = LRUCache(max_size=2, timeout=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+
+        expired = LRUCache(max_size=2, timeout=-1)
+        expired.set('a', 1)
+
+        self.assertIsNone(expired.get('a'))
+
+
+class DistanceEstimatorUtilTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fit_and_estimate(self):
+        # Trips from around Gent drive 1.5 times the straight-line distance
+        for index in range(25):
+            lat, lon, to_lat, to_lon = 51.05 + index / 1000, 3.72, 50.85, 4.35
+            road_distance = round(GeoUtil.get_distance(lat, lon, to_lat, to_lon) * 1500)
+
+            DirectionsUtil.store(lat, lon, to_lat, to_lon, '{{"routes": [{{"distanceMeters": {}}}]}}'.format(road_distance))
+
+        # Too few trips to fit their own region
+        DirectionsUtil.store(50.85, 4.35, 51.05, 3.72, '{"routes": [{"distanceMeters": 100000}]}')
+
+        factors = DistanceEstimatorUtil.fit()
+
+        self.assertEqual(len(factors), 2)
+        self.assertAlmostEqual(factors[DistanceEstimatorUtil.get_region(51.05, 3.72)], 1.5, places=4)
+        self.assertAlmostEqual(factors[''], 1.5, places=4)
+
+        estimates = DistanceEstimatorUtil.estimate([(51.05, 3.72), (50.85, 4.35)], (50.9, 4.0))
+
+        self.assertAlmostEqual(estimates[0], GeoUtil.get_distance(51.05, 3.72, 50.9, 4.0) * 1500, delta=5)
+        self.assertAlmostEqual(estimates[1], GeoUtil.get_distance(50.85, 4.35, 50.9, 4.0) * 1500, delta=5)
+
+    def test_estimate_without_factors(self):
+        estimates = DistanceEstimatorUtil.estimate([(51.05, 3.72)], (50.85, 4.35))
+
+        self.assertAlmostEqual(estimates[0], GeoUtil.get_distance(51.05, 3.72, 50.85, 4.35) * 1300)
@@ -17,6 +17,8 @@ from .views import (
     ApplicationView,
     ApproveApplicationView,
     DenyApplicationView,
+    ApprovalStatusView,
+    BulkApplicationsView,
     MyApplicationsView,
     ApplicationsListView,
     ReverseGeocodeView,
@@ -59,7 +61,9 @@ urlpatterns = [
     path('applications/details/<str:id>', ApplicationView.as_view(), name="application-details"),
     path('applications/details/<str:id>/approve', ApproveApplicationView.as_view(), name="approve-application"),
     path('applications/details/<str:id>/deny', DenyApplicationView.as_view(), name="deny-application"),
+    path('applications/details/<str:id>/approval', ApprovalStatusView.as_view(), name="approval-status"),
     path('applications/me', MyApplicationsView.as_view(), name="my-applications"),
+    path('applications/bulk', BulkApplicationsView.as_view(), name="bulk-applications"),
     path('applications', ApplicationsListView.as_view()),
     path('applications/<str:job_id>', ApplicationsListView.as_view(), name="applications-list"),
 
@@ -0,0 +1,112 @@
+from django.db.models import QuerySet, prefetch_related_objects
+
+from apps.authentication.utils.worker_util import WorkerUtil
+from apps.core.utils.formatters import FormattingUtil
+from apps.core.utils.wire_names import *
+from apps.jobs.utils.job_util import JobUtil
+
+
+class ApplicationUtil:
+
+    # Forward relations rendered by JobApplication.to_model_view, including the ones of the job
+    select_related_fields = [
+        'address',
+        'worker__worker_profile__worker_address',
+        *['job__{}'.format(field) for field in JobUtil.select_related_fields],
+    ]
+
+    prefetch_related_fields = [
+        'worker__worker_profile__tags',
+    ]
+
+    # Summary view keys and the columns they are projected from
+    summary_columns = {
+        k_id: ['id'],
+        k_state: ['application_state'],
+        k_distance: ['distance'],
+        k_no_travel_cost: ['no_travel_cost'],
+        k_created_at: ['created_at'],
+        k_worker: ['worker__id', 'worker__first_name', 'worker__last_name'],
+        k_job: JobUtil.get_summary_columns(JobUtil.summary_columns.keys(), prefix='job__'),
+    }
+
+    @staticmethod
+    def to_summary_views(applications, fields=None):
+        """
+        Renders lightweight application summaries from a values() projection,
+        with a job summary (see JobUtil.to_summary_views) and the worker's name instead of full nested views.
+
+        Args:
+        applications (QuerySet): The applications to summarize.
+        fields (Iterable[str]): The summary keys to include, all of summary_columns by default.
+
+        Returns:
+        list: The application summaries, in the order of the queryset.
+        """
+
+        fields = list(fields or ApplicationUtil.summary_columns.keys())
+        columns = [column for field in fields for column in ApplicationUtil.summary_columns[field]]
+
+        views = []
+
+        for row in applications.values(*columns):
+            view = {}
+
+            for field in fields:
+                if field == k_job:
+                    view[k_job] = JobUtil.build_summary_view(row, JobUtil.summary_columns.keys(), prefix='job__')
+                elif field == k_worker:
+                    view[k_worker] = {
+                        k_id: row['worker__id'],
+                        k_first_name: row['worker__first_name'],
+                        k_last_name: row['worker__last_name'],
+                    }
+                elif field == k_created_at:
+                    view[k_created_at] = FormattingUtil.to_timestamp(row['created_at'])
+                else:
+                    view[field] = row[ApplicationUtil.summary_columns[field][0]]
+
+            views.append(view)
+
+        return views
+
+    @staticmethod
+    def to_model_views(applications):
+        """
+        Serializes a collection of job applications to the same format as JobApplication.to_model_view.
+
+        Every distinct job and worker is rendered once and shared between the applications
+        that reference it, so a long list of applicants for the same job only pays for that job once.
+
+        Args:
+        applications (QuerySet | Iterable[JobApplication]): A queryset, page or list of applications.
+
+        Returns:
+        list: The application model views, in the order of the given applications.
+        """
+
+        if isinstance(applications, QuerySet):
+            applications = list(applications.select_related(*ApplicationUtil.select_related_fields)
+                                .prefetch_related(*ApplicationUtil.prefetch_related_fields))
+        else:
+            applications = list(applications)
+            prefetch_related_objects(applications, *ApplicationUtil.select_related_fields,
+                                     *ApplicationUtil.prefetch_related_fields)
+
+        jobs = {}
+        workers = {}
+
+        for application in applications:
+            jobs.setdefault(application.job_id, application.job)
+            workers.setdefault(application.worker_id, application.worker)
+
+        job_views = dict(zip(jobs.keys(), JobUtil.to_model_views(jobs.values())))
+        worker_views = dict(zip(workers.keys(), WorkerUtil.to_worker_views(workers.values())))
+
+        return [
+            application.to_model_view(
+                job_view=job_views[application.job_id],
+                worker_view=worker_views[application.worker_id],
+            )
+            for application in applications
+        ]
@@ -0,0 +1,265 @@
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.utils.formatters import FormattingUtil
+from apps.core.utils.metrics_util import MetricsUtil
+from apps.core.utils.wire_names import *
+from apps.jobs.models import ApprovalStage, ApprovalStageState, JobApplication
+
+logger = logging.getLogger(__name__)
+
+
+def declare_dimona(application: JobApplication) -> None:
+    from apps.jobs.models import Dimona
+    from apps.legal.services.link2prisma_service import Link2PrismaService
+
+    # A declaration cancelled after an earlier denial does not cover this approval
+    if Dimona.objects.filter(application=application).exclude(reason=Dimona.cancelled_reason).exists():
+        return
+
+    if not Link2PrismaService.handle_job_approval(application):
+        raise Exception('Dimona declaration failed')
+
+
+def generate_contract(application: JobApplication) -> None:
+    from apps.legal.utils.contract_util import ContractUtil
+
+    ContractUtil.generate_contract(application)
+
+
+def notify_approval(application: JobApplication) -> None:
+    from apps.jobs.managers.job_manager import JobManager
+
+    # Records the mails and notification through the outbox, all of them or none
+    with transaction.atomic():
+        JobManager._notify_approved_worker(application)
+
+
+class ApprovalPipelineUtil:
+    """
+    Runs the slow work following the approval of an application in the background, one Celery task per stage.
+
+    Every stage has an ApprovalStage row, so clients can follow the progress of an approval. A failed stage is
+    retried with an exponential backoff, up to APPROVAL_PIPELINE_MAX_ATTEMPTS attempts, after which the pipeline
+    moves on. Stages that are done are never run again, so redelivered or resumed tasks are harmless, until the
+    application is approved again and its pipeline restarts.
+    """
+
+    # Stages in the order they run, with the function running each of them
+    stages = [
+        ('dimona', declare_dimona),
+        ('contract', generate_contract),
+        ('notifications', notify_approval),
+    ]
+
+    metric_prefix = 'approval_pipeline'
+
+    finished_states = [ApprovalStageState.done, ApprovalStageState.failed]
+
+    @staticmethod
+    def get_metric(stage: str, name: str) -> str:
+        return '{}.{}.{}'.format(ApprovalPipelineUtil.metric_prefix, stage, name)
+
+    @staticmethod
+    def get_names() -> list:
+        return [name for name, _ in ApprovalPipelineUtil.stages]
+
+    @staticmethod
+    def get_next_stage(stage: str):
+        names = ApprovalPipelineUtil.get_names()
+        index = names.index(stage) + 1
+
+        return names[index] if index < len(names) else None
+
+    @staticmethod
+    def start(applications) -> None:
+        """
+        Creates the stages of the approved applications and queues their first stage once the transaction commits.
+        Applications approved before, e.g. approved again after a denial, run their whole pipeline again.
+        """
+
+        applications = list(applications)
+
+        ApprovalStage.objects.filter(application_id__in=[application.id for application in applications]).update(
+            state=ApprovalStageState.pending, attempts=0, error=None, updated_at=timezone.now(),
+        )
+
+        ApprovalStage.objects.bulk_create(
+            [
+                ApprovalStage(application_id=application.id, name=name)
+                for application in applications for name in ApprovalPipelineUtil.get_names()
+            ],
+            ignore_conflicts=True,
+        )
+
+        first_stage = ApprovalPipelineUtil.get_names()[0]
+
+        for application in applications:
+            transaction.on_commit(
+                lambda application_id=str(application.id): ApprovalPipelineUtil.enqueue(application_id, first_stage)
+            )
+
+    @staticmethod
+    def enqueue(application_id: str, stage: str, countdown: float = 0) -> None:
+        from apps.jobs.tasks import run_approval_stage
+
+        run_approval_stage.apply_async((application_id, stage), countdown=countdown)
+
+    @staticmethod
+    def claim_stage(application_id: str, stage: str):
+        """
+        Marks a stage as running, unless it finished or another worker is running it.
+
+        Returns:
+        ApprovalStage: The claimed stage, or None when there is nothing to run.
+        """
+
+        now = timezone.now()
+        stale_before = now - datetime.timedelta(seconds=settings.APPROVAL_PIPELINE_STALE_AFTER)
+
+        with transaction.atomic():
+            approval_stage = ApprovalStage.objects.select_for_update().filter(
+                application_id=application_id, name=stage,
+            ).first()
+
+            if approval_stage is None or approval_stage.state in ApprovalPipelineUtil.finished_states:
+                return None
+
+            if approval_stage.state == ApprovalStageState.running and approval_stage.updated_at > stale_before:
+                return None
+
+            approval_stage.state = ApprovalStageState.running
+            approval_stage.attempts += 1
+            approval_stage.updated_at = now
+            approval_stage.save()
+
+        return approval_stage
+
+    @staticmethod
+    def run_stage(application_id: str, stage: str):
+        """
+        Runs a single stage of the pipeline of an application.
+
+        Returns:
+        str: The state of the stage afterwards, or None when it was not run.
+        """
+
+        approval_stage = ApprovalPipelineUtil.claim_stage(application_id, stage)
+
+        if approval_stage is None:
+            return None
+
+        application = JobApplication.objects.select_related(
+            'job__address', 'job__customer__customer_profile', 'worker__worker_profile__worker_address',
+        ).get(id=application_id)
+
+        try:
+            dict(ApprovalPipelineUtil.stages)[stage](application)
+        except Exception as e:
+            logger.warning('Approval stage {} of application {} failed: {}'.format(stage, application_id, e))
+
+            if approval_stage.attempts >= settings.APPROVAL_PIPELINE_MAX_ATTEMPTS:
+                approval_stage.state = ApprovalStageState.failed
+                MetricsUtil.increment(ApprovalPipelineUtil.get_metric(stage, 'failed'))
+            else:
+                approval_stage.state = ApprovalStageState.pending
+                MetricsUtil.increment(ApprovalPipelineUtil.get_metric(stage, 'retries'))
+
+            approval_stage.error = str(e)[:256]
+        else:
+            approval_stage.state = ApprovalStageState.done
+            approval_stage.error = None
+            MetricsUtil.increment(ApprovalPipelineUtil.get_metric(stage, 'done'))
+
+        approval_stage.updated_at = timezone.now()
+        approval_stage.save()
+
+        return approval_stage.state
+
+    @staticmethod
+    def run(application_id: str, stage: str):
+        """
+        Runs a stage and queues what comes next: a retry of the stage after a failed attempt,
+        or the next stage once it finished.
+        """
+
+        state = ApprovalPipelineUtil.run_stage(application_id, stage)
+
+        if state == ApprovalStageState.pending:
+            attempts = ApprovalStage.objects.get(application_id=application_id, name=stage).attempts
+            ApprovalPipelineUtil.enqueue(
+                application_id, stage, countdown=settings.APPROVAL_PIPELINE_RETRY_DELAY * 2 ** (attempts - 1),
+            )
+        elif state in ApprovalPipelineUtil.finished_states:
+            next_stage = ApprovalPipelineUtil.get_next_stage(stage)
+
+            if next_stage:
+                ApprovalPipelineUtil.enqueue(application_id, next_stage)
+
+        return state
+
+    @staticmethod
+    def resume() -> int:
+        """
+        Queues the first unfinished stage of pipelines that did not move for APPROVAL_PIPELINE_STALE_AFTER seconds,
+        e.g. because their task was lost.
+
+        Returns:
+        int: The number of resumed pipelines.
+        """
+
+        stale_before = timezone.now() - datetime.timedelta(seconds=settings.APPROVAL_PIPELINE_STALE_AFTER)
+        names = ApprovalPipelineUtil.get_names()
+
+        first_stages = {}
+
+        for application_id, name, updated_at in ApprovalStage.objects.exclude(
+            state__in=ApprovalPipelineUtil.finished_states,
+        ).values_list('application_id', 'name', 'updated_at'):
+            current = first_stages.get(application_id)
+
+            if current is None or names.index(name) < names.index(current[0]):
+                first_stages[application_id] = (name, updated_at)
+
+        resumed = 0
+
+        for application_id, (name, updated_at) in first_stages.items():
+            if updated_at <= stale_before:
+                ApprovalPipelineUtil.enqueue(str(application_id), name)
+                resumed += 1
+
+        return resumed
+
+    @staticmethod
+    def get_status(application: JobApplication) -> dict:
+        """
+        Returns the state of an application with the progress of its approval pipeline.
+        """
+
+        stages = {stage.name: stage for stage in application.approval_stages.all()}
+
+        return {
+            k_id: application.id,
+            k_state: application.application_state,
+            k_stages: [
+                {
+                    k_name: name,
+                    k_state: stages[name].state,
+                    k_attempts: stages[name].attempts,
+                    k_error: stages[name].error,
+                    k_updated_at: FormattingUtil.to_timestamp(stages[name].updated_at),
+                }
+                for name in ApprovalPipelineUtil.get_names() if name in stages
+            ],
+        }
+
+    @staticmethod
+    def get_stats() -> dict:
+        return MetricsUtil.get(*[
+            ApprovalPipelineUtil.get_metric(stage, name)
+            for stage in ApprovalPipelineUtil.get_names() for name in ('done', 'retries', 'failed')
+        ])
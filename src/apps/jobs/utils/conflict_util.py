@@ -0,0 +1,96 @@
+import datetime
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.core.utils.count_util import CountUtil
+from apps.jobs.models import JobApplication, JobApplicationState
+
+
+class ConflictUtil:
+    """
+    Detects schedule conflicts between the jobs of a worker.
+
+    Two jobs conflict when their intervals, widened by JOB_CONFLICT_BUFFER_HOURS on both sides, overlap.
+    Jobs without an end time are treated as ending when they start.
+    """
+
+    @staticmethod
+    def get_buffer() -> datetime.timedelta:
+        return datetime.timedelta(hours=settings.JOB_CONFLICT_BUFFER_HOURS)
+
+    @staticmethod
+    def overlaps(start, end, prefix: str = 'job__') -> Q:
+        """
+        Builds the condition of a job conflicting with an interval.
+
+        Args:
+        start (datetime | Expression): The start of the interval, e.g. an OuterRef in a subquery.
+        end (datetime | Expression): The end of the interval.
+        prefix (str): The lookup prefix of the job columns, e.g. 'job__' for applications.
+
+        Returns:
+        Q: The interval-overlap condition, including the buffer.
+        """
+
+        buffer = ConflictUtil.get_buffer()
+
+        return Q(**{'{}start_time__lt'.format(prefix): end + buffer}) & (
+            Q(**{'{}end_time__gt'.format(prefix): start - buffer})
+            | Q(**{'{}end_time__isnull'.format(prefix): True, '{}start_time__gt'.format(prefix): start - buffer})
+        )
+
+    @staticmethod
+    def get_conflicts(applications, state: JobApplicationState = JobApplicationState.pending):
+        """
+        Finds the applications conflicting with the given applications of one or many workers, in a single query.
+
+        Args:
+        applications (QuerySet | Iterable[JobApplication]): The applications to check, typically being approved.
+        state (JobApplicationState): The state of the conflicting applications to look for (default is 'pending').
+
+        Returns:
+        QuerySet: The other applications of the same workers, in the given state, for conflicting jobs.
+        """
+
+        application_ids = [application.id for application in applications]
+
+        conflicting = JobApplication.objects.filter(
+            id__in=application_ids,
+            worker_id=OuterRef('worker_id'),
+        ).filter(
+            ConflictUtil.overlaps(
+                OuterRef('job__start_time'), Coalesce(OuterRef('job__end_time'), OuterRef('job__start_time'))
+            ),
+        )
+
+        return JobApplication.objects.filter(
+            Exists(conflicting),
+            application_state=state,
+        ).exclude(
+            id__in=application_ids,
+        )
+
+    @staticmethod
+    def reject_conflicts(applications) -> list:
+        """
+        Rejects the pending applications conflicting with the given applications with one bulk update.
+
+        Returns:
+        list: The ids of the rejected applications.
+        """
+
+        rejected_ids = list(ConflictUtil.get_conflicts(applications).values_list('id', flat=True))
+
+        if rejected_ids:
+            JobApplication.objects.filter(id__in=rejected_ids).update(
+                application_state=JobApplicationState.rejected,
+                modified_at=timezone.now(),
+            )
+
+            # The bulk update bypasses the signals keeping paginated totals in sync
+            CountUtil.bump_generation(JobApplication._meta.db_table)
+
+        return rejected_ids
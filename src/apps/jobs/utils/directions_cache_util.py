@@ -0,0 +1,211 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.utils.lru_cache_util import LRUCache
+from apps.core.utils.metrics_util import MetricsUtil
+from apps.core.utils.single_flight_util import SingleFlightUtil
+from apps.jobs.utils.directions_util import DirectionsUtil
+
+logger = logging.getLogger(__name__)
+
+
+class DirectionsCacheUtil:
+    """
+    Cache layers in front of the Google Routes API, from fastest to slowest:
+    - An in-process LRU, bounded by DIRECTIONS_LRU_SIZE entries of at most DIRECTIONS_LRU_TIMEOUT seconds.
+    - The shared cache (Redis), for DIRECTIONS_CACHE_TIMEOUT seconds.
+    - The StoredDirections table, see DirectionsUtil.
+
+    On a miss of every layer, a lock in the shared cache makes sure only one process calls the API for a route.
+    Concurrent requests for the same route wait for that call to land in the shared cache instead.
+
+    When a call to the API fails, it is not called again for settings.DIRECTIONS_UPSTREAM_BACKOFF seconds,
+    so requests do not pile up on a slow or failing provider. Routes without an answer are cached as no_route
+    in both cache layers for DIRECTIONS_NO_ROUTE_TIMEOUT seconds.
+    """
+
+    key_prefix = 'directions'
+
+    # Cached in place of the response of a route without an answer
+    no_route = ''
+    backoff_key = 'directions_upstream_backoff'
+
+    lru = LRUCache(max_size=settings.DIRECTIONS_LRU_SIZE, timeout=settings.DIRECTIONS_LRU_TIMEOUT)
+
+    # Seconds to wait for a concurrent request of the same route, before calling the API anyway
+    lock_timeout = 10
+
+    lru_hits_metric = 'directions_cache.lru_hits'
+    shared_hits_metric = 'directions_cache.shared_hits'
+    database_hits_metric = 'directions_cache.database_hits'
+    coalesced_metric = 'directions_cache.coalesced'
+    upstream_calls_metric = 'directions_cache.upstream_calls'
+    upstream_failures_metric = 'directions_cache.upstream_failures'
+    upstream_skipped_metric = 'directions_cache.upstream_skipped'
+
+    @staticmethod
+    def get_key(cache_key: str) -> str:
+        return '{}:{}'.format(DirectionsCacheUtil.key_prefix, cache_key)
+
+    @staticmethod
+    def get_cached(cache_key: str):
+        """
+        Reads the shared cache and the database, filling the faster layers on a hit.
+        """
+
+        try:
+            response = cache.get(DirectionsCacheUtil.get_key(cache_key))
+        except Exception as e:
+            logger.warning('Could not read directions from cache: {}'.format(e))
+            response = None
+
+        if response is not None:
+            MetricsUtil.increment(DirectionsCacheUtil.shared_hits_metric)
+            DirectionsCacheUtil.set_lru(cache_key, response)
+            return response
+
+        return None
+
+    @staticmethod
+    def set_lru(cache_key: str, response: str) -> None:
+        if response == DirectionsCacheUtil.no_route:
+            DirectionsCacheUtil.lru.set(cache_key, response, timeout=settings.DIRECTIONS_NO_ROUTE_TIMEOUT)
+        else:
+            DirectionsCacheUtil.lru.set(cache_key, response)
+
+    @staticmethod
+    def set_cached(cache_key: str, response: str) -> None:
+        """
+        Writes a response to the in-process and shared cache, None when the route has no answer.
+        """
+
+        if response is None:
+            response = DirectionsCacheUtil.no_route
+            timeout = settings.DIRECTIONS_NO_ROUTE_TIMEOUT
+        else:
+            timeout = settings.DIRECTIONS_CACHE_TIMEOUT
+
+        DirectionsCacheUtil.set_lru(cache_key, response)
+
+        try:
+            cache.set(DirectionsCacheUtil.get_key(cache_key), response, timeout=timeout)
+        except Exception as e:
+            logger.warning('Could not write directions to cache: {}'.format(e))
+
+    @staticmethod
+    def is_upstream_down() -> bool:
+        try:
+            return cache.get(DirectionsCacheUtil.backoff_key) is not None
+        except Exception:
+            return False
+
+    @staticmethod
+    def mark_upstream_down() -> None:
+        MetricsUtil.increment(DirectionsCacheUtil.upstream_failures_metric)
+
+        try:
+            cache.set(DirectionsCacheUtil.backoff_key, 1, timeout=settings.DIRECTIONS_UPSTREAM_BACKOFF)
+        except Exception as e:
+            logger.warning('Could not back off from the directions API: {}'.format(e))
+
+    @staticmethod
+    def get_or_fetch(lat: float, lon: float, to_lat: float, to_lon: float, fetch):
+        """
+        Returns the directions response of a route from the fastest layer that has it,
+        calling fetch at most once across processes when none has.
+
+        Args:
+        lat, lon, to_lat, to_lon (float): The origin and destination.
+        fetch (Callable[[], str]): Calls the API, returning the response or None when there is no route,
+        and raising when the API is unavailable.
+
+        Returns:
+        str: The directions response, None when there is no route or the API is unavailable.
+        """
+
+        cache_key = DirectionsUtil.get_cache_key(lat, lon, to_lat, to_lon)
+
+        response = DirectionsCacheUtil.lru.get(cache_key)
+
+        if response is not None:
+            MetricsUtil.increment(DirectionsCacheUtil.lru_hits_metric)
+            return response or None
+
+        response = DirectionsCacheUtil.get_cached(cache_key)
+
+        if response is not None:
+            return response or None
+
+        response = DirectionsUtil.get(lat, lon, to_lat, to_lon)
+
+        if response is not None:
+            MetricsUtil.increment(DirectionsCacheUtil.database_hits_metric)
+            DirectionsCacheUtil.set_cached(cache_key, response)
+            return response
+
+        if DirectionsCacheUtil.is_upstream_down():
+            MetricsUtil.increment(DirectionsCacheUtil.upstream_skipped_metric)
+            return None
+
+        def read():
+            try:
+                return cache.get(DirectionsCacheUtil.get_key(cache_key))
+            except Exception:
+                return None
+
+        def compute():
+            MetricsUtil.increment(DirectionsCacheUtil.upstream_calls_metric)
+
+            try:
+                response = fetch()
+            except Exception as e:
+                logger.warning('Directions request failed: {}'.format(e))
+                DirectionsCacheUtil.mark_upstream_down()
+                return None
+
+            if response is not None:
+                DirectionsUtil.store(lat, lon, to_lat, to_lon, response)
+
+            DirectionsCacheUtil.set_cached(cache_key, response)
+
+            return response
+
+        # Concurrent requests for the same route wait for the one calling the API
+        response, coalesced = SingleFlightUtil.run(
+            DirectionsCacheUtil.get_key(cache_key), read, compute, DirectionsCacheUtil.lock_timeout,
+        )
+
+        if coalesced:
+            MetricsUtil.increment(DirectionsCacheUtil.coalesced_metric)
+            DirectionsCacheUtil.set_lru(cache_key, response)
+
+        return response or None
+
+    @staticmethod
+    def get_stats() -> dict:
+        """
+        Returns the hits of every layer, the API calls and the hit ratio.
+        Coalesced requests are API calls saved by waiting for a concurrent request of the same route.
+        """
+
+        stats = MetricsUtil.get(
+            DirectionsCacheUtil.lru_hits_metric,
+            DirectionsCacheUtil.shared_hits_metric,
+            DirectionsCacheUtil.database_hits_metric,
+            DirectionsCacheUtil.coalesced_metric,
+            DirectionsCacheUtil.upstream_calls_metric,
+        )
+
+        hits = sum(stats.values()) - stats[DirectionsCacheUtil.upstream_calls_metric]
+
+        stats.update(MetricsUtil.get(
+            DirectionsCacheUtil.upstream_failures_metric,
+            DirectionsCacheUtil.upstream_skipped_metric,
+        ))
+        total = hits + stats[DirectionsCacheUtil.upstream_calls_metric]
+
+        stats['ratio'] = hits / total if total else None
+
+        return stats
@@ -0,0 +1,160 @@
+import datetime
+import json
+import logging
+import zlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.jobs.models.stored_directions import StoredDirections
+
+logger = logging.getLogger(__name__)
+
+
+class DirectionsUtil:
+    """
+    Reads and writes the StoredDirections cache of Google Routes responses.
+
+    Origins and destinations are rounded to settings.DIRECTIONS_CACHE_PRECISION decimals (4 decimals is about 11 m),
+    so GPS jitter between requests for the same trip still hits the cache.
+
+    Responses are stored as columns (see to_columns) and rebuilt with the fields requested from Google.
+    """
+
+    @staticmethod
+    def get_cache_key(lat: float, lon: float, to_lat: float, to_lon: float) -> str:
+        precision = settings.DIRECTIONS_CACHE_PRECISION
+
+        return ','.join('{:.{}f}'.format(float(value), precision) for value in (lat, lon, to_lat, to_lon))
+
+    @staticmethod
+    def get_expiry_cutoff() -> datetime.datetime:
+        return timezone.now() - datetime.timedelta(days=settings.GOOGLE_DIRECTIONS_EXPIRES_IN_DAYS)
+
+    @staticmethod
+    def to_columns(directions_response: str) -> dict:
+        """
+        Splits a directions response into the StoredDirections columns.
+        """
+
+        try:
+            route = json.loads(directions_response)['routes'][0]
+        except (ValueError, KeyError, IndexError, TypeError):
+            return {'distance_meters': None, 'duration_seconds': None, 'polyline': None}
+
+        # Durations are formatted like '1234s'
+        duration = route.get('duration')
+        encoded_polyline = route.get('polyline', {}).get('encodedPolyline')
+
+        return {
+            'distance_meters': route.get('distanceMeters', 0),
+            'duration_seconds': round(float(duration.rstrip('s'))) if duration else None,
+            'polyline': zlib.compress(encoded_polyline.encode(), 9) if encoded_polyline else None,
+        }
+
+    @staticmethod
+    def to_response(distance_meters, duration_seconds, polyline) -> str:
+        """
+        Rebuilds the directions response of StoredDirections columns.
+        """
+
+        if distance_meters is None:
+            return json.dumps({})
+
+        route = {'distanceMeters': distance_meters}
+
+        if duration_seconds is not None:
+            route['duration'] = '{}s'.format(duration_seconds)
+
+        if polyline is not None:
+            route['polyline'] = {'encodedPolyline': zlib.decompress(bytes(polyline)).decode()}
+
+        return json.dumps({'routes': [route]})
+
+    @staticmethod
+    def get_valid(cache_keys):
+        return StoredDirections.objects.filter(
+            cache_key__in=list(cache_keys),
+            created_at__gte=DirectionsUtil.get_expiry_cutoff(),
+        )
+
+    @staticmethod
+    def get(lat: float, lon: float, to_lat: float, to_lon: float):
+        """
+        Returns the stored directions response between two points, or None when missing or expired.
+        """
+
+        columns = DirectionsUtil.get_valid([DirectionsUtil.get_cache_key(lat, lon, to_lat, to_lon)]).values_list(
+            'distance_meters', 'duration_seconds', 'polyline',
+        ).first()
+
+        return DirectionsUtil.to_response(*columns) if columns else None
+
+    @staticmethod
+    def get_distances(cache_keys) -> dict:
+        """
+        Returns the stored distances in meters of many trips in one query, by cache key.
+        Missing and expired trips, and trips without a route, are left out.
+        """
+
+        return dict(DirectionsUtil.get_valid(cache_keys).filter(
+            distance_meters__isnull=False,
+        ).values_list('cache_key', 'distance_meters'))
+
+    @staticmethod
+    def get_distance(lat: float, lon: float, to_lat: float, to_lon: float):
+        """
+        Returns the stored distance in meters between two points, or None when missing, expired or without a route.
+        """
+
+        cache_key = DirectionsUtil.get_cache_key(lat, lon, to_lat, to_lon)
+
+        return DirectionsUtil.get_distances([cache_key]).get(cache_key)
+
+    @staticmethod
+    def store(lat: float, lon: float, to_lat: float, to_lon: float, directions_response: str) -> None:
+        """
+        Stores a directions response, replacing the expired response of the same trip if any.
+        """
+
+        try:
+            with transaction.atomic():
+                StoredDirections.objects.update_or_create(
+                    cache_key=DirectionsUtil.get_cache_key(lat, lon, to_lat, to_lon),
+                    defaults={
+                        'from_lat': lat,
+                        'from_lon': lon,
+                        'to_lat': to_lat,
+                        'to_lon': to_lon,
+                        'created_at': timezone.now(),
+                        **DirectionsUtil.to_columns(directions_response),
+                    },
+                )
+        except IntegrityError:
+            # A concurrent request stored the same trip first
+            pass
+
+    @staticmethod
+    def purge_expired(batch_size: int = 1000) -> int:
+        """
+        Deletes the expired directions in batches, so no single statement locks a large part of the table.
+
+        Returns:
+        int: The number of deleted rows.
+        """
+
+        cutoff = DirectionsUtil.get_expiry_cutoff()
+        deleted_count = 0
+
+        while True:
+            ids = list(StoredDirections.objects.filter(created_at__lt=cutoff).values_list('id', flat=True)[:batch_size])
+
+            if not ids:
+                break
+
+            deleted_count += StoredDirections.objects.filter(id__in=ids).delete()[0]
+
+        logger.info('Purged {} expired directions'.format(deleted_count))
+
+        return deleted_count
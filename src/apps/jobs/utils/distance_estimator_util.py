@@ -0,0 +1,131 @@
+import logging
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.utils.geo_index_util import GeoIndexUtil
+from apps.core.utils.geo_util import GeoUtil
+from apps.jobs.models import DetourFactor, StoredDirections
+from apps.jobs.utils.directions_util import DirectionsUtil
+
+logger = logging.getLogger(__name__)
+
+
+class DistanceEstimatorUtil:
+    """
+    Estimates driving distances without Google, as the straight-line distance times the detour factor
+    of the region the trip starts in (see DetourFactor).
+
+    Used when the Routes API is failing, estimated distances are marked on the application
+    and replaced with real routes by the refine_estimated_distances task.
+    """
+
+    cache_key = 'detour_factors'
+
+    # Trips shorter than this in a straight line are dominated by the road layout around their ends, in km
+    min_fit_distance = 0.5
+
+    # Ratios outside this range come from ferries, closed roads or bad coordinates
+    max_fit_factor = 3.0
+
+    @staticmethod
+    def get_region(latitude: float, longitude: float) -> str:
+        return GeoIndexUtil.encode(latitude, longitude, settings.DISTANCE_ESTIMATOR_REGION_PRECISION)
+
+    @staticmethod
+    def fit(batch_size: int = 2000) -> dict:
+        """
+        Refits the detour factors from the directions that are not expired, using the median ratio of every region
+        with at least settings.DISTANCE_ESTIMATOR_MIN_SAMPLES trips.
+
+        Returns:
+        dict: The factors by region, '' being the factor of all trips.
+        """
+
+        ratios = {}
+
+        rows = StoredDirections.objects.filter(
+            created_at__gte=DirectionsUtil.get_expiry_cutoff(),
+            distance_meters__isnull=False,
+        ).values_list('from_lat', 'from_lon', 'to_lat', 'to_lon', 'distance_meters')
+
+        for from_lat, from_lon, to_lat, to_lon, distance_meters in rows.iterator(chunk_size=batch_size):
+            road_distance = distance_meters / 1000
+            straight_distance = GeoUtil.get_distance(from_lat, from_lon, to_lat, to_lon)
+
+            if straight_distance < DistanceEstimatorUtil.min_fit_distance:
+                continue
+
+            ratio = road_distance / straight_distance
+
+            if 1 <= ratio <= DistanceEstimatorUtil.max_fit_factor:
+                ratios.setdefault(DistanceEstimatorUtil.get_region(from_lat, from_lon), []).append(ratio)
+
+        all_ratios = [ratio for region_ratios in ratios.values() for ratio in region_ratios]
+
+        samples = {
+            region: region_ratios for region, region_ratios in ratios.items()
+            if len(region_ratios) >= settings.DISTANCE_ESTIMATOR_MIN_SAMPLES
+        }
+
+        if len(all_ratios) >= settings.DISTANCE_ESTIMATOR_MIN_SAMPLES:
+            samples[''] = all_ratios
+
+        now = timezone.now()
+
+        with transaction.atomic():
+            DetourFactor.objects.all().delete()
+            DetourFactor.objects.bulk_create([
+                DetourFactor(region=region, factor=float(np.median(values)), samples=len(values), updated_at=now)
+                for region, values in samples.items()
+            ])
+
+        cache.delete(DistanceEstimatorUtil.cache_key)
+
+        logger.info('Fitted detour factors for {} regions from {} trips'.format(len(samples), len(all_ratios)))
+
+        return DistanceEstimatorUtil.get_factors()
+
+    @staticmethod
+    def get_factors() -> dict:
+        """
+        Returns the fitted detour factors by region, read through the shared cache.
+        """
+
+        factors = cache.get(DistanceEstimatorUtil.cache_key)
+
+        if factors is None:
+            factors = dict(DetourFactor.objects.values_list('region', 'factor'))
+            cache.set(DistanceEstimatorUtil.cache_key, factors, timeout=None)
+
+        return factors
+
+    @staticmethod
+    def estimate(origins: list, destination: tuple) -> np.ndarray:
+        """
+        Estimates the driving distances from many origins to one destination.
+
+        Args:
+        origins (list): (latitude, longitude) tuples.
+        destination (tuple): The (latitude, longitude) of the destination.
+
+        Returns:
+        np.ndarray: The estimated distances in meters, in the order of the origins.
+        """
+
+        if not origins:
+            return np.zeros(0)
+
+        factors = DistanceEstimatorUtil.get_factors()
+        default_factor = factors.get('', settings.DISTANCE_ESTIMATOR_DEFAULT_FACTOR)
+
+        lats, lons = zip(*origins)
+
+        region_factors = np.array([
+            factors.get(DistanceEstimatorUtil.get_region(lat, lon), default_factor) for lat, lon in origins
+        ])
+
+        return GeoUtil.get_distances(destination[0], destination[1], lats, lons) * region_factors * 1000
@@ -0,0 +1,98 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.core.utils.metrics_util import MetricsUtil
+
+logger = logging.getLogger(__name__)
+
+
+class JobCacheUtil:
+    """
+    Caches rendered job model views (see JobUtil.to_model_view) in the shared cache.
+
+    Entries are keyed by job id and a format version. Bump the version whenever the job view changes shape,
+    so old entries are simply never read again. Entries are invalidated by the model signals in apps.jobs.signals.
+    """
+
+    version = 1
+
+    key_prefix = 'job_view'
+
+    hits_metric = 'job_view_cache.hits'
+    misses_metric = 'job_view_cache.misses'
+
+    @staticmethod
+    def get_key(job_id) -> str:
+        return '{}:{}:{}'.format(JobCacheUtil.key_prefix, JobCacheUtil.version, job_id)
+
+    @staticmethod
+    def get_many(job_ids) -> dict:
+        """
+        Reads the cached views of the given jobs in a single round trip.
+
+        Args:
+        job_ids (Iterable): The ids of the jobs to look up.
+
+        Returns:
+        dict: The cached views by job id. Jobs without a cached view are left out.
+        """
+
+        keys = {JobCacheUtil.get_key(job_id): job_id for job_id in job_ids}
+
+        if not keys:
+            return {}
+
+        try:
+            cached = cache.get_many(keys.keys())
+        except Exception as e:
+            logger.warning('Could not read job views from cache: {}'.format(e))
+            cached = {}
+
+        MetricsUtil.increment(JobCacheUtil.hits_metric, len(cached))
+        MetricsUtil.increment(JobCacheUtil.misses_metric, len(keys) - len(cached))
+
+        return {keys[key]: view for key, view in cached.items()}
+
+    @staticmethod
+    def set_many(views: dict) -> None:
+        """
+        Stores rendered views by job id.
+        """
+
+        try:
+            cache.set_many(
+                {JobCacheUtil.get_key(job_id): view for job_id, view in views.items()},
+                timeout=settings.JOB_VIEW_CACHE_TIMEOUT,
+            )
+        except Exception as e:
+            logger.warning('Could not write job views to cache: {}'.format(e))
+
+    @staticmethod
+    def invalidate(job_ids) -> None:
+        """
+        Drops the cached views of the given jobs.
+
+        The keys are deleted right away and once more when the surrounding transaction commits,
+        so a view rendered from not yet committed data in between is not kept.
+        """
+
+        keys = [JobCacheUtil.get_key(job_id) for job_id in set(job_ids)]
+
+        if not keys:
+            return
+
+        def delete():
+            try:
+                cache.delete_many(keys)
+            except Exception as e:
+                logger.warning('Could not invalidate job views: {}'.format(e))
+
+        delete()
+        transaction.on_commit(delete)
+
+    @staticmethod
+    def get_stats() -> dict:
+        return MetricsUtil.get_ratio(JobCacheUtil.hits_metric, JobCacheUtil.misses_metric)
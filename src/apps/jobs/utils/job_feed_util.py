@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.jobs.models import Job, JobApplication, JobApplicationState, JobFeedEntry
+from apps.jobs.utils.conflict_util import ConflictUtil
+
+
+class JobFeedUtil:
+    """
+    Maintains and reads the upcoming jobs feed of workers (see JobFeedEntry).
+
+    The feed is split in two parts:
+    - Job eligibility (archived, free places, tag) is precomputed in JobFeedEntry whenever a job is saved.
+    - Time windows and the applications of the worker change with time and per worker, so they are applied
+      when reading, as indexed range filters and anti-joins on the applications of that single worker.
+    """
+
+    @staticmethod
+    def get_eligible_jobs(jobs):
+        return jobs.filter(
+            archived=False,
+            selected_workers__lt=F('max_workers'),
+            tag__isnull=False,
+            application_start_time__isnull=False,
+            application_end_time__isnull=False,
+        )
+
+    @staticmethod
+    def build_entries(jobs) -> list:
+        return [
+            JobFeedEntry(
+                job_id=job['id'],
+                tag_id=job['tag_id'],
+                start_time=job['start_time'],
+                end_time=job['end_time'],
+                application_start_time=job['application_start_time'],
+                application_end_time=job['application_end_time'],
+            )
+            for job in JobFeedUtil.get_eligible_jobs(jobs).values(
+                'id', 'tag_id', 'start_time', 'end_time', 'application_start_time', 'application_end_time',
+            )
+        ]
+
+    @staticmethod
+    def sync_jobs(job_ids) -> None:
+        """
+        Brings the feed entries of the given jobs in line with the jobs themselves.
+        """
+
+        job_ids = list(set(job_ids))
+
+        if not job_ids:
+            return
+
+        with transaction.atomic():
+            JobFeedEntry.objects.filter(job_id__in=job_ids).delete()
+            JobFeedEntry.objects.bulk_create(JobFeedUtil.build_entries(Job.objects.filter(id__in=job_ids)))
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Rebuilds the whole feed from the jobs table, dropping jobs that already started.
+
+        Returns:
+        int: The number of entries in the feed.
+        """
+
+        jobs = Job.objects.filter(start_time__gt=timezone.now())
+
+        with transaction.atomic():
+            JobFeedEntry.objects.all().delete()
+
+            return len(JobFeedEntry.objects.bulk_create(JobFeedUtil.build_entries(jobs), batch_size=1000))
+
+    @staticmethod
+    def get_worker_feed(worker):
+        """
+        Returns the jobs the worker can apply to right now: started jobs, closed application windows,
+        jobs the worker already applied to and jobs conflicting with an approved job of the worker (see ConflictUtil)
+        are left out.
+
+        Args:
+        worker (User): The worker.
+
+        Returns:
+        QuerySet: The feed entries, ordered by start time.
+        """
+
+        now = timezone.now()
+
+        applied_jobs = JobApplication.objects.filter(
+            worker=worker,
+            application_state__in=[JobApplicationState.pending, JobApplicationState.approved],
+        ).values('job_id')
+
+        overlapping_approved_jobs = JobApplication.objects.filter(
+            worker=worker,
+            application_state=JobApplicationState.approved,
+        ).filter(
+            ConflictUtil.overlaps(OuterRef('start_time'), Coalesce(OuterRef('end_time'), OuterRef('start_time'))),
+        )
+
+        return JobFeedEntry.objects.filter(
+            tag__in=worker.worker_profile.tags.all(),
+            start_time__gt=now,
+            application_start_time__lte=now,
+            application_end_time__gte=now,
+        ).exclude(
+            job_id__in=applied_jobs,
+        ).exclude(
+            Exists(overlapping_approved_jobs),
+        ).order_by('start_time', 'job_id')
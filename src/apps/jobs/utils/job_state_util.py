@@ -0,0 +1,124 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.utils.count_util import CountUtil
+from apps.core.utils.metrics_util import MetricsUtil
+from apps.jobs.models import Job, JobState
+from apps.jobs.utils.job_cache_util import JobCacheUtil
+from apps.jobs.utils.job_feed_util import JobFeedUtil
+
+logger = logging.getLogger(__name__)
+
+
+class JobStateUtil:
+    """
+    Moves jobs through their lifecycle as time passes, so reading endpoints never have to change job states.
+
+    Every rule moves the jobs in its source states that match its condition to its target state,
+    with a single set-based UPDATE. Rules are applied in order, so a job whose whole schedule passed
+    since the last run moves through every state in one run. Drafts and archived jobs are left alone.
+    """
+
+    metric_prefix = 'job_state'
+
+    # (name, source states, target state, condition built from the current time)
+    rules = [
+        (
+            'applications_closed',
+            [JobState.pending],
+            JobState.fulfilled,
+            lambda now: Q(application_end_time__lte=now, selected_workers__gt=0),
+        ),
+        (
+            'started',
+            [JobState.pending, JobState.fulfilled],
+            JobState.ongoing,
+            lambda now: Q(start_time__lte=now, selected_workers__gt=0),
+        ),
+        (
+            'started_without_workers',
+            [JobState.pending, JobState.fulfilled],
+            JobState.cancelled,
+            lambda now: Q(start_time__lte=now) & (Q(selected_workers=0) | Q(selected_workers__isnull=True)),
+        ),
+        (
+            'ended',
+            [JobState.ongoing],
+            JobState.done,
+            lambda now: Q(end_time__lte=now, selected_workers__gt=0),
+        ),
+        (
+            'ended_without_workers',
+            [JobState.ongoing],
+            JobState.cancelled,
+            lambda now: Q(end_time__lte=now) & (Q(selected_workers=0) | Q(selected_workers__isnull=True)),
+        ),
+    ]
+
+    @staticmethod
+    def get_metric(rule_name: str) -> str:
+        return '{}.{}'.format(JobStateUtil.metric_prefix, rule_name)
+
+    @staticmethod
+    def get_jobs(sources, condition):
+        return Job.objects.filter(condition, job_state__in=sources, is_draft=False, archived=False)
+
+    @staticmethod
+    def transition(now=None, dry_run: bool = False) -> dict:
+        """
+        Applies every lifecycle rule.
+
+        The UPDATEs bypass the model signals, so the job view cache, the worker feed and the count generation
+        of the jobs table are brought up to date here for the moved jobs.
+
+        Args:
+        now (datetime): The time to evaluate the rules at, the current time by default.
+        dry_run (bool): Only count the jobs each rule would move. Rules are then evaluated on the current states,
+            so a job is only counted for the first rule it matches.
+
+        Returns:
+        dict: The number of jobs moved (or to move) by each rule.
+        """
+
+        now = now or timezone.now()
+
+        counts = {}
+        moved = set()
+
+        with transaction.atomic():
+            for name, sources, target, condition in JobStateUtil.rules:
+                jobs = JobStateUtil.get_jobs(sources, condition(now))
+
+                if dry_run:
+                    counts[name] = jobs.exclude(id__in=moved).count()
+                    moved.update(jobs.values_list('id', flat=True))
+                    continue
+
+                job_ids = list(jobs.select_for_update().values_list('id', flat=True))
+
+                counts[name] = Job.objects.filter(id__in=job_ids).update(job_state=target, modified_at=now)
+                moved.update(job_ids)
+
+            if moved and not dry_run:
+                JobCacheUtil.invalidate(moved)
+                JobFeedUtil.sync_jobs(moved)
+                CountUtil.bump_generation(Job._meta.db_table)
+
+        if not dry_run:
+            for name, count in counts.items():
+                MetricsUtil.increment(JobStateUtil.get_metric(name), count)
+
+            MetricsUtil.increment(JobStateUtil.get_metric('runs'))
+
+        logger.info('Job state transitions{}: {}'.format(' (dry run)' if dry_run else '', counts))
+
+        return counts
+
+    @staticmethod
+    def get_stats() -> dict:
+        return MetricsUtil.get(
+            JobStateUtil.get_metric('runs'), *[JobStateUtil.get_metric(rule[0]) for rule in JobStateUtil.rules]
+        )
@@ -1,25 +1,121 @@
 import datetime
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
 
 User = get_user_model()
 from apps.core.utils.formatters import FormattingUtil
 from apps.core.utils.wire_names import *
 from apps.authentication.utils.customer_util import CustomerUtil
+from apps.jobs.utils.job_cache_util import JobCacheUtil
 from apps.jobs.models.time_registration import TimeRegistration
 
 
 class JobUtil:
 
+    # Forward relations rendered by to_model_view, joined in when serializing a queryset
+    select_related_fields = [
+        'address',
+        'tag',
+        'customer__customer_profile__customer_address',
+        'customer__customer_profile__customer_billing_address',
+        'customer__customer_profile__tag',
+    ]
+
+    # Reverse relations rendered by to_model_view, fetched with one query per level
+    prefetch_related_fields = [
+        Prefetch(
+            'worked_times',
+            queryset=TimeRegistration.objects.select_related('worker__worker_profile__worker_address'),
+        ),
+        'worked_times__worker__worker_profile__tags',
+    ]
+
+    # Summary view keys and the columns they are projected from
+    summary_columns = {
+        k_id: ['id'],
+        k_title: ['title'],
+        k_start_time: ['start_time'],
+        k_end_time: ['end_time'],
+        k_application_start_time: ['application_start_time'],
+        k_application_end_time: ['application_end_time'],
+        k_city: ['address__city'],
+        k_max_workers: ['max_workers'],
+        k_selected_workers: ['selected_workers'],
+        k_state: ['job_state'],
+        k_tag: ['tag__id', 'tag__title', 'tag__color', 'tag__icon'],
+    }
+
+    @staticmethod
+    def get_summary_columns(fields, prefix: str = ''):
+        return ['{}{}'.format(prefix, column) for field in fields for column in JobUtil.summary_columns[field]]
+
+    @staticmethod
+    def build_summary_view(row: dict, fields, prefix: str = ''):
+        """
+        Builds a job summary from a values() row, see to_summary_views.
+
+        Args:
+        row (dict): The projected row.
+        fields (Iterable[str]): The summary keys to include.
+        prefix (str): The lookup prefix of the job columns in the row, e.g. 'job__' for applications.
+        """
+
+        view = {}
+
+        for field in fields:
+            if field == k_tag:
+                tag_id = row['{}tag__id'.format(prefix)]
+                view[k_tag] = {
+                    'id': tag_id,
+                    'title': row['{}tag__title'.format(prefix)],
+                    'color': row['{}tag__color'.format(prefix)],
+                    'icon': row['{}tag__icon'.format(prefix)],
+                } if tag_id else None
+            elif field in (k_start_time, k_end_time, k_application_start_time, k_application_end_time):
+                view[field] = FormattingUtil.to_timestamp(row[prefix + JobUtil.summary_columns[field][0]])
+            else:
+                view[field] = row[prefix + JobUtil.summary_columns[field][0]]
+
+        return view
+
+    @staticmethod
+    def to_summary_views(jobs, fields=None):
+        """
+        Renders lightweight job summaries for list screens straight from a values() projection,
+        without loading customers, time registrations or any other related model.
+
+        Args:
+        jobs (QuerySet): The jobs to summarize.
+        fields (Iterable[str]): The summary keys to include, all of summary_columns by default.
+
+        Returns:
+        list: The job summaries, in the order of the queryset.
+        """
+
+        fields = list(fields or JobUtil.summary_columns.keys())
+
+        return [JobUtil.build_summary_view(row, fields) for row in jobs.values(*JobUtil.get_summary_columns(fields))]
+
     @staticmethod
     def to_model_view(job):
-        customer = User.objects.get(id=job.customer_id)
+        """
+        Returns the model view of a single job, read through the job view cache.
+        """
+
+        return JobUtil.to_model_views([job])[0]
+
+    @staticmethod
+    def build_model_view(job):
+        """
+        Renders the model view of a job from its relations, without using the job view cache.
+        """
+
+        customer = job.customer
         address1 = job.address
 
         registrations = []
 
-        time_registrations = TimeRegistration.objects.filter(job_id=job.id)
-
-        for registration in time_registrations:
+        for registration in job.worked_times.all():
             registrations.append(registration.to_model_view())
 
         return {
@@ -48,3 +144,37 @@ class JobUtil:
             k_tag: job.tag.to_model_view() if job.tag else None,
             k_customer: CustomerUtil.to_customer_view(customer),
         }
+
+    @staticmethod
+    def to_model_views(jobs):
+        """
+        Serializes a collection of jobs to the same format as to_model_view.
+
+        Cached views are read in one batch. The remaining jobs get every related model loaded up front,
+        so the query count does not grow with the number of jobs, and are written back to the cache.
+
+        Args:
+        jobs (QuerySet | Iterable[Job]): A queryset, page or list of jobs.
+
+        Returns:
+        list: The job model views, in the order of the given jobs.
+        """
+
+        if isinstance(jobs, QuerySet):
+            jobs = list(jobs.select_related(*JobUtil.select_related_fields))
+        else:
+            jobs = list(jobs)
+
+        views = JobCacheUtil.get_many([job.id for job in jobs])
+
+        missing = [job for job in jobs if job.id not in views]
+
+        if missing:
+            prefetch_related_objects(missing, *JobUtil.select_related_fields, *JobUtil.prefetch_related_fields)
+
+            rendered = {job.id: JobUtil.build_model_view(job) for job in missing}
+
+            JobCacheUtil.set_many(rendered)
+            views.update(rendered)
+
+        return [views[job.id] for job in jobs]
@@ -1,14 +1,16 @@
 from http import HTTPStatus
-import requests
 
 from django.shortcuts import get_object_or_404
-from django.conf import settings
 from django.utils import timezone
 
 from apps.authentication.views import JWTBaseAuthView
 from apps.core.assumptions import *
 from apps.core.model_exceptions import DeserializationException
+from apps.core.utils.count_util import CountUtil
 from apps.core.utils.formatters import FormattingUtil
+from apps.core.utils.maps_proxy_util import MapsProxyUtil
+from apps.core.utils.pagination_util import PaginationUtil
+from apps.core.utils.projection_util import ProjectionUtil
 from apps.core.utils.wire_names import *
 from apps.jobs.services.contract_service import JobApplicationService
 from apps.jobs.services.job_service import JobService
@@ -16,7 +18,6 @@ from apps.jobs.models.dimona import Dimona
 from apps.jobs.models.job import Job
 from apps.jobs.models.time_registration import TimeRegistration
 from apps.jobs.models.tag import Tag
-from django.core.paginator import Paginator
 from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, HttpResponseNotFound, Http404
 from rest_framework.response import Response
 from apps.authentication.utils.worker_util import WorkerUtil
@@ -26,6 +27,9 @@ from apps.jobs.models.job_application_state import JobApplicationState
 from apps.jobs.services.statistics_service import StatisticsService
 from apps.core.models.export_file import ExportFile
 from apps.jobs.services.export_service import ExportManager
+from apps.jobs.utils.application_util import ApplicationUtil
+from apps.jobs.utils.approval_pipeline_util import ApprovalPipelineUtil
+from apps.jobs.utils.job_util import JobUtil
 
 
 class JobView(JWTBaseAuthView):
@@ -145,13 +149,35 @@ class UpcomingJobsView(JWTBaseAuthView):
         """
         Handle GET request to retrieve upcoming jobs for workers.
 
+        Supports ?view=summary and ?fields=... to return job summaries instead of full job views.
+        Supports ?radius_km=... to only return jobs near the worker, and ?sort=distance to rank them by distance.
+        Both add the distance from the home address of the worker to every job.
+
         Args:
             request (HttpRequest): The HTTP request object.
 
         Returns:
             Response: A response object containing the list of upcoming jobs.
         """
-        jobs = JobService.get_upcoming_jobs(self.user, is_worker=True)
+        summary_fields = ProjectionUtil.get_summary_fields(request, JobUtil.summary_columns)
+
+        radius_km = request.GET.get(k_radius_km)
+
+        try:
+            radius_km = float(radius_km) if radius_km is not None else None
+
+            if radius_km is not None and not radius_km >= 0:
+                raise ValueError(radius_km)
+        except ValueError:
+            return Response({k_message: 'Invalid radius'}, status=HTTPStatus.BAD_REQUEST)
+
+        jobs = JobService.get_upcoming_jobs(
+            self.user,
+            is_worker=True,
+            summary_fields=summary_fields,
+            radius_km=radius_km,
+            sort_by_distance=request.GET.get(k_sort) == k_distance,
+        )
         return Response({k_jobs: jobs})
 
 
@@ -172,6 +198,8 @@ class AllUpcomingJobsView(JWTBaseAuthView):
         """
         Handle GET request to retrieve upcoming jobs for admin users.
 
+        Supports ?view=summary and ?fields=... to return job summaries instead of full job views.
+
         Args:
             request (HttpRequest): The HTTP request object.
             *args: Additional positional arguments.
@@ -183,7 +211,9 @@ class AllUpcomingJobsView(JWTBaseAuthView):
         formatter = FormattingUtil(kwargs)
         start = formatter.get_date(value_key=k_start)
         end = formatter.get_date(value_key=k_end)
-        jobs = JobService.get_upcoming_jobs(self.user, is_worker=False, start=start, end=end)
+        summary_fields = ProjectionUtil.get_summary_fields(request, JobUtil.summary_columns)
+        jobs = JobService.get_upcoming_jobs(self.user, is_worker=False, start=start, end=end,
+                                            summary_fields=summary_fields)
         return Response({k_jobs: jobs})
 
 
@@ -366,6 +396,8 @@ class ActiveJobList(JWTBaseAuthView):
         """
         Handle GET request to retrieve active jobs.
 
+        Supports ?view=summary and ?fields=... to return job summaries instead of full job views.
+
         Args:
             request (HttpRequest): The HTTP request object.
             *args: Additional positional arguments.
@@ -374,7 +406,8 @@ class ActiveJobList(JWTBaseAuthView):
         Returns:
             Response: A response object containing the list of active jobs.
         """
-        jobs = JobService.get_active_jobs()
+        summary_fields = ProjectionUtil.get_summary_fields(request, JobUtil.summary_columns)
+        jobs = JobService.get_active_jobs(summary_fields=summary_fields)
         return Response({k_jobs: jobs})
 
 
@@ -398,20 +431,24 @@ class WorkersForJobView(JWTBaseAuthView):
         except KeyError:
             return HttpResponseNotFound()
 
-        applications = JobApplication.objects.filter(job_id=job.id)
-
-        workers = []
+        applications = JobApplication.objects.filter(
+            job_id=job.id,
+            application_state=JobApplicationState.approved,
+        ).select_related('worker')
 
-        for application in applications:
-            if application.application_state == JobApplicationState.approved:
-                workers.append(WorkerUtil.to_worker_view(application.worker))
+        workers = WorkerUtil.to_worker_views([application.worker for application in applications])
 
-        registrations = []
+        time_registrations = list(TimeRegistration.objects.filter(job_id=job.id).select_related('worker'))
 
-        time_registrations = TimeRegistration.objects.filter(job_id=job.id)
+        registration_workers = {
+            registration.worker_id: registration.worker for registration in time_registrations if registration.worker_id
+        }
+        worker_views = dict(zip(registration_workers.keys(), WorkerUtil.to_worker_views(registration_workers.values())))
 
-        for time_registration in time_registrations:
-            registrations.append(time_registration.to_model_view())
+        registrations = [
+            time_registration.to_model_view(worker_view=worker_views.get(time_registration.worker_id))
+            for time_registration in time_registrations
+        ]
 
         return Response(
             {
@@ -438,6 +475,8 @@ class DoneJobList(JWTBaseAuthView):
         """
         Handle GET request to retrieve done jobs.
 
+        Supports ?view=summary and ?fields=... to return job summaries instead of full job views.
+
         Args:
             request (HttpRequest): The HTTP request object.
             *args: Additional positional arguments.
@@ -449,7 +488,8 @@ class DoneJobList(JWTBaseAuthView):
         formatter = FormattingUtil(kwargs)
         start = formatter.get_date(value_key=k_start)
         end = formatter.get_date(value_key=k_end)
-        jobs = JobService.get_done_jobs(start, end)
+        summary_fields = ProjectionUtil.get_summary_fields(request, JobUtil.summary_columns)
+        jobs = JobService.get_done_jobs(start, end, summary_fields=summary_fields)
         return Response({k_jobs: jobs})
 
 
@@ -559,6 +599,36 @@ class ApproveApplicationView(JWTBaseAuthView):
         return Response()
 
 
+class ApprovalStatusView(JWTBaseAuthView):
+    """
+    [CMS, Workers]
+
+    GET
+
+    A view for following the background stages of an approved application.
+    Workers only see their own applications.
+    """
+
+    groups = [
+        CMS_GROUP_NAME,
+        WORKERS_GROUP_NAME,
+    ]
+
+    def get(self, request: HttpRequest, *args, **kwargs):
+        """
+        Handle GET request to retrieve the approval progress of an application.
+
+        Returns:
+            Response: A response object with the application state and the state of every approval stage.
+        """
+        application = get_object_or_404(JobApplication, id=kwargs['id'])
+
+        if self.group.name != CMS_GROUP_NAME and application.worker_id != self.user.id:
+            raise Http404()
+
+        return Response(ApprovalPipelineUtil.get_status(application))
+
+
 class DenyApplicationView(JWTBaseAuthView):
     """
     [ALL]
@@ -589,6 +659,42 @@ class DenyApplicationView(JWTBaseAuthView):
 
 
 
+class BulkApplicationsView(JWTBaseAuthView):
+    """
+    [CMS]
+
+    POST
+
+    A view for approving and denying many applications at once, e.g. to staff a whole job.
+    """
+
+    app_types = [
+        CMS_GROUP_NAME,
+    ]
+
+    def post(self, request: HttpRequest, *args, **kwargs):
+        """
+        Handle POST request to approve and deny applications.
+
+        Args:
+            request (HttpRequest): The HTTP request object, with the ids of the applications to approve and to deny.
+
+        Returns:
+            Response: A response object with the result of every application.
+        """
+        formatter = FormattingUtil(data=request.data)
+
+        approve_ids = formatter.get_value(k_approve) or []
+        deny_ids = formatter.get_value(k_deny) or []
+
+        if not isinstance(approve_ids, list) or not isinstance(deny_ids, list) or not (approve_ids or deny_ids):
+            return Response({k_message: 'Expected lists of application ids'}, status=HTTPStatus.BAD_REQUEST)
+
+        results = JobApplicationService.update_applications(approve_ids, deny_ids)
+
+        return Response({k_results: results})
+
+
 class MyApplicationsView(JWTBaseAuthView):
     """
     [Workers]
@@ -648,6 +754,9 @@ class ApplicationsListView(JWTBaseAuthView):
         """
         Handle GET request to retrieve the list of applications.
 
+        Supports ?view=summary and ?fields=... to return application summaries instead of full application views.
+        Supports ?cursor=... or ?page=...&count=... to return a single page, every application is returned otherwise.
+
         Args:
             request (HttpRequest): The HTTP request object.
             *args: Additional positional arguments.
@@ -657,10 +766,53 @@ class ApplicationsListView(JWTBaseAuthView):
             Response: A response object containing the list of applications.
         """
         applications = JobApplicationService.get_applications_list(kwargs.get('job_id'))
-        paginator = Paginator(applications, per_page=25)
-        data = [application.to_model_view() for application in applications]
+        summary_fields = ProjectionUtil.get_summary_fields(request, ApplicationUtil.summary_columns)
+
+        ordering = ['job__start_time', 'id']
+        per_page = 25
+
+        cursor = request.GET.get(k_cursor)
+        page = request.GET.get(k_page)
+        count = request.GET.get(k_count)
+
+        try:
+            page = int(page) if page is not None else 1
+            per_page = int(count) if count is not None else per_page
+        except ValueError:
+            return Response({k_message: 'Invalid page'}, status=HTTPStatus.BAD_REQUEST)
 
-        return Response({k_applications: data, k_items_per_page: paginator.per_page, k_total: len(applications)})
+        # Clients that do not paginate get every application, like before cursors existed
+        paginated = cursor is not None or k_page in request.GET or k_count in request.GET
+
+        try:
+            if paginated:
+                # Only the sort key is loaded to find the page, the applications are loaded afterwards
+                page_items, next_cursor = PaginationUtil.paginate(
+                    applications.select_related('job').only('id', 'job__start_time'),
+                    ordering,
+                    per_page=per_page,
+                    cursor=cursor,
+                    page=page,
+                )
+                selected = applications.filter(id__in=[application.id for application in page_items])
+            else:
+                selected, next_cursor = applications, None
+        except DeserializationException as e:
+            return Response({k_message: e.args}, status=HTTPStatus.BAD_REQUEST)
+
+        selected = selected.order_by(*PaginationUtil.get_order_by(ordering))
+
+        if summary_fields:
+            data = ApplicationUtil.to_summary_views(selected, summary_fields)
+        else:
+            data = ApplicationUtil.to_model_views(selected.select_related(*ApplicationUtil.select_related_fields))
+
+        return Response({
+            k_applications: data,
+            k_items_per_page: per_page,
+            k_total: CountUtil.get_total(applications),
+            k_next_cursor: next_cursor,
+        })
 
 
 
@@ -718,17 +870,11 @@ class ReverseGeocodeView(JWTBaseAuthView):
         except KeyError:
             pass
 
-        response = requests.get(
-            url="{}/maps/api/geocode/json?latlng={}&key={}".format(
-                settings.GOOGLE_BASE_URL,
-                query,
-                settings.GOOGLE_API_KEY,
-            ),
-        )
+        content = MapsProxyUtil.get('reverse_geocode', query or '')
 
-        if response.ok:
+        if content is not None:
             return HttpResponse(
-                response.content,
+                content,
             )
 
         return HttpResponseBadRequest()
@@ -751,17 +897,11 @@ class GeocodeView(JWTBaseAuthView):
         except KeyError:
             pass
 
-        response = requests.get(
-            url="{}/maps/api/geocode/json?address={}&key={}".format(
-                settings.GOOGLE_BASE_URL,
-                query,
-                settings.GOOGLE_API_KEY,
-            ),
-        )
+        content = MapsProxyUtil.get('geocode', query or '')
 
-        if response.ok:
+        if content is not None:
             return HttpResponse(
-                response.content,
+                content,
             )
 
         return HttpResponseBadRequest()
@@ -784,19 +924,11 @@ class AutocompleteView(JWTBaseAuthView):
         except KeyError:
             pass
 
-        response = requests.get(
-            url="{}/maps/api/place/textsearch/json?input={}&region={}&key={}".format(
-                settings.GOOGLE_BASE_URL,
-                query,
-                "be",
-                settings.GOOGLE_API_KEY,
+        content = MapsProxyUtil.get('autocomplete', query or '')
 
-            ),
-        )
-
-        if response.ok:
+        if content is not None:
             return HttpResponse(
-                response.content,
+                content,
             )
 
         return HttpResponseBadRequest()
@@ -825,21 +957,35 @@ class DimonaListView(JWTBaseAuthView):
         except KeyError:
             pass
 
-        dimonas = Dimona.objects.all().order_by("-created")
+        dimonas = Dimona.objects.select_related(
+            *['application__{}'.format(field) for field in ApplicationUtil.select_related_fields]
+        )
+
+        try:
+            dimonas_page, next_cursor = PaginationUtil.paginate(
+                dimonas,
+                ['-created', '-id'],
+                per_page=item_count,
+                cursor=request.GET.get(k_cursor),
+                page=page,
+            )
+        except DeserializationException as e:
+            return Response({k_message: e.args}, status=HTTPStatus.BAD_REQUEST)
 
-        paginator = Paginator(dimonas, per_page=item_count)
+        application_views = ApplicationUtil.to_model_views([dimona.application for dimona in dimonas_page])
 
         data = []
 
-        for dimona in paginator.page(page).object_list:
-            data.append(dimona.to_model_view())
+        for dimona, application_view in zip(dimonas_page, application_views):
+            data.append(dimona.to_model_view(application_view=application_view))
 
         # Return the washer id
         return Response(
             {
                 k_dimonas: data,
-                k_items_per_page: paginator.per_page,
-                k_total: len(dimonas),
+                k_items_per_page: item_count,
+                k_total: CountUtil.get_total(Dimona.objects.all()),
+                k_next_cursor: next_cursor,
             }
         )
 
@@ -898,16 +1044,21 @@ class CustomerJobHistoryView(JWTBaseAuthView):
         except (KeyError, ValueError):
             return HttpResponseBadRequest()
 
-        result = JobService.get_customer_job_history(
-            customer_id=customer_id,
-            page=page,
-            per_page=per_page
-        )
+        try:
+            result = JobService.get_customer_job_history(
+                customer_id=customer_id,
+                page=page,
+                per_page=per_page,
+                cursor=request.GET.get(k_cursor),
+            )
+        except DeserializationException as e:
+            return Response({k_message: e.args}, status=HTTPStatus.BAD_REQUEST)
 
         return Response({
             k_jobs: result['jobs'],
             k_total: result['total'],
-            k_items_per_page: result['items_per_page']
+            k_items_per_page: result['items_per_page'],
+            k_next_cursor: result['next_cursor'],
         })
 
 
@@ -944,11 +1095,15 @@ class WasherJobHistoryView(JWTBaseAuthView):
         except (KeyError, ValueError):
             return HttpResponseBadRequest()
 
-        result = JobService.get_washer_job_history(
-            worker_id=worker_id,
-            page=page,
-            per_page=per_page
-        )
+        try:
+            result = JobService.get_washer_job_history(
+                worker_id=worker_id,
+                page=page,
+                per_page=per_page,
+                cursor=request.GET.get(k_cursor),
+            )
+        except DeserializationException as e:
+            return Response({k_message: e.args}, status=HTTPStatus.BAD_REQUEST)
 
         return Response(result)
 
@@ -987,29 +1142,38 @@ class ExportsView(JWTBaseAuthView):
         except KeyError:
             pass
 
+        ordering = ["-created", "-id"]
+
         if sort_term is not None:
             if algorithm == "descending":
                 sort_term = "-{}".format(sort_term)
 
-            export_files = ExportFile.objects.all().order_by(sort_term)
+            ordering = [sort_term, "-id"]
 
-        else:
-            export_files = ExportFile.objects.all().order_by("-created")
+        export_files = ExportFile.objects.all()
 
-        paginator = Paginator(export_files, per_page=item_count)
+        try:
+            exports_page, next_cursor = PaginationUtil.paginate(
+                export_files,
+                ordering,
+                per_page=item_count,
+                cursor=request.GET.get(k_cursor),
+                page=page,
+            )
+        except DeserializationException as e:
+            return Response({k_message: e.args}, status=HTTPStatus.BAD_REQUEST)
 
         data = []
 
-        for export in paginator.page(page).object_list:
+        for export in exports_page:
             data.append(export.to_model_view())
 
         return Response(
             data={
                 k_exports: data,
-                k_items_per_page: paginator.per_page,
-                k_total: len(
-                    export_files,
-                ),
+                k_items_per_page: item_count,
+                k_total: CountUtil.get_total(export_files),
+                k_next_cursor: next_cursor,
             }
         )
 
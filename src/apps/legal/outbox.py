@@ -0,0 +1,23 @@
+"""
+Link2Prisma calls carried out through the outbox, see OutboxUtil.
+"""
+
+from apps.core.utils.outbox_util import OutboxUtil
+
+
+def cancel_dimona(application_id: str) -> None:
+    from apps.jobs.models import JobApplication
+    from apps.legal.services.link2prisma_service import Link2PrismaService
+
+    application = JobApplication.objects.select_related('worker__worker_profile').get(id=application_id)
+
+    if not Link2PrismaService.handle_job_cancellation(application):
+        raise Exception('Dimona cancellation failed')
+
+
+def record_dimona_cancellation(application) -> None:
+    """
+    Records the cancellation of the Dimona declaration of an application, if it has one.
+    """
+
+    OutboxUtil.record('link2prisma', 'apps.legal.outbox.cancel_dimona', application_id=str(application.id))
@@ -1,14 +1,47 @@
+import atexit
 import os
 import requests
+import shutil
 import tempfile
 from cryptography.hazmat.primitives.serialization import pkcs12
 from django.conf import settings
+from apps.core.utils.http_client_util import HttpClientUtil
 from apps.notifications.managers.notification_manager import NotificationManager
 from apps.authentication.models.profiles.worker_profile import WorkerProfile
 
 
+# Extracted certificate and key files by PFX path, kept for the lifetime of the process
+# so requests reuse the pooled connections of their client certificate
+extracted_certs = {}
+
+# Private directory (mode 0700) of the extracted files, removed when the process exits
+extracted_certs_dir = None
+
+
+def remove_extracted_certs():
+    if extracted_certs_dir:
+        shutil.rmtree(extracted_certs_dir, ignore_errors=True)
+
+    extracted_certs.clear()
+
+
+def write_private_file(directory, suffix, data):
+    """Writes data to a new file only the current user can read (mode 0600)"""
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+
+    with os.fdopen(fd, 'wb') as file:
+        file.write(data)
+
+    return path
+
+
 def get_cert_and_key(pfx_path):
     """Extract certificate and private key from PFX file"""
+    global extracted_certs_dir
+
+    if pfx_path in extracted_certs and all(os.path.exists(path) for path in extracted_certs[pfx_path]):
+        return extracted_certs[pfx_path]
+
     try:
         # Read PFX file
         with open(pfx_path, 'rb') as pfx_file:
@@ -17,27 +50,33 @@ def get_cert_and_key(pfx_path):
         # Load PFX without password
         private_key, certificate, _ = pkcs12.load_key_and_certificates(pfx_data, None)
         
-        # Create temporary files
-        cert_temp = tempfile.NamedTemporaryFile(delete=False)
-        key_temp = tempfile.NamedTemporaryFile(delete=False)
-        
+        if extracted_certs_dir is None or not os.path.isdir(extracted_certs_dir):
+            extracted_certs_dir = tempfile.mkdtemp(prefix='link2prisma-')
+
         # Write certificate
-        cert_temp.write(certificate.public_bytes(encoding=pkcs12.serialization.Encoding.PEM))
-        cert_temp.close()
-        
+        cert_path = write_private_file(
+            extracted_certs_dir, '-cert.pem',
+            certificate.public_bytes(encoding=pkcs12.serialization.Encoding.PEM),
+        )
+
         # Write private key
-        key_temp.write(private_key.private_bytes(
+        key_path = write_private_file(extracted_certs_dir, '-key.pem', private_key.private_bytes(
             encoding=pkcs12.serialization.Encoding.PEM,
             format=pkcs12.serialization.PrivateFormat.PKCS8,
             encryption_algorithm=pkcs12.serialization.NoEncryption()
         ))
-        key_temp.close()
-        
-        return (cert_temp.name, key_temp.name)
+
+        extracted_certs[pfx_path] = (cert_path, key_path)
+
+        return extracted_certs[pfx_path]
     except Exception as e:
         print(f"Error extracting certificate and key: {str(e)}")
         raise
 
+
+atexit.register(remove_extracted_certs)
+
+
 def truncate(value, max_length):
     """Helper function to truncate strings to max length"""
     return str(value)[:max_length] if value else ""
@@ -67,7 +106,8 @@ class Link2PrismaService:
                 headers = {
                     'Employer': employer_ref
                 }
-                response = requests.request(
+                response = HttpClientUtil.request(
+                    'link2prisma',
                     method=method,
                     url=url,
                     data=json.dumps(data),  # Raw JSON string
@@ -80,7 +120,8 @@ class Link2PrismaService:
                 headers = {
                     'Employer': employer_ref
                 }
-                response = requests.request(
+                response = HttpClientUtil.request(
+                    'link2prisma',
                     method=method,
                     url=url,
                     headers=headers,
@@ -88,86 +129,78 @@ class Link2PrismaService:
                     verify=True
                 )
 
-            try:
-                print(f"Response status: {response.status_code}")
-                print(f"Response headers: {response.headers}")
-                print(f"Response content: {response.content}")
-                print(f"Response text: {response.text}")
-                
-                if response.ok:
-                    # For POST requests, check if we get a 202 Accepted with UniqueIdentifier
-                    if response.status_code == 202:
-                        # Link2Prisma returns 202 for async operations
-                        if response.content:
-                            try:
-                                json_response = response.json()
-                                # If the JSON response is a string, it's a UniqueIdentifier
-                                if isinstance(json_response, str):
-                                    return {"UniqueIdentifier": json_response}
-                                else:
-                                    return json_response
-                            except:
-                                # If not JSON, return the text as UniqueIdentifier
-                                unique_id = response.text.strip().replace('"', '')
-                                return {"UniqueIdentifier": unique_id}
-                        else:
-                            return {"UniqueIdentifier": "no-id"}
-                    
-                    return response.json() if response.content else None
-                
-                # Handle 400 status - Link2Prisma returns 400 with UniqueIdentifier for queued operations
-                if response.status_code == 400:
+            print(f"Response status: {response.status_code}")
+            print(f"Response headers: {response.headers}")
+            print(f"Response content: {response.content}")
+            print(f"Response text: {response.text}")
+            
+            if response.ok:
+                # For POST requests, check if we get a 202 Accepted with UniqueIdentifier
+                if response.status_code == 202:
+                    # Link2Prisma returns 202 for async operations
                     if response.content:
                         try:
-                            # Try to parse as JSON first
                             json_response = response.json()
-                            return json_response
+                            # If the JSON response is a string, it's a UniqueIdentifier
+                            if isinstance(json_response, str):
+                                return {"UniqueIdentifier": json_response}
+                            else:
+                                return json_response
                         except:
-                            # If not JSON, treat the text as UniqueIdentifier (common for async operations)
+                            # If not JSON, return the text as UniqueIdentifier
                             unique_id = response.text.strip().replace('"', '')
                             return {"UniqueIdentifier": unique_id}
-                    return None
-                
-                # Check for 202 Accepted even if not in response.ok
-                if response.status_code == 202:
-                    if response.content:
-                        try:
-                            return response.json()
-                        except:
-                            # If not JSON, return the text as UniqueIdentifier
-                            return {"UniqueIdentifier": response.text.strip()}
                     else:
                         return {"UniqueIdentifier": "no-id"}
                 
-                # Handle 412 status - Link2Prisma uses this for async operations
-                if response.status_code == 412:
-                    if response.content:
-                        try:
-                            # Try to parse as JSON first
-                            json_response = response.json()
-                            # If it's a worker exists response, return it
-                            if 'WorkerExists' in json_response:
-                                return json_response
-                            # Otherwise treat as UniqueIdentifier
-                            return {"UniqueIdentifier": str(json_response)}
-                        except:
-                            # If not JSON, treat the text as UniqueIdentifier
-                            unique_id = response.text.strip().replace('"', '')
-                            return {"UniqueIdentifier": unique_id}
-                    return None
-
-                error_msg = f"Link2Prisma API error: {response.status_code}"
-                details = f"Response: {response.text}"
-                print(f"{error_msg} - {details}")
-                NotificationManager.notify_admin('Link2Prisma API Error', error_msg[:256])
-                raise Exception(error_msg)
-            finally:
-                # Clean up temporary files
-                try:
-                    os.unlink(cert_path)
-                    os.unlink(key_path)
-                except:
-                    pass
+                return response.json() if response.content else None
+            
+            # Handle 400 status - Link2Prisma returns 400 with UniqueIdentifier for queued operations
+            if response.status_code == 400:
+                if response.content:
+                    try:
+                        # Try to parse as JSON first
+                        json_response = response.json()
+                        return json_response
+                    except:
+                        # If not JSON, treat the text as UniqueIdentifier (common for async operations)
+                        unique_id = response.text.strip().replace('"', '')
+                        return {"UniqueIdentifier": unique_id}
+                return None
+            
+            # Check for 202 Accepted even if not in response.ok
+            if response.status_code == 202:
+                if response.content:
+                    try:
+                        return response.json()
+                    except:
+                        # If not JSON, return the text as UniqueIdentifier
+                        return {"UniqueIdentifier": response.text.strip()}
+                else:
+                    return {"UniqueIdentifier": "no-id"}
+            
+            # Handle 412 status - Link2Prisma uses this for async operations
+            if response.status_code == 412:
+                if response.content:
+                    try:
+                        # Try to parse as JSON first
+                        json_response = response.json()
+                        # If it's a worker exists response, return it
+                        if 'WorkerExists' in json_response:
+                            return json_response
+                        # Otherwise treat as UniqueIdentifier
+                        return {"UniqueIdentifier": str(json_response)}
+                    except:
+                        # If not JSON, treat the text as UniqueIdentifier
+                        unique_id = response.text.strip().replace('"', '')
+                        return {"UniqueIdentifier": unique_id}
+                return None
+
+            error_msg = f"Link2Prisma API error: {response.status_code}"
+            details = f"Response: {response.text}"
+            print(f"{error_msg} - {details}")
+            NotificationManager.notify_admin('Link2Prisma API Error', error_msg[:256])
+            raise Exception(error_msg)
 
         except requests.exceptions.SSLError as e:
             error_msg = "SSL Certificate error"
@@ -388,7 +421,9 @@ class Link2PrismaService:
             # Find the Dimona record for this application
             from apps.jobs.models.dimona import Dimona
             
-            dimona = Dimona.objects.filter(application=job_application).first()
+            dimona = Dimona.objects.filter(application=job_application).exclude(
+                reason=Dimona.cancelled_reason,
+            ).order_by('-created').first()
             if not dimona:
                 print("No Dimona record found for this application")
                 return True
@@ -424,7 +459,7 @@ class Link2PrismaService:
             if response and response.get('UniqueIdentifier'):
                 # Update the Dimona record
                 dimona.success = False
-                dimona.reason = "Dimona declaration cancelled"
+                dimona.reason = Dimona.cancelled_reason
                 dimona.save()
 
             return True
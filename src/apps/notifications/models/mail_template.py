@@ -1,6 +1,7 @@
-from mailjet_rest import Client
 from django.conf import settings
 
+from apps.core.utils.http_client_util import HttpClientUtil
+
 class MailTemplate:
 
     template_id: int = 6868496
@@ -8,10 +9,13 @@ class MailTemplate:
 
     def send(self, recipients: list[str], data: dict):
 
-        mailjet = Client(auth=(settings.MAILJET_API_KEY, settings.MAILJET_API_SECRET), version='v3.1')
-
-        response = mailjet.send.create(
-            data={
+        # Mailjet Send API v3.1, over the shared client instead of a new connection per mail
+        response = HttpClientUtil.request(
+            'mailjet',
+            'POST',
+            url='{}/v3.1/send'.format(settings.MAILJET_API_URL),
+            auth=(settings.MAILJET_API_KEY, settings.MAILJET_API_SECRET),
+            json={
                 'Messages': [
                     {
                         "From": {
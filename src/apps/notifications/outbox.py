@@ -0,0 +1,64 @@
+"""
+Mails and notifications carried out through the outbox, see OutboxUtil.
+
+The record_* functions are called by business code inside the transaction of a change,
+the other functions are the handlers the dispatcher runs once the change committed.
+"""
+
+from django.contrib.auth import get_user_model
+from django.utils.module_loading import import_string
+
+from apps.core.utils.outbox_util import OutboxUtil
+from apps.notifications.models.mail_template import MailTemplate
+
+
+def send_mail(template: str, recipients: list, data: dict) -> None:
+    import_string(template)().send(recipients=recipients, data=data)
+
+
+def notify_user(user_id: str, title: str, description: str) -> None:
+    from apps.notifications.managers.notification_manager import NotificationManager
+
+    user = get_user_model().objects.get(id=user_id)
+
+    NotificationManager.create_notification_for_user(user, title, description, image_url=None, send_mail=False)
+
+
+def notify_workers(title: str, description: str) -> None:
+    from apps.notifications.managers.notification_manager import _create_global_notification_impl
+
+    _create_global_notification_impl(title, description, image_url=None, send_push=True)
+
+
+def record_mail(template: type[MailTemplate], recipients: list, data: dict) -> None:
+    """
+    Records a mail, sent with the given template once the transaction commits.
+
+    Args:
+    template (type[MailTemplate]): The template class, e.g. DeniedMailTemplate.
+    recipients (list): The recipients, e.g. [{'Email': ...}].
+    data (dict): The JSON serializable variables of the template.
+    """
+
+    OutboxUtil.record(
+        'mail', 'apps.notifications.outbox.send_mail',
+        template='{}.{}'.format(template.__module__, template.__name__), recipients=recipients, data=data,
+    )
+
+
+def record_user_notification(user, title: str, description: str) -> None:
+    """
+    Records a notification with a push for a single user.
+    """
+
+    OutboxUtil.record(
+        'push', 'apps.notifications.outbox.notify_user', user_id=str(user.id), title=title, description=description,
+    )
+
+
+def record_workers_notification(title: str, description: str) -> None:
+    """
+    Records a notification with a push for all accepted workers.
+    """
+
+    OutboxUtil.record('push', 'apps.notifications.outbox.notify_workers', title=title, description=description)